@@ -0,0 +1,242 @@
+"""
+Modo de execução assíncrono (ASGI) do chat da FURIA.
+
+Expõe as mesmas rotas e contratos da aplicação Flask (/api/chat,
+/api/chat/batch, /api/chat/stream, /api/news, /api/news/stream, /api/news/search,
+/api/lineup, /api/tournaments, /api/bootstrap, /api/teams e /metrics), reaproveitando a lógica do chat e os caches de flask_app.py. A
+diferença é que o Draft5 é atualizado por uma tarefa do event loop com o
+cliente httpx, então nenhuma requisição fica presa esperando o draft5.gg.
+
+Uso:
+    uvicorn asgi_app:app --host 127.0.0.1 --port 3000
+    uvicorn --factory asgi_app:create_app --host 127.0.0.1 --port 3000
+"""
+import asyncio
+import contextlib
+import os
+import time
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.staticfiles import StaticFiles
+
+import flask_app
+from assets import DIST_DIR, IMMUTABLE_CACHE_CONTROL
+from draft5 import AsyncDraft5Client, AsyncDraft5Refresher
+from http_cache import conditional_response
+from metrics import CONTENT_TYPE, registry
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+
+
+class ImmutableStaticFiles(StaticFiles):
+    """Arquivos gerados pelo build de assets (hash no nome): cache imutável."""
+
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Registra o tempo até o início da resposta no histograma de cada rota.
+
+    As funções das rotas têm os mesmos nomes dos endpoints do Flask, então os
+    histogramas (flask_app.route_latency) são os mesmos nos dois modos.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                # O roteador preenche scope['endpoint'] antes de chamar a rota
+                endpoint = scope.get('endpoint')
+                endpoint = 'static' if isinstance(endpoint, StaticFiles) \
+                    else getattr(endpoint, '__name__', None)
+                flask_app.route_latency.get(endpoint, flask_app.route_latency_other).observe(
+                    time.perf_counter() - started)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def send_payload(request, payload, stale=False):
+    """Envia uma resposta serializada, com 304 quando o cliente já a tem."""
+    status, body, headers = conditional_response(payload, request.headers, stale)
+    return Response(body, status_code=status, headers=headers)
+
+
+async def home(request):
+    """Rota principal que serve a página inicial pré-renderizada"""
+    return send_payload(request, flask_app.index_payload())
+
+
+async def get_news(request):
+    """Rota da API para obter notícias"""
+    return send_payload(request, flask_app.news_payload(), flask_app.is_stale('news'))
+
+
+async def get_tournaments(request):
+    """Rota da API para obter os campeonatos (cache da página de campeonatos do Draft5)"""
+    return send_payload(request, flask_app.tournaments_payload(),
+                        flask_app.is_stale('tournaments'))
+
+
+async def get_bootstrap(request):
+    """Rota da API com notícias, campeonatos e line-up numa única resposta"""
+    return send_payload(request, flask_app.bootstrap_payload())
+
+
+async def news_stream(request):
+    """Rota que envia as notícias e, depois, só as mudanças a cada atualização"""
+    since = flask_app.stream_since(request.headers.get('Last-Event-ID')
+                                   or request.query_params.get('since'))
+    return StreamingResponse(flask_app.news_broker.stream_async(since),
+                             media_type='text/event-stream', headers=flask_app.STREAM_HEADERS)
+
+
+async def news_search(request):
+    """Rota da API que busca nas notícias já vistas (título e texto)"""
+    payload, status = flask_app.news_search_data(request.query_params.get('q'),
+                                                 request.query_params.get('limit'))
+    return JSONResponse(payload, status_code=status)
+
+
+async def chat(request):
+    """Rota da API para processar mensagens do chat"""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    return JSONResponse(flask_app.chat_response(data))
+
+
+async def chat_batch(request):
+    """Rota da API que responde várias mensagens do chat numa única requisição"""
+    try:
+        items = await request.json()
+    except ValueError:
+        items = None
+    payload, status = flask_app.chat_batch_response(items)
+    return JSONResponse(payload, status_code=status)
+
+
+async def chat_stream(request):
+    """Rota da API que envia a resposta do chat seção por seção"""
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    return StreamingResponse(flask_app.chat_stream_events(data), media_type='text/event-stream',
+                             headers=flask_app.STREAM_HEADERS)
+
+
+async def get_lineup(request):
+    """Rota da API para obter o line-up atual da FURIA"""
+    return send_payload(request, flask_app.lineup_payload(), flask_app.is_stale('line-up'))
+
+
+async def get_teams(request):
+    """Rota da API com os times acompanhados e o estado dos dados de cada um"""
+    return JSONResponse(flask_app.teams_data())
+
+
+async def get_team_page(request):
+    """Rota da API com as notícias, o line-up, as partidas ou os resultados de um time"""
+    payload, stale, status = flask_app.team_page(request.path_params['team'],
+                                                 request.path_params['page'])
+    if payload is None:
+        headers = {'Retry-After': '5'} if status == 503 else None
+        return JSONResponse({'error': flask_app.TEAM_PAGE_ERRORS[status]}, status_code=status,
+                            headers=headers)
+    return send_payload(request, payload, stale)
+
+
+async def get_metrics(request):
+    """Rota com as métricas da aplicação (latência, intenções, caches e Draft5)"""
+    return Response(registry.render(), headers={'Content-Type': CONTENT_TYPE})
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    """Inicia o atualizador do Draft5 (e o dos times) junto com o servidor e os encerra no final."""
+    shared = flask_app.shared_refresher
+    teams = flask_app.team_scheduler
+    loop = asyncio.get_running_loop()
+    if flask_app.refresher_state['shared'] and shared is not None:
+        # Vários workers (create_app): só o líder busca o Draft5, numa thread
+        flask_app.refresher_state['pid'] = os.getpid()
+        shared.start()
+        teams.start()
+        try:
+            yield
+        finally:
+            await loop.run_in_executor(None, teams.stop)
+            await loop.run_in_executor(None, shared.stop)
+        return
+
+    # O disjuntor e o cache negativo são os mesmos do cliente síncrono (e de /metrics)
+    client = AsyncDraft5Client(guard=flask_app.draft5_client.guard)
+    refresher = AsyncDraft5Refresher(flask_app.publish_draft5_data, client=client,
+                                     initial=flask_app.draft5_snapshot)
+    refresher.start()
+    # Os times usam o cliente síncrono, na thread da agenda
+    teams.start()
+    try:
+        yield
+    finally:
+        await loop.run_in_executor(None, teams.stop)
+        await refresher.stop()
+
+
+app = Starlette(
+    routes=[
+        Route('/', home),
+        Route('/api/news', get_news),
+        Route('/api/news/stream', news_stream),
+        Route('/api/news/search', news_search),
+        Route('/api/chat', chat, methods=['POST']),
+        Route('/api/chat/batch', chat_batch, methods=['POST']),
+        Route('/api/chat/stream', chat_stream, methods=['POST']),
+        Route('/api/lineup', get_lineup),
+        Route('/api/tournaments', get_tournaments),
+        Route('/api/bootstrap', get_bootstrap),
+        Route('/api/teams', get_teams),
+        Route('/api/teams/{team}/{page}', get_team_page),
+        Route('/metrics', get_metrics),
+        Mount('/static/dist', ImmutableStaticFiles(directory=DIST_DIR, check_dir=False),
+              name='dist'),
+        Mount('/static', StaticFiles(directory=STATIC_DIR), name='static')
+    ],
+    middleware=[Middleware(MetricsMiddleware),
+                Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'],
+                           allow_headers=['*'])],
+    lifespan=lifespan
+)
+
+
+def create_app():
+    """
+    Fábrica da aplicação: monta os dados (flask_app.preload) antes de atender.
+
+    O lifespan de cada worker inicia a atualização compartilhada
+    (shared_refresh): só o worker líder busca o Draft5.
+
+    Uso:
+        uvicorn --factory asgi_app:create_app --host 127.0.0.1 --port 3000
+    """
+    flask_app.preload()
+    flask_app.refresher_state['shared'] = True
+    return app
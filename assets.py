@@ -0,0 +1,172 @@
+"""
+Pipeline dos arquivos estáticos (imagens) da página do chat.
+
+O build gera, em static/dist, versões redimensionadas e recomprimidas das
+imagens de static/images, com o hash do conteúdo no nome do arquivo
+(ex.: furia-logo.3f2a9c1e.png), e um manifest.json que liga o caminho original
+aos arquivos gerados. Como o nome muda sempre que o conteúdo muda, esses
+arquivos podem ser servidos com cache "imutável" de longa duração.
+
+O template usa asset_url('images/furia-logo.png') para obter a URL da versão
+gerada; sem build (ou sem o manifest), a URL aponta para o arquivo original.
+
+O redimensionamento usa o Pillow. Sem ele, o build só copia as imagens com o
+hash no nome.
+
+Uso:
+    python assets.py
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+from io import BytesIO
+from urllib.parse import quote
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+STATIC_URL = '/static/'
+
+# Tamanho máximo (largura, altura) de cada imagem, já em 2x para telas de alta
+# densidade: o logo aparece com 70px de altura e o fundo em blocos de 400px
+IMAGE_SIZES = {
+    'images/furia-logo.png': (280, 140),
+    'images/Plano de fundo FURIA.png': (800, 800),
+    'images/Plano de fundo FURIA2.png': (800, 800),
+}
+DEFAULT_IMAGE_SIZE = (1600, 1600)
+
+# Extensões tratadas como imagem pelo build
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.webp')
+
+# Cache-Control dos arquivos com hash no nome
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_manifest = None
+
+
+def slugify(name):
+    """'Plano de fundo FURIA2' -> 'plano-de-fundo-furia2'"""
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def hashed_name(path, data, extension):
+    """Nome do arquivo gerado: <nome>.<hash do conteúdo>.<extensão>"""
+    stem = slugify(os.path.splitext(os.path.basename(path))[0])
+    return f"{stem}.{hashlib.sha1(data).hexdigest()[:8]}{extension}"
+
+
+def encode_variants(source, size):
+    """
+    Redimensiona a imagem e gera as variantes recomprimidas.
+
+    Imagens com transparência (ou paleta) saem em PNG otimizado; fotos sem
+    transparência saem em JPEG. Ambas ganham uma variante WebP, se ela for
+    menor que a padrão.
+
+    Returns:
+        dict: Formato ('default' ou 'webp') -> (bytes, extensão)
+    """
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.load()
+        image.thumbnail(size, Image.LANCZOS)
+        has_alpha = image.mode in ('RGBA', 'LA', 'P')
+
+        variants = {}
+        output = BytesIO()
+        if has_alpha:
+            image.save(output, 'PNG', optimize=True)
+            variants['default'] = (output.getvalue(), '.png')
+            image = image.convert('RGBA')
+        else:
+            image = image.convert('RGB')
+            image.save(output, 'JPEG', quality=82, optimize=True, progressive=True)
+            variants['default'] = (output.getvalue(), '.jpg')
+
+        output = BytesIO()
+        image.save(output, 'WEBP', quality=80, method=6)
+        if output.tell() < len(variants['default'][0]):
+            variants['webp'] = (output.getvalue(), '.webp')
+    return variants
+
+
+def build(static_dir=STATIC_DIR, dist_dir=DIST_DIR):
+    """
+    Gera as imagens de static/images em dist_dir e grava o manifest.json.
+
+    Returns:
+        dict: Manifest no formato {caminho original: {formato: caminho gerado}}
+    """
+    try:
+        import PIL  # noqa: F401
+        can_resize = True
+    except ImportError:
+        print("Pillow não instalado: as imagens serão só copiadas, sem redimensionar")
+        can_resize = False
+
+    if os.path.isdir(dist_dir):
+        shutil.rmtree(dist_dir)
+    os.makedirs(dist_dir)
+
+    manifest = {}
+    images_dir = os.path.join(static_dir, 'images')
+    for filename in sorted(os.listdir(images_dir)):
+        if not filename.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        path = f'images/{filename}'
+        source = os.path.join(images_dir, filename)
+        if can_resize:
+            variants = encode_variants(source, IMAGE_SIZES.get(path, DEFAULT_IMAGE_SIZE))
+        else:
+            with open(source, 'rb') as f:
+                variants = {'default': (f.read(), os.path.splitext(filename)[1].lower())}
+
+        manifest[path] = {}
+        for variant, (data, extension) in variants.items():
+            name = hashed_name(path, data, extension)
+            with open(os.path.join(dist_dir, name), 'wb') as f:
+                f.write(data)
+            manifest[path][variant] = 'dist/' + name
+            print(f"{path} ({variant}): {os.path.getsize(source) // 1024} KB -> {len(data) // 1024} KB")
+
+    with open(os.path.join(dist_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+    return manifest
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Lê o manifest gerado pelo build (vazio se o build não foi feito)."""
+    global _manifest
+    try:
+        with open(path, encoding='utf-8') as f:
+            _manifest = json.load(f)
+    except (OSError, ValueError):
+        _manifest = {}
+    return _manifest
+
+
+def asset_url(path, variant='default'):
+    """
+    Retorna a URL de um arquivo estático, preferindo a versão gerada pelo build.
+
+    Args:
+        path (str): Caminho dentro de static/ (ex.: 'images/furia-logo.png')
+        variant (str): Formato desejado ('default' ou 'webp'); se a variante
+            não existir, usa a padrão
+
+    Returns:
+        str: URL do arquivo
+    """
+    manifest = _manifest if _manifest is not None else load_manifest()
+    entry = manifest.get(path)
+    if entry:
+        return STATIC_URL + entry.get(variant, entry['default'])
+    return STATIC_URL + quote(path)
+
+
+if __name__ == '__main__':
+    build()
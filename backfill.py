@@ -0,0 +1,438 @@
+"""
+Backfill do histórico de partidas da FURIA a partir do arquivo de resultados do Draft5.
+
+fetch_furia_results só tem as últimas partidas digitadas à mão; o Draft5 tem o
+histórico completo na listagem paginada de resultados da equipe (da partida
+mais recente para a mais antiga), com uma página por partida (placares dos
+mapas e estatísticas dos jogadores). O backfill percorre a listagem, baixa as
+páginas das partidas que ainda não estão no repositório de partidas
+(match_store) e grava cada página da listagem numa única transação.
+
+- As requisições passam por uma sessão HTTP com pool de conexões, com no
+  máximo --concurrency simultâneas e --rate por segundo (somando todas), e
+  respeitam o Retry-After das respostas 429 e 503.
+- O HTML das partidas é lido num pool de processos (--parse-workers), enquanto
+  as threads continuam baixando as próximas páginas.
+- O progresso fica num checkpoint (JSON gravado de forma atômica depois de
+  cada página da listagem). Uma execução interrompida continua da página em que
+  parou.
+- Numa nova execução, a listagem é lida do começo só até a partida mais
+  recente da execução anterior, e só as partidas que não estão no repositório
+  são baixadas.
+- Uma partida cuja página falha mesmo depois das novas tentativas (ex.: 404,
+  página removida, HTML que não dá para ler ou data inválida) fica de fora e
+  vai para a lista 'failed' do checkpoint, que as próximas execuções pulam;
+  com --retry-failed, elas são baixadas de novo antes da listagem.
+
+Uso:
+    python backfill.py --rate 2 --concurrency 4
+    python backfill.py --base-url http://127.0.0.1:8055 --db /tmp/matches.sqlite3 --max-pages 5
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from multiprocessing import get_context
+
+from draft5 import DRAFT5_BASE_URL, REQUEST_HEADERS, REQUEST_TIMEOUT
+from draft5_parser import extract_next_page, parse_match, parse_results
+from match_store import DISPLAY_DATE_RE, MATCH_DB_PATH, MatchStore
+from teams import HOME_TEAM, team_games
+
+# Listagem paginada dos resultados da equipe (a primeira página)
+ARCHIVE_PATH = "/equipe/{slug}/resultados"
+
+# Arquivo do checkpoint do backfill
+CHECKPOINT_PATH = os.getenv('BACKFILL_CHECKPOINT', os.path.join('data', 'backfill_checkpoint.json'))
+
+# Tentativas por página (respostas 429, 5xx e erros de conexão)
+RETRIES = 4
+
+# Espera máxima pedida num Retry-After que ainda é respeitada (em segundos)
+MAX_RETRY_AFTER = 60
+
+# Códigos HTTP que valem uma nova tentativa
+RETRY_STATUSES = frozenset((429, 500, 502, 503, 504))
+
+
+class RateLimiter:
+    """
+    Espaça o início das requisições para no máximo rate por segundo (entre todas as threads).
+
+    Args:
+        rate (float): Requisições por segundo (0 ou menos: sem limite)
+    """
+
+    def __init__(self, rate):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def delay(self, seconds):
+        """Adia todas as próximas requisições (ex.: o servidor pediu Retry-After)."""
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + seconds)
+
+
+def retry_after(value):
+    """Segundos pedidos no cabeçalho Retry-After (número ou data HTTP), ou None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ArchiveClient:
+    """
+    Cliente HTTP do backfill: sessão com pool de conexões, limite de ritmo e novas tentativas.
+
+    Args:
+        rate (float): Requisições por segundo
+        concurrency (int): Requisições simultâneas (tamanho do pool)
+        timeout (tuple): Tempos limite de (conexão, leitura), em segundos
+    """
+
+    def __init__(self, rate, concurrency, timeout=REQUEST_TIMEOUT):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.limiter = RateLimiter(rate)
+        self.timeout = timeout
+        self.requests = 0
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update(REQUEST_HEADERS)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency,
+                                           thread_name_prefix='backfill')
+
+    def get(self, url):
+        """
+        Baixa a página, tentando de novo (com espera crescente) em 429, 5xx e erros de conexão.
+
+        Returns:
+            str: HTML da página
+        """
+        import requests
+
+        for attempt in range(RETRIES):
+            self.limiter.wait()
+            self.requests += 1
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+            except requests.RequestException:
+                if attempt == RETRIES - 1:
+                    raise
+                time.sleep(2 ** attempt * 0.5)
+                continue
+            if response.status_code in RETRY_STATUSES and attempt < RETRIES - 1:
+                wait = retry_after(response.headers.get('Retry-After'))
+                wait = min(wait if wait is not None else 2 ** attempt * 0.5, MAX_RETRY_AFTER)
+                self.limiter.delay(wait)
+                continue
+            response.raise_for_status()
+            return response.text
+
+    def submit(self, url):
+        return self.executor.submit(self.get, url)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+
+def load_checkpoint(path):
+    """
+    Lê o checkpoint do backfill.
+
+    Returns:
+        dict: {newest: link da partida mais recente já coberta, next_url: página
+        da listagem onde a varredura do histórico parou, complete: se a
+        varredura do histórico chegou ao fim, failed: linhas da listagem das
+        partidas que falharam}
+    """
+    try:
+        with open(path, encoding='utf-8') as file:
+            state = json.load(file)
+    except FileNotFoundError:
+        state = {'newest': None, 'next_url': None, 'complete': False}
+    state.setdefault('failed', [])
+    return state
+
+
+def save_checkpoint(path, state):
+    """Grava o checkpoint num arquivo temporário e o troca de lugar (nunca fica pela metade)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as file:
+        json.dump(state, file, ensure_ascii=False, indent=2)
+    os.replace(temporary, path)
+
+
+def normalize_match(game, details):
+    """
+    Monta a partida no formato do repositório (o de fetch_furia_results).
+
+    Args:
+        game (dict): Linha da listagem, já do ponto de vista do time (ver teams.team_games)
+        details (dict): Página da partida (ver draft5_parser.parse_match)
+
+    Returns:
+        dict: {data, adversario, resultado, torneio, placares, estatisticas, link},
+        ou None se a data da listagem não estiver no formato dd/mm/aaaa
+    """
+    if not DISPLAY_DATE_RE.fullmatch(game.get('date') or ''):
+        return None
+    swapped = game.get('_swapped', False)
+    placares = {}
+    for item in details['maps']:
+        score = item['score']
+        placares[item['map']] = '-'.join(reversed(score.split('-'))) if swapped else score
+    estatisticas = {}
+    for row in details['players']:
+        estatisticas.setdefault(row['team'], {})[row['player']] = {
+            'K/D': row['kd'],
+            'K/D DIFF': row['kd_diff'],
+            'ADR': row['adr'],
+            'KAST': row['kast'],
+            'Rating': row['rating']
+        }
+    return {
+        'data': game['date'],
+        'adversario': game['opponent'],
+        'resultado': game['score'],
+        'torneio': game['tournament'],
+        'placares': placares,
+        'estatisticas': estatisticas,
+        'link': game['link']
+    }
+
+
+class Backfill:
+    """
+    Percorre o arquivo de resultados e grava as partidas novas (ver o início do módulo).
+
+    Args:
+        store (MatchStore): Repositório onde as partidas são gravadas
+        checkpoint (str): Arquivo do checkpoint
+        base_url (str): URL base do Draft5
+        team (Team): Time cujo histórico é baixado
+        rate (float): Requisições por segundo
+        concurrency (int): Requisições simultâneas
+        parse_workers (int): Processos que leem as páginas das partidas (0: no
+            próprio processo)
+        retry_failed (bool): Tenta de novo as partidas que falharam nas
+            execuções anteriores
+    """
+
+    def __init__(self, store, checkpoint=CHECKPOINT_PATH, base_url=DRAFT5_BASE_URL,
+                 team=HOME_TEAM, rate=2, concurrency=4, parse_workers=None,
+                 retry_failed=False):
+        self.store = store
+        self.checkpoint = checkpoint
+        self.base_url = base_url.rstrip('/')
+        self.team = team
+        self.rate = rate
+        self.concurrency = concurrency
+        self.parse_workers = (os.cpu_count() or 1) if parse_workers is None else parse_workers
+        self.retry_failed = retry_failed
+        self.stats = {'pages': 0, 'matches': 0, 'skipped': 0, 'failed': 0}
+
+    @property
+    def first_url(self):
+        return self.base_url + ARCHIVE_PATH.format(slug=self.team.slug)
+
+    def run(self, max_pages=None):
+        """
+        Executa o backfill até o fim do arquivo ou até max_pages páginas da listagem.
+
+        Returns:
+            dict: {pages, matches, skipped, failed, requests, complete}
+        """
+        state = load_checkpoint(self.checkpoint)
+        retry = state['failed'] if self.retry_failed else []
+        if retry:
+            state['failed'] = []
+        # Lista compartilhada com o checkpoint: as partidas que falharem entram nela
+        self._failed = state['failed']
+        self._known = self.store.links() | {game['link'] for game in self._failed}
+        self._max_pages = max_pages
+        # Processos criados com spawn: as threads do cliente não passam por fork
+        parser = (ProcessPoolExecutor(self.parse_workers, mp_context=get_context('spawn'))
+                  if self.parse_workers > 0 else None)
+        client = ArchiveClient(self.rate, self.concurrency)
+        try:
+            if retry:
+                self._download(client, parser, retry)
+                save_checkpoint(self.checkpoint, state)
+            self._run(state, client, parser)
+        finally:
+            client.close()
+            if parser is not None:
+                parser.shutdown()
+        return dict(self.stats, requests=client.requests, complete=state['complete'])
+
+    def _run(self, state, client, parser):
+        listing = client.submit(self.first_url)
+        if state['newest'] is not None:
+            # Partidas novas no começo da listagem, até a mais recente da última execução
+            newest, url = None, self.first_url
+            while url is not None:
+                page = self._page(client, parser, listing, url, state['newest'])
+                if page is None:
+                    return
+                games, url, listing = page
+                newest = newest or (games[0]['link'] if games else None)
+                if any(game['link'] == state['newest'] for game in games):
+                    break
+            state['newest'] = newest or state['newest']
+            save_checkpoint(self.checkpoint, state)
+            if state['complete']:
+                return
+            listing = client.submit(state['next_url']) if state['next_url'] else None
+        elif state['next_url'] is None:
+            state['next_url'] = self.first_url
+
+        # Histórico, de onde a varredura anterior parou
+        url = state['next_url']
+        while url is not None:
+            page = self._page(client, parser, listing, url)
+            if page is None:
+                return
+            games, url, listing = page
+            if state['newest'] is None and games:
+                state['newest'] = games[0]['link']
+            state['next_url'] = url
+            state['complete'] = url is None
+            save_checkpoint(self.checkpoint, state)
+
+    def _page(self, client, parser, listing, url, stop=None):
+        """
+        Processa uma página da listagem: baixa e grava as partidas que faltam.
+
+        Args:
+            listing (Future): Download da página, já iniciado (ou None)
+            url (str): URL da página
+            stop (str): Link de partida que encerra a leitura da listagem (a
+                próxima página não é baixada se esta o tiver)
+
+        Returns:
+            tuple: (partidas da listagem, URL da próxima página, download da
+            próxima página já iniciado), ou None se o limite de páginas acabou
+        """
+        if self._max_pages is not None and self.stats['pages'] >= self._max_pages:
+            return None
+        html = (listing or client.submit(url)).result()
+        self.stats['pages'] += 1
+        games = []
+        for game in parse_results(html, self.base_url):
+            oriented = team_games([game], self.team.name)
+            if oriented:
+                games.append(dict(oriented[0], _swapped=oriented[0] is not game))
+        next_url = extract_next_page(html, self.base_url)
+        # A próxima página da listagem é baixada junto com as partidas desta
+        upcoming = None
+        if next_url and not any(game['link'] == stop for game in games):
+            upcoming = client.submit(next_url)
+
+        missing = [game for game in games if game['link'] and game['link'] not in self._known]
+        self.stats['skipped'] += len(games) - len(missing)
+        self._download(client, parser, missing)
+        return games, next_url, upcoming
+
+    def _download(self, client, parser, missing):
+        """Baixa, lê e grava as partidas (as que falharem vão para o checkpoint)."""
+        downloads = []
+        for game in missing:
+            # Sem a data, a partida não entra no repositório: nem vale baixar a página
+            if DISPLAY_DATE_RE.fullmatch(game.get('date') or ''):
+                downloads.append((game, client.submit(game['link'])))
+            else:
+                self._fail(game, f"data inválida: {game.get('date')!r}")
+        parsed = []
+        for game, download in downloads:
+            try:
+                page_html = download.result()
+                if parser is not None:
+                    parsed.append((game, parser.submit(parse_match, page_html, self.base_url)))
+                else:
+                    parsed.append((game, parse_match(page_html, self.base_url)))
+            except Exception as e:
+                self._fail(game, e)
+        matches = []
+        for game, details in parsed:
+            try:
+                match = normalize_match(game, details if parser is None else details.result())
+            except Exception as e:
+                self._fail(game, e)
+                continue
+            matches.append(match)
+        if matches:
+            self.store.upsert_matches(matches)
+            self._known.update(match['link'] for match in matches)
+            self.stats['matches'] += len(matches)
+
+    def _fail(self, game, error):
+        """Deixa a partida de fora (e anotada no checkpoint) para o backfill seguir adiante."""
+        print(f"Erro na partida {game['link']} (ignorada): {str(error)}")
+        self.stats['failed'] += 1
+        self._failed.append(game)
+        self._known.add(game['link'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--base-url', default=DRAFT5_BASE_URL)
+    parser.add_argument('--team', default=HOME_TEAM.slug, help='slug do time no Draft5')
+    parser.add_argument('--db', default=MATCH_DB_PATH, help='arquivo do repositório de partidas')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH)
+    parser.add_argument('--rate', type=float, default=2, help='requisições por segundo')
+    parser.add_argument('--concurrency', type=int, default=4, help='requisições simultâneas')
+    parser.add_argument('--parse-workers', type=int, default=None,
+                        help='processos que leem as páginas (padrão: um por CPU; 0: nenhum)')
+    parser.add_argument('--max-pages', type=int, default=None,
+                        help='para depois desta quantidade de páginas da listagem')
+    parser.add_argument('--retry-failed', action='store_true',
+                        help='tenta de novo as partidas que falharam nas execuções anteriores')
+    args = parser.parse_args()
+
+    from teams import parse_teams
+
+    backfill = Backfill(MatchStore(args.db), args.checkpoint, args.base_url,
+                        parse_teams(args.team)[0], args.rate, args.concurrency,
+                        args.parse_workers, args.retry_failed)
+    started = time.perf_counter()
+    try:
+        result = backfill.run(args.max_pages)
+    except Exception as e:
+        print(f"Erro no backfill (o próximo continua do checkpoint): {str(e)}")
+        raise SystemExit(1)
+    print(f"{result['matches']} partidas gravadas, {result['skipped']} já existentes, "
+          f"{result['failed']} com erro, "
+          f"{result['pages']} páginas da listagem, {result['requests']} requisições em "
+          f"{time.perf_counter() - started:.1f} s"
+          + ('' if result['complete'] else ' (histórico incompleto: rode de novo para continuar)'))
+
+
+if __name__ == '__main__':
+    main()
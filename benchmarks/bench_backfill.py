@@ -0,0 +1,304 @@
+"""
+Confere o backfill do histórico de partidas contra um Draft5 local.
+
+Sobe o Draft5 local com um arquivo de resultados sintético (algumas centenas
+de partidas, 20 por página da listagem, parte delas com a FURIA como
+adversária) e a página de cada partida, com os placares dos mapas e as
+estatísticas dos jogadores. Então:
+1. roda o backfill parando depois de --interrupt páginas da listagem (como
+   uma execução interrompida);
+2. roda de novo, que continua do checkpoint até o fim do arquivo, com uma
+   parte das respostas saindo com erro 503;
+3. coloca partidas novas no começo do arquivo e roda de novo, que só deve
+   baixar as novas (e as páginas da listagem até a última já gravada);
+4. roda mais uma vez sem nada novo, que só deve baixar a primeira página;
+5. devolve as páginas removidas e roda com --retry-failed, que deve gravar
+   essas partidas.
+
+Algumas partidas do arquivo não têm página (404) e uma tem a data "A definir":
+elas devem ficar de fora, anotadas no checkpoint, sem travar o backfill nem
+ser baixadas de novo nas execuções seguintes.
+
+Termina com erro se alguma página de partida for baixada mais de uma vez,
+se o repositório não tiver exatamente as partidas do arquivo (com placares e
+estatísticas do ponto de vista da FURIA), se o ritmo ou o número de
+requisições simultâneas passar do limite ou se as execuções seguintes
+baixarem mais do que o necessário.
+
+Uso:
+    python benchmarks/bench_backfill.py --matches 600 --new 25 --rate 200 --concurrency 4
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from fake_draft5 import start_server  # noqa: E402
+
+PER_PAGE = 20
+OPPONENTS = ['MIBR', 'Imperial', 'paiN', 'The MongolZ', 'Virtus.pro', 'Complexity',
+             'Apogee', 'Legacy', 'Vitality', 'Natus Vincere']
+MAPS = ['Mirage', 'Inferno', 'Nuke', 'Ancient', 'Anubis', 'Train', 'Dust2']
+PLAYERS = ['FalleN', 'KSCERATO', 'yuurih', 'molodoy', 'YEKINDAR']
+
+
+def report(name, ok, detail):
+    print(f"{'ok ' if ok else 'FALHOU'} {name:<32} {detail}")
+    return ok
+
+
+def with_etag(body):
+    return body, '"%s"' % hashlib.sha1(body).hexdigest()
+
+
+def make_matches(count, first_id, last_day, rng):
+    """Partidas sintéticas, da mais recente para a mais antiga, uma por dia até last_day."""
+    matches = []
+    for i in range(count):
+        opponent = rng.choice(OPPONENTS)
+        maps = rng.sample(MAPS, rng.choice((1, 3)))
+        scores = [f"{rng.randint(0, 16)}-{rng.randint(0, 16)}" for _ in maps]
+        won = sum(int(a) > int(b) for a, b in (score.split('-') for score in scores))
+        stats = {team: {player: {'K/D': f"{rng.randint(5, 30)}-{rng.randint(5, 30)}",
+                                 'K/D DIFF': str(rng.randint(-10, 10)),
+                                 'ADR': f"{rng.uniform(50, 110):.1f}",
+                                 'KAST': f"{rng.uniform(50, 85):.1f}%",
+                                 'Rating': f"{rng.uniform(0.6, 1.5):.2f}"}
+                         for player in (PLAYERS if team == 'FURIA'
+                                        else [f"{opponent[:3]}{n}" for n in range(5)])}
+                 for team in ('FURIA', opponent)}
+        matches.append({
+            'id': first_id + i,
+            'date': (last_day - timedelta(days=i)).strftime('%d/%m/%Y'),
+            'opponent': opponent,
+            'tournament': f"Liga {rng.randint(1, 40)}",
+            'score': f"{won}-{len(maps) - won}",
+            'maps': dict(zip(maps, scores)),
+            'stats': stats,
+            # Parte das partidas aparece com a FURIA do lado direito
+            'swapped': rng.random() < 0.2
+        })
+    return matches
+
+
+def flip(score):
+    return '-'.join(reversed(score.split('-')))
+
+
+def match_path(match):
+    return f"/partida/{match['id']}-FURIA-vs-{match['opponent'].replace(' ', '-')}"
+
+
+def listing_path(number):
+    return '/equipe/330-FURIA/resultados' + (f'/{number}' if number > 1 else '')
+
+
+def match_page(match):
+    maps = ''.join(
+        f'<div class="map-result"><span class="map-name">{name}</span>'
+        f'<span class="map-score">{flip(score) if match["swapped"] else score}</span></div>'
+        for name, score in match['maps'].items())
+    rows = ''.join(
+        f'<tr class="player-stats"><td class="team">{team}</td>'
+        f'<td class="nickname">{player}</td><td class="kd">{row["K/D"]}</td>'
+        f'<td class="kd-diff">{row["K/D DIFF"]}</td><td class="adr">{row["ADR"]}</td>'
+        f'<td class="kast">{row["KAST"]}</td><td class="rating">{row["Rating"]}</td></tr>'
+        for team, players in match['stats'].items() for player, row in players.items())
+    return (f'<html><body><section class="maps">{maps}</section>'
+            f'<table class="stats">{rows}</table></body></html>').encode()
+
+
+def listing_page(matches, number, last):
+    items = []
+    for match in matches:
+        team, opponent, score = 'FURIA', match['opponent'], match['score']
+        if match['swapped']:
+            team, opponent, score = opponent, team, flip(score)
+        items.append(
+            f'<div class="match-result"><div class="team">{team}</div>'
+            f'<div class="score">{score}</div><div class="opponent">{opponent}</div>'
+            f'<div class="date">{match["date"]}</div>'
+            f'<div class="tournament">{match["tournament"]}</div>'
+            f'<a class="match-link" href="{match_path(match)}">Ver partida</a></div>')
+    pagination = ('' if last else
+                  f'<a class="next-page" href="{listing_path(number + 1)}">Próxima</a>')
+    return (f'<html><body><section class="results">{"".join(items)}</section>'
+            f'<nav class="pagination">{pagination}</nav></body></html>').encode()
+
+
+def make_pages(matches, removed=()):
+    pages = {match_path(match): with_etag(match_page(match)) for match in matches
+             if match['id'] not in removed}
+    count = math.ceil(len(matches) / PER_PAGE)
+    for number in range(1, count + 1):
+        chunk = matches[(number - 1) * PER_PAGE:number * PER_PAGE]
+        pages[listing_path(number)] = with_etag(listing_page(chunk, number, number == count))
+    return pages
+
+
+def expected(match):
+    return {
+        'data': match['date'],
+        'adversario': match['opponent'],
+        'resultado': match['score'],
+        'torneio': match['tournament'],
+        'placares': match['maps'],
+        'estatisticas': match['stats']
+    }
+
+
+def stored(store):
+    rows = store._connection().execute("SELECT payload FROM matches").fetchall()
+    return [json.loads(payload) for (payload,) in rows]
+
+
+def check_store(store, matches, base_url, broken=()):
+    """Partidas gravadas que faltam ou diferem do esperado (as quebradas devem faltar)."""
+    found = {match['link']: match for match in stored(store)}
+    wrong = 0
+    for match in matches:
+        if match['id'] in broken:
+            wrong += found.pop(base_url + match_path(match), None) is not None
+            continue
+        payload = dict(found.pop(base_url + match_path(match), {}))
+        payload.pop('link', None)
+        wrong += payload != expected(match)
+    return wrong + len(found)
+
+
+def run(backfill, server, max_pages=None):
+    with server.lock:
+        server.hits.clear()
+    server.max_in_flight = 0
+    started = time.perf_counter()
+    result = backfill.run(max_pages)
+    result['elapsed'] = time.perf_counter() - started
+    with server.lock:
+        hits = dict(server.hits)
+    result['listing_hits'] = sum(count for path, count in hits.items()
+                                 if path.startswith('/equipe/'))
+    result['match_hits'] = {path: count for path, count in hits.items()
+                            if path.startswith('/partida/')}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--matches', type=int, default=600, help='partidas no arquivo')
+    parser.add_argument('--new', type=int, default=25, help='partidas novas na terceira execução')
+    parser.add_argument('--interrupt', type=int, default=8,
+                        help='páginas da listagem da primeira execução')
+    parser.add_argument('--rate', type=float, default=200, help='requisições por segundo')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--parse-workers', type=int, default=2)
+    parser.add_argument('--delay-ms', type=float, default=10,
+                        help='atraso de cada resposta do Draft5 local, em ms')
+    parser.add_argument('--error-rate', type=float, default=0.02,
+                        help='fração de respostas 503 na segunda execução')
+    parser.add_argument('--broken', type=int, default=3,
+                        help='partidas sem página (404) no arquivo, além da sem data')
+    parser.add_argument('--seed', type=int, default=25)
+    args = parser.parse_args()
+
+    from backfill import Backfill
+    from match_store import MatchStore
+
+    rng = random.Random(args.seed)
+    today = date(2025, 4, 10)
+    history = make_matches(args.matches, 1, today - timedelta(days=args.new), rng)
+    # Partidas quebradas espalhadas pelo arquivo: páginas removidas e uma sem data
+    removed = {match['id'] for match in rng.sample(history, args.broken)}
+    undated = rng.choice([match for match in history if match['id'] not in removed])
+    undated['date'] = 'A definir'
+    broken = removed | {undated['id']}
+    server = start_server(pages=make_pages(history, removed), delay=args.delay_ms / 1000)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        store = MatchStore(os.path.join(directory, 'matches.sqlite3'))
+
+        def backfill(retry_failed=False):
+            return Backfill(store, os.path.join(directory, 'checkpoint.json'), server.base_url,
+                            rate=args.rate, concurrency=args.concurrency,
+                            parse_workers=args.parse_workers, retry_failed=retry_failed)
+
+        pages = math.ceil(args.matches / PER_PAGE)
+        print(f"{args.matches} partidas em {pages} páginas da listagem; {args.rate:.0f} req/s, "
+              f"{args.concurrency} simultâneas, {args.parse_workers} processos de leitura")
+
+        first = run(backfill(), server, args.interrupt)
+        covered = history[:args.interrupt * PER_PAGE]
+        first_broken = sum(match['id'] in broken for match in covered)
+        results.append(report('execução interrompida', not first['complete']
+                              and first['pages'] == args.interrupt
+                              and first['matches'] == len(covered) - first_broken
+                              and first['failed'] == first_broken,
+                              f"{first['pages']} páginas, {first['matches']} partidas, "
+                              f"{first['failed']} com erro"))
+
+        server.error_rate = args.error_rate
+        second = run(backfill(), server)
+        server.error_rate = 0
+        repeated = set(first['match_hits']) & set(second['match_hits'])
+        retried = sum(count > 1 for count in second['match_hits'].values())
+        results.append(report('continua do checkpoint', second['complete'] and not repeated
+                              and first['matches'] + second['matches'] == args.matches - len(broken)
+                              and first['failed'] + second['failed'] == len(broken),
+                              f"{second['matches']} partidas, {len(repeated)} baixadas de novo, "
+                              f"{second['failed']} com erro, "
+                              f"{server.errors} respostas 503 ({retried} páginas com nova tentativa)"))
+        elapsed = second['elapsed']
+        results.append(report('ritmo e simultaneidade',
+                              second['requests'] / elapsed <= args.rate * 1.05
+                              and server.max_in_flight <= args.concurrency,
+                              f"{second['requests'] / elapsed:.0f} req/s, até "
+                              f"{server.max_in_flight} simultâneas; "
+                              f"{second['matches'] / elapsed:.0f} partidas/s"))
+        wrong = check_store(store, history, server.base_url, broken)
+        results.append(report('partidas gravadas', wrong == 0,
+                              f"{len(stored(store))} no repositório, {wrong} erradas ou faltando"))
+
+        # Partidas novas no começo do arquivo
+        fresh = make_matches(args.new, args.matches + 1, today, rng)
+        history = fresh + history
+        server.pages = make_pages(history, removed)
+        third = run(backfill(), server)
+        # Até a página com a partida mais recente da execução anterior
+        needed = math.ceil((args.new + 1) / PER_PAGE)
+        fresh_paths = {match_path(match) for match in fresh}
+        results.append(report('só as partidas novas', set(third['match_hits']) == fresh_paths
+                              and third['listing_hits'] == needed,
+                              f"{len(third['match_hits'])} partidas, "
+                              f"{third['listing_hits']} páginas da listagem"))
+        wrong = check_store(store, history, server.base_url, broken)
+        results.append(report('partidas gravadas (novas)', wrong == 0,
+                              f"{len(stored(store))} no repositório, {wrong} erradas ou faltando"))
+
+        fourth = run(backfill(), server)
+        results.append(report('sem novidades', not fourth['match_hits']
+                              and fourth['listing_hits'] == 1,
+                              f"{fourth['requests']} requisições em {fourth['elapsed'] * 1000:.0f} ms"))
+
+        # As páginas removidas voltam: --retry-failed grava essas partidas
+        server.pages = make_pages(history)
+        fifth = run(backfill(retry_failed=True), server)
+        results.append(report('novas tentativas das com erro',
+                              fifth['matches'] == len(removed) and fifth['failed'] == 1
+                              and len(fifth['match_hits']) == len(removed),
+                              f"{fifth['matches']} partidas gravadas, {fifth['failed']} com erro"))
+    server.shutdown()
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark do /api/chat/batch contra chamadas individuais ao /api/chat.
+
+Envia as mesmas mensagens (CORPUS de bench_intents, distribuídas entre várias
+sessões) uma por requisição e em lotes, e compara as mensagens por segundo.
+Sem --url roda dentro do processo, pelo cliente de testes do Flask; com --url
+usa HTTP de verdade contra um servidor já rodando (Flask ou ASGI).
+
+Uso:
+    python benchmarks/bench_chat_batch.py --messages 5000 --batch-size 100
+    python benchmarks/bench_chat_batch.py --url http://127.0.0.1:3000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from bench_intents import CORPUS  # noqa: E402
+
+
+def make_items(count, sessions):
+    """Mensagens do corpus distribuídas entre as sessões (em rodízio)."""
+    return [{'session_id': f'bench-{i % sessions}', 'message': CORPUS[i % len(CORPUS)]}
+            for i in range(count)]
+
+
+def in_process_client():
+    """Função post(caminho, json) usando o cliente de testes do Flask."""
+    os.environ.setdefault('MATCH_DB_PATH', os.path.join(tempfile.mkdtemp(), 'matches.sqlite3'))
+    os.environ.setdefault('DRAFT5_BASE_URL', 'http://127.0.0.1:9')
+    os.environ.setdefault('DRAFT5_SNAPSHOT_PATH', '')
+    import flask_app
+
+    client = flask_app.app.test_client()
+
+    def post(path, payload):
+        response = client.post(path, json=payload)
+        assert response.status_code == 200, response.status_code
+        return response.get_json()
+    return post
+
+
+def http_client(url):
+    """Função post(caminho, json) usando uma sessão HTTP (keep-alive)."""
+    import requests
+
+    session = requests.Session()
+
+    def post(path, payload):
+        response = session.post(url.rstrip('/') + path, json=payload, timeout=30)
+        response.raise_for_status()
+        return response.json()
+    return post
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--sessions', type=int, default=200)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--url', help='servidor já rodando (padrão: cliente de testes do Flask)')
+    args = parser.parse_args()
+
+    post = http_client(args.url) if args.url else in_process_client()
+    items = make_items(args.messages, args.sessions)
+
+    start = time.perf_counter()
+    single = [post('/api/chat', item)['response'] for item in items]
+    single_rate = len(items) / (time.perf_counter() - start)
+
+    # Sessões novas para o lote começar do mesmo contexto das chamadas individuais
+    items = [dict(item, session_id='batch-' + item['session_id']) for item in items]
+    start = time.perf_counter()
+    batched = []
+    for i in range(0, len(items), args.batch_size):
+        batched.extend(result['response']
+                       for result in post('/api/chat/batch', items[i:i + args.batch_size]))
+    batch_rate = len(items) / (time.perf_counter() - start)
+
+    assert batched == single, 'as respostas em lote diferem das individuais'
+    print(f"{args.messages} mensagens, {args.sessions} sessões ({'HTTP' if args.url else 'em processo'})")
+    print(f"/api/chat (uma por requisição): {single_rate:>10,.0f} msg/s")
+    print(f"/api/chat/batch ({args.batch_size} por lote):   {batch_rate:>10,.0f} msg/s")
+
+
+if __name__ == '__main__':
+    main()
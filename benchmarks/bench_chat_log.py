@@ -0,0 +1,164 @@
+"""
+Confere o registro das conversas do chat e mede o custo dele na resposta.
+
+Mede:
+- a latência de ChatLog.record (o que a rota do chat paga) contra gravar cada
+  registro direto no disco, como seria sem a fila;
+- a vazão da thread de gravação e o tamanho dos arquivos comprimidos;
+- as políticas com um disco lento (cada lote demora --slow-ms): 'drop'
+  descarta registros sem atrasar quem registra, 'block' não descarta (com
+  espera suficiente) mas atrasa;
+- a troca de arquivo pelo tamanho (--max-kb) e a leitura de volta de todos os
+  registros gravados, com o resumo offline.
+
+Termina com erro se algum registro aceito não for lido de volta, se a política
+'drop' atrasar quem registra ou se a 'block' descartar registros.
+
+Uso:
+    python benchmarks/bench_chat_log.py --records 50000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chat_log  # noqa: E402
+from chat_log import ChatLog, log_files, read_records, summarize  # noqa: E402
+
+MESSAGES = [
+    ('qual foi o último jogo?', 'last_game'),
+    ('quando é o próximo jogo?', 'next_game'),
+    ('notícias sobre o FalleN', 'news_search'),
+    ('stats do KSCERATO', 'player_average'),
+    ('quero ver o line-up', 'lineup'),
+    ('asdkjh qwe', 'fallback'),
+    ('vcs vão pro major?', 'fallback'),
+]
+
+
+def report(name, ok, detail):
+    print(f"{'ok ' if ok else 'FALHOU'} {name:<30} {detail}")
+    return ok
+
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def make_records(count, seed):
+    rng = random.Random(seed)
+    return [(f'sessao-{rng.randrange(count // 10 + 1)}',) + rng.choice(MESSAGES)
+            for _ in range(count)]
+
+
+def record_all(log, records):
+    """Registra tudo; retorna as latências de record e quantos foram aceitos."""
+    latencies = []
+    accepted = 0
+    for session_id, message, intent in records:
+        started = time.perf_counter()
+        accepted += log.record(session_id, message, intent)
+        latencies.append(time.perf_counter() - started)
+    return latencies, accepted
+
+
+def synchronous(directory, records):
+    """Referência: cada registro gravado no disco dentro da "rota"."""
+    path = os.path.join(directory, 'sync.jsonl')
+    latencies = []
+    for session_id, message, intent in records:
+        started = time.perf_counter()
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps({'ts': time.time(), 'session': session_id,
+                                   'message': message, 'intent': intent},
+                                  ensure_ascii=False) + '\n')
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def slowed(log, delay):
+    """Faz cada lote demorar delay segundos a mais (disco lento)."""
+    write = log._write
+
+    def slow_write(batch):
+        time.sleep(delay)
+        write(batch)
+
+    log._write = slow_write
+    return log
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--records', type=int, default=50000)
+    parser.add_argument('--batch', type=int, default=500, help='registros por lote')
+    parser.add_argument('--max-kb', type=int, default=64,
+                        help='tamanho máximo de cada arquivo, em KiB')
+    parser.add_argument('--slow-ms', type=float, default=20,
+                        help='atraso de cada lote no teste de disco lento, em ms')
+    parser.add_argument('--seed', type=int, default=24)
+    args = parser.parse_args()
+
+    records = make_records(args.records, args.seed)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        # Fila grande o suficiente para todos: mede só o custo de registrar
+        log = ChatLog(os.path.join(directory, 'fila'), policy='drop', queue_size=args.records,
+                      batch_size=args.batch, max_bytes=args.max_kb * 1024)
+        started = time.perf_counter()
+        latencies, accepted = record_all(log, records)
+        log.flush()
+        elapsed = time.perf_counter() - started
+        log.stop()
+        sync = synchronous(directory, records[:min(len(records), 5000)])
+        paths = log_files(log.directory)
+        size = sum(os.path.getsize(path) for path in paths)
+        print(f"{args.records} registros, lotes de {args.batch}, arquivos de até {args.max_kb} KiB")
+        print(f"    record: p50 {statistics.median(latencies) * 1e6:.1f} µs, "
+              f"p99 {percentile(latencies, 0.99) * 1e6:.1f} µs; gravando direto no disco: "
+              f"p50 {statistics.median(sync) * 1e6:.1f} µs, p99 {percentile(sync, 0.99) * 1e6:.1f} µs")
+        print(f"    {args.records / elapsed:.0f} registros/s até gravar tudo; {len(paths)} arquivos, "
+              f"{size / 1024:.0f} KiB ({size / args.records:.1f} bytes/registro)")
+
+        read = list(read_records(paths))
+        results.append(report('registros lidos de volta', len(read) == accepted == args.records,
+                              f"{len(read)} de {accepted} aceitos"))
+        results.append(report('troca de arquivo', len(paths) > 1 or size <= args.max_kb * 1024,
+                              f"{len(paths)} arquivos, maior com "
+                              f"{max(map(os.path.getsize, paths)) / 1024:.0f} KiB"))
+        summary = summarize(read, top=3)
+        print(f"    resumo: {summary['fallback_ratio']:.0%} sem resposta; "
+              + ', '.join(f"{intent} {count}" for intent, count in summary['intents'][:3]))
+
+        # Disco lento: a fila pequena enche
+        sample = records[:min(len(records), 20000)]
+        queue_size = args.batch * 2
+        delay = args.slow_ms / 1000
+        for policy in chat_log.POLICIES:
+            log = slowed(ChatLog(os.path.join(directory, policy), policy=policy,
+                                 queue_size=queue_size, batch_size=args.batch,
+                                 block_timeout=60), delay)
+            started = time.perf_counter()
+            latencies, accepted = record_all(log, sample)
+            recording = time.perf_counter() - started
+            log.stop()
+            written = len(list(read_records(log_files(log.directory))))
+            dropped = len(sample) - accepted
+            detail = (f"{dropped} descartados, {written} gravados; record p99 "
+                      f"{percentile(latencies, 0.99) * 1e6:.0f} µs, {recording:.2f} s registrando")
+            if policy == 'drop':
+                ok = written == accepted and percentile(latencies, 0.99) < delay
+            else:
+                ok = written == accepted == len(sample)
+            results.append(report(f"política {policy} (disco lento)", ok, detail))
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Micro-benchmark da busca tolerante a erros nos nomes das entidades.
+
+Monta vocabulários sintéticos com milhares de jogadores, times, mapas e
+torneios e mede, para cada tamanho:
+- o tempo de montar o IntentMatcher (o que acontece a cada atualização dos dados);
+- a latência de match por mensagem (p50 e p99), com nomes escritos com erros,
+  sozinhos ou dentro de perguntas, e mapas como "dust 2";
+- a latência de uma busca que compara a palavra com todos os nomes (sem o
+  índice de trigramas), para mostrar o que o índice evita.
+
+Os nomes sintéticos são parecidos entre si, então parte das mensagens acaba
+mais perto de outro nome do que do original (a coluna "acertos"). Termina com
+erro se o índice discordar da busca sem índice sobre a menor distância, se
+alguma mensagem que teve o nome reconhecido ficar sem intenção (a coluna "sem
+intenção": ex.: só o nome de um torneio) ou se o p99 do match passar de
+--max-p99-us (o cache de respostas fica desligado, para que toda mensagem
+passe pela busca).
+
+Uso:
+    python benchmarks/bench_entity_index.py --sizes 100,1000,10000 --messages 2000 --max-p99-us 1000
+"""
+import argparse
+import os
+import random
+import re
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from entity_index import edit_distance, max_typos  # noqa: E402
+from intents import FALLBACK_INTENT, IntentMatcher, normalize  # noqa: E402
+
+# Sílabas dos nomes sintéticos ("ka", "zer", "tos"...): nomes variados como os reais
+SYLLABLES = [consonant + vowel + end for consonant in 'bcdfghjklmnprstvwxz'
+             for vowel in 'aeiouy' for end in ('', '', 'r', 'n', 's')]
+
+TEMPLATES = [
+    "stats do {}",
+    "como foi o {} no último jogo",
+    "furia x {}",
+    "jogos contra a {}",
+    "ranking de adr na {}",
+    "{}",
+]
+
+# Perguntas sobre mapas, com o nome sem erros mas "dust 2" separado
+MAP_TEMPLATES = [
+    "aproveitamento na {}",
+    "{}",
+]
+
+
+def make_name(rng, parts):
+    return ''.join(rng.choice(SYLLABLES) for _ in range(parts))
+
+
+def make_vocabulary(size, seed):
+    """Nomes únicos divididos entre jogadores, adversários e torneios (mais os mapas)."""
+    rng = random.Random(seed)
+    names = set()
+    while len(names) < size:
+        names.add(make_name(rng, rng.randint(3, 4)))
+    names = sorted(names)
+    rng.shuffle(names)
+    third = size // 3
+    return {
+        'players': names[:third],
+        'opponents': [name.capitalize() + ' Gaming' for name in names[third:2 * third]],
+        'maps': ['Ancient', 'Anubis', 'Dust2', 'Inferno', 'Mirage', 'Nuke', 'Train'],
+        'tournaments': [name.upper() + ' Masters 2025' for name in names[2 * third:]]
+    }
+
+
+def misspell(rng, word):
+    """Um erro de digitação: troca, apaga ou repete uma letra, ou inverte duas vizinhas."""
+    i = rng.randrange(1, len(word) - 1)
+    edit = rng.choice(('replace', 'delete', 'insert', 'swap'))
+    if edit == 'replace':
+        return word[:i] + rng.choice('aeioukmrst') + word[i + 1:]
+    if edit == 'delete':
+        return word[:i] + word[i + 1:]
+    if edit == 'insert':
+        return word[:i] + word[i] + word[i:]
+    return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+
+
+def make_messages(vocabulary, count, seed):
+    """
+    Mensagens com um nome (com um erro de digitação) e o nome esperado.
+
+    Returns:
+        list: (mensagem, tipo, nome, palavra com erro ou None nas de mapas)
+    """
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(count):
+        if rng.random() < 0.1:
+            name = rng.choice(vocabulary['maps'])
+            word = re.sub(r'([a-z])(\d)', r'\1 \2', normalize(name))
+            messages.append((rng.choice(MAP_TEMPLATES).format(word), 'maps', name, None))
+            continue
+        kind = rng.choice(('players', 'opponents', 'tournaments'))
+        name = rng.choice(vocabulary[kind])
+        word = normalize(name).split()[0]
+        typo = misspell(rng, word)
+        while typo == word:
+            typo = misspell(rng, word)
+        messages.append((rng.choice(TEMPLATES).format(typo), kind, name, typo))
+    return messages
+
+
+def brute_force(terms, word):
+    """Compara a palavra com todos os termos, sem o índice."""
+    limit = max_typos(len(word))
+    best = None
+    for term in terms:
+        allowed = min(limit, max_typos(len(term)))
+        distance = edit_distance(word, term, allowed)
+        if distance <= allowed and (best is None or distance < best[0]):
+            best = (distance, term)
+    return best
+
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run(size, count, seed):
+    vocabulary = make_vocabulary(size, seed)
+    start = time.perf_counter()
+    matcher = IntentMatcher(entities=vocabulary, cache_size=0)
+    build = time.perf_counter() - start
+
+    messages = make_messages(vocabulary, count, seed + 1)
+    latencies = []
+    hits = 0
+    unanswered = 0
+    for message, kind, name, _ in messages:
+        start = time.perf_counter()
+        result = matcher.match(message)
+        latencies.append(time.perf_counter() - start)
+        found = name in result.entities.get(kind, [])
+        hits += found
+        unanswered += found and result.intent == FALLBACK_INTENT
+
+    words = matcher.index.words
+    brute = []
+    mismatches = 0
+    typos = [typo for _, _, _, typo in messages if typo is not None]
+    for typo in typos[:max(1, count // 20)]:
+        start = time.perf_counter()
+        expected = brute_force(words.terms, typo)
+        brute.append(time.perf_counter() - start)
+        found = words.lookup(typo)
+        mismatches += (found and found[0]) != (expected and expected[0])
+    return {
+        'terms': len(words),
+        'build': build,
+        'p50': statistics.median(latencies),
+        'p99': percentile(latencies, 0.99),
+        'brute': statistics.median(brute),
+        'hits': hits / count,
+        'unanswered': unanswered,
+        'mismatches': mismatches
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='100,1000,10000',
+                        help='quantidades de entidades, separadas por vírgula')
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=21)
+    parser.add_argument('--max-p99-us', type=float, default=1000,
+                        help='p99 máximo do match, em µs')
+    args = parser.parse_args()
+
+    print(f"{'entidades':>10}{'termos':>9}{'montagem':>11}{'match p50':>12}{'match p99':>12}"
+          f"{'sem índice':>13}{'acertos':>9}{'sem intenção':>14}{'divergências':>14}")
+    failed = False
+    for size in (int(value) for value in args.sizes.split(',')):
+        result = run(size, args.messages, args.seed)
+        print(f"{size:>10}{result['terms']:>9}{result['build'] * 1000:>8.0f} ms"
+              f"{result['p50'] * 1e6:>9.0f} µs{result['p99'] * 1e6:>9.0f} µs"
+              f"{result['brute'] * 1e6:>10.0f} µs{result['hits']:>9.0%}"
+              f"{result['unanswered']:>14}{result['mismatches']:>14}")
+        failed = (failed or result['mismatches'] > 0 or result['unanswered'] > 0
+                  or result['p99'] * 1e6 > args.max_p99_us)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+"""
+Micro-benchmark da identificação de intenções do chat.
+
+Compara quantas mensagens por segundo são classificadas pela antiga cadeia de
+if/elif com `"x" in message` (reproduzida abaixo apenas para a comparação) e
+pelo IntentMatcher:
+- sem o cache de mensagens e sem o atalho (sempre com a busca aproximada);
+- sem o cache, com o atalho que pula a busca aproximada quando a regex decide;
+- com o cache, com as mensagens do corpus se repetindo como no chat;
+- com o cache, com mensagens que nunca se repetem (todas são identificadas).
+
+Termina com erro se o atalho mudar a intenção (ou a data, o número e o
+assunto) de alguma mensagem, ou se o IntentMatcher com o cache for mais lento
+que a cadeia de if/elif.
+
+Uso:
+    python benchmarks/bench_intents.py --messages 200000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intents import IntentMatcher  # noqa: E402
+from sessions import SessionState  # noqa: E402
+
+# Mensagens típicas de torcedores (com e sem acento, curtas e longas)
+CORPUS = [
+    "Oi, tudo bem?",
+    "Qual a última notícia da FURIA?",
+    "tem alguma novidade?",
+    "qual foi o último jogo?",
+    "ultimo jogo",
+    "sim",
+    "não",
+    "me mostra os resultados",
+    "histórico de partidas",
+    "quando é o próximo jogo??",
+    "proxima partida da furia",
+    "qual campeonato vocês vão jogar",
+    "quero ver o line-up",
+    "quem são os jogadores do time",
+    "estatisticas",
+    "08/04/2025",
+    "stats do KSCERATO no jogo de 07/04",
+    "valeu, muito obrigado!",
+    "flw",
+    "o FalleN ainda joga? quero saber tudo sobre a equipe e se tem notícia nova",
+    "asdkjh qwe",
+    "media do kscerto nos ultimos 3 jogos",
+    "ultimo jogo contra a mongolz",
+    "noticias sobre o falen",
+    "top adr da pgl bucharest",
+    "qual o winrate na mirage",
+    "campeonto",
+]
+
+ENTITIES = {
+    'players': ['KSCERATO', 'yuurih', 'chelo', 'FalleN', 'skullz'],
+    'opponents': ['The MongolZ', 'Virtus.pro', 'Complexity'],
+    'maps': ['Mirage', 'Inferno', 'Nuke'],
+    'tournaments': ['PGL Bucharest 2025'],
+    'metrics': ['ADR', 'Rating', 'KAST'],
+}
+
+
+class FullMatcher(IntentMatcher):
+    """IntentMatcher sem o atalho: a busca aproximada roda em toda mensagem."""
+
+    def _decided(self, best, candidates, entities):
+        return False
+
+
+def summary(found):
+    """Intenção e entidades que não dependem da busca aproximada."""
+    return (found.intent, found.entities.get('date'), found.entities.get('number'),
+            found.entities.get('topic'))
+
+
+def legacy_classify(message, context):
+    """Classificação da versão antiga de process_chat_message (só as condições)."""
+    message = message.lower()
+    if context["esperando_data_estatisticas"]:
+        return 'stats_by_date'
+    elif "específicas" in message or "stats" in message or "estatisticas" in message:
+        return 'ask_stats_date'
+    elif "tchau" in message or "até logo" in message or "adeus" in message or "muito obrigado" in message or "obrigado" in message or "flw" in message:
+        return 'goodbye'
+    elif "notícia" in message or "novidade" in message or "noticia" in message or "noticias" in message or "novidades" in message:
+        return 'news'
+    elif "resultado do" in message or "último jogo" in message or "ultimo jogo" in message or "ultimo resultado da" in message or "ultima partida" in message or "última" in message or "última partida" in message or "ultima" in message:
+        return 'last_game'
+    if context["esperando_estatisticas"] and ("sim" in message or "estatísticas" in message):
+        return 'confirm_stats'
+    if context["esperando_estatisticas"] and ("não" in message or "nao" in message):
+        return 'decline_stats'
+    elif "últimos jogos" in message or "histórico" in message or "ultimos" in message or "historico" in message or "resultados" in message:
+        return 'history'
+    elif "próximo jogo" in message or "próxima partida" in message or "proximo jogo" in message or "proxima partida" in message or "próximos jogos" in message or "proximos jogos" in message:
+        return 'next_game'
+    elif "campeonato" in message or "torneio" in message:
+        return 'tournament'
+    elif "line-up" in message or "lineup" in message or "jogadores" in message or "equipe" in message or "time" in message:
+        return 'lineup'
+    return 'fallback'
+
+
+def run(func, messages):
+    start = time.perf_counter()
+    for message in messages:
+        func(message)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--messages', type=int, default=200000)
+    args = parser.parse_args()
+
+    messages = (CORPUS * (args.messages // len(CORPUS) + 1))[:args.messages]
+    # Mensagens diferentes entre si (o cache nunca acerta)
+    unique = [f"{message} {'!' * (i // len(CORPUS) % 7)}{i}" for i, message in enumerate(messages)]
+    context = {"esperando_estatisticas": False, "esperando_data_estatisticas": False}
+    state = SessionState()
+
+    start = time.perf_counter()
+    matcher = IntentMatcher(entities=ENTITIES)
+    build_ms = (time.perf_counter() - start) * 1000
+    full = FullMatcher(entities=ENTITIES, cache_size=0)
+    uncached = IntentMatcher(entities=ENTITIES, cache_size=0)
+
+    mismatches = [message for message in CORPUS
+                  if summary(full.match(message, state)) != summary(uncached.match(message, state))]
+
+    legacy = run(lambda message: legacy_classify(message, context), messages)
+    without = run(lambda message: full.match(message, state), messages)
+    shortcut = run(lambda message: uncached.match(message, state), messages)
+    cached = run(lambda message: matcher.match(message, state), messages)
+    misses = run(lambda message: matcher.match(message, state), unique)
+
+    print(f"construção do IntentMatcher: {build_ms:.2f} ms")
+    print(f"cadeia if/elif (sem entidades):      {legacy:>12,.0f} msg/s")
+    print(f"IntentMatcher sem atalho nem cache:  {without:>12,.0f} msg/s")
+    print(f"IntentMatcher com atalho, sem cache: {shortcut:>12,.0f} msg/s")
+    print(f"IntentMatcher com cache (repetidas): {cached:>12,.0f} msg/s")
+    print(f"IntentMatcher com cache (únicas):    {misses:>12,.0f} msg/s")
+    for message in mismatches:
+        print(f"FALHOU o atalho muda o resultado de {message!r}")
+    if cached < legacy:
+        print("FALHOU IntentMatcher com cache mais lento que a cadeia de if/elif")
+    sys.exit(1 if mismatches or cached < legacy else 0)
+
+if __name__ == '__main__':
+    main()
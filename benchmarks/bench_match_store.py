@@ -0,0 +1,88 @@
+"""
+Benchmark das consultas do repositório de partidas (match_store).
+
+Gera um arquivo SQLite temporário com N partidas sintéticas e mede o tempo
+médio das consultas usadas pelo chat (data, adversário, torneio, mapa e
+jogador).
+
+Uso:
+    python benchmarks/bench_match_store.py --matches 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from match_store import MatchStore  # noqa: E402
+
+OPPONENTS = ['Virtus.pro', 'Complexity', 'Apogee', 'M80', 'The MongolZ', 'Natus Vincere',
+             'paiN', 'MIBR', 'Vitality', 'G2', 'FaZe', 'Spirit', 'MOUZ', 'Liquid']
+TOURNAMENTS = ['PGL Bucharest', 'BLAST Open Lisbon', 'PGL Astana', 'IEM Dallas',
+               'ESL Pro League', 'BLAST Premier', 'IEM Cologne']
+MAPS = ['Anubis', 'Dust2', 'Mirage', 'Inferno', 'Train', 'Nuke', 'Ancient']
+PLAYERS = ['KSCERATO', 'yuurih', 'FalleN', 'molodoy', 'YEKINDAR', 'chelo', 'skullz']
+
+
+def synthetic_matches(count, seed=42):
+    """Gera partidas no formato de fetch_furia_results, uma por dia."""
+    rng = random.Random(seed)
+    first_day = date(2025, 4, 8)
+    matches = []
+    for i in range(count):
+        day = first_day - timedelta(days=i)
+        maps = rng.sample(MAPS, 3)
+        players = rng.sample(PLAYERS, 5)
+        matches.append({
+            "data": day.strftime('%d/%m/%Y'),
+            "adversario": rng.choice(OPPONENTS),
+            "resultado": rng.choice(['2-0', '2-1', '1-2', '0-2']),
+            "torneio": f"{rng.choice(TOURNAMENTS)} {day.year}",
+            "placares": {mapa: f"{rng.randint(0, 13)}-13" for mapa in maps},
+            "estatisticas": {"FURIA": {
+                player: {"K/D": "20/20", "K/D DIFF": "0", "ADR": "75.0",
+                         "KAST": "70%", "Rating": "1.00"}
+                for player in players
+            }}
+        })
+    return matches
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--matches', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = MatchStore(os.path.join(directory, 'bench.sqlite3'))
+        start = time.perf_counter()
+        store.upsert_matches(synthetic_matches(args.matches))
+        print(f"{args.matches} partidas gravadas em {time.perf_counter() - start:.2f} s")
+
+        queries = {
+            'data completa (08/04/2025)': lambda: store.find_by_date('08/04/2025'),
+            'data sem ano (8/4)': lambda: store.find_by_date('8/4'),
+            'datas disponíveis (10)': lambda: store.available_dates(limit=10),
+            'adversário (20)': lambda: store.by_opponent('Virtus.pro'),
+            'torneio (20)': lambda: store.by_tournament('PGL Bucharest 2025'),
+            'mapa (20)': lambda: store.by_map('Inferno'),
+            'jogador (20)': lambda: store.by_player('KSCERATO'),
+        }
+        for name, query in queries.items():
+            print(f"{name:<28} {timed(query, args.repeat):.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark do NewsBroker com muitas conexões ociosas.
+
+Cria N inscritos no event loop (como no modo ASGI), mede a memória ocupada por
+inscrito com tracemalloc e o tempo para uma publicação, feita de outra thread
+como no atualizador do Draft5, chegar a todos eles. Cada inscrito guarda só a
+versão que recebeu, então a memória por inscrito não cresce com as publicações.
+
+Antes, confere que um cliente que aplica os eventos como a página (snapshot e
+diff) termina com as notícias do servidor quando um título muda sem mudar o
+link e quando ele recebeu a página de um worker e se inscreve em outro (que
+pulou uma versão do snapshot). Termina com erro se não terminar.
+
+Uso:
+    python benchmarks/bench_news_broker.py --subscribers 20000 --updates 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_broker import NewsBroker  # noqa: E402
+
+
+def make_news(start, count=10):
+    return [{'title': f'Notícia {i}', 'date': '09/04/2025',
+             'link': f'https://draft5.gg/noticias/{i}'} for i in range(start, start + count)]
+
+
+def report(name, ok, detail):
+    print(f"{'ok ' if ok else 'FALHOU'} {name:<28} {detail}")
+    return ok
+
+
+def apply_events(news, events):
+    """Aplica os eventos SSE como o subscribeNews da página."""
+    for event in events:
+        lines = event.decode('utf-8').splitlines()
+        kind = lines[1][len('event: '):]
+        data = json.loads(lines[2][len('data: '):])
+        if kind == 'snapshot':
+            news = data['news']
+        else:
+            replaced = set(data['removed']) | {item['link'] for item in data['added']}
+            news = data['added'] + [item for item in news if item['link'] not in replaced]
+    return news
+
+
+def same(left, right):
+    key = lambda item: item['link']  # noqa: E731
+    return sorted(left, key=key) == sorted(right, key=key)
+
+
+def consistency():
+    ok = True
+    # Título corrigido sem mudar o link
+    broker = NewsBroker(make_news(0), version=1)
+    page, version = broker.news, broker.version
+    edited = [dict(item, title=item['title'] + ' (atualizada)') if i == 3 else item
+              for i, item in enumerate(make_news(0))]
+    broker.publish(edited, 2)
+    events, _ = broker.events_since(version)
+    ok &= report('notícia alterada', same(apply_events(page, events), edited),
+                 f"{len(events)} evento(s) com o título novo")
+
+    # Página do worker A (que viu a versão 3) e inscrição no worker B (que
+    # pulou da 2 para a 4)
+    worker_a = NewsBroker(make_news(0), version=2)
+    worker_b = NewsBroker(make_news(0), version=2)
+    worker_a.publish(make_news(1), 3)
+    page, version = worker_a.news, worker_a.version
+    worker_b.publish(make_news(2), 4)
+    events, _ = worker_b.events_since(version)
+    ok &= report('inscrição em outro worker', same(apply_events(page, events), worker_b.news),
+                 f"versão {version} desconhecida no worker B: {len(events)} snapshot")
+
+    # Versão nova dos dados sem mudar as notícias: nada a enviar
+    worker_b.publish(make_news(2), 5)
+    events, current = worker_b.events_since(4)
+    ok &= report('versão sem mudança', not events and current == 5,
+                 f"{len(events)} evento(s) para quem está na versão 4")
+    return ok
+
+
+async def main_async(args):
+    broker = NewsBroker(make_news(0), keepalive=3600)
+    received = [0] * args.subscribers
+    done = asyncio.Event()
+    target = args.subscribers
+
+    async def subscriber(index):
+        async for _ in broker.stream_async():
+            received[index] += 1
+            if received[index] == target_count[0]:
+                counter[0] += 1
+                if counter[0] == target:
+                    done.set()
+
+    counter = [0]
+    target_count = [1]  # primeiro o snapshot
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(subscriber(i)) for i in range(args.subscribers)]
+    await done.wait()
+    connect_s = time.perf_counter() - start
+    per_subscriber = (tracemalloc.get_traced_memory()[0] - before) / args.subscribers
+    # O tracemalloc deixa tudo mais lento: a entrega é medida sem ele
+    tracemalloc.stop()
+    print(f"{args.subscribers} inscritos conectados em {connect_s:.2f} s, "
+          f"{per_subscriber:.0f} bytes por inscrito")
+
+    for update in range(1, args.updates + 1):
+        done.clear()
+        counter[0] = 0
+        target_count[0] = update + 1
+        start = time.perf_counter()
+        # Publica de outra thread, como o atualizador do Draft5
+        threading.Thread(target=broker.publish, args=(make_news(update),)).start()
+        await done.wait()
+        print(f"atualização {update}: entregue a todos em "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await asyncio.sleep(0)
+    assert broker.subscribers == 0, broker.subscribers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--subscribers', type=int, default=20000)
+    parser.add_argument('--updates', type=int, default=5)
+    args = parser.parse_args()
+    ok = consistency()
+    asyncio.run(main_async(args))
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""
+Micro-benchmark da busca nas notícias (índice invertido com BM25).
+
+Monta índices com dezenas de milhares de notícias sintéticas (título e texto
+da matéria, com palavras de frequências bem diferentes, como num texto real, e
+nomes de jogadores, times e torneios) e mede, para cada tamanho:
+- a memória usada pelo índice e o tempo de indexar cada notícia nova com o
+  índice já cheio (o índice é atualizado aos poucos, notícia por notícia);
+- a latência das buscas (p50 e p99) com um ou dois termos, misturando nomes
+  raros e palavras comuns, sem o cache de resultados e com ele (as buscas só
+  com palavras comuns, as mais lentas, se repetem);
+- o tempo de remover as notícias antigas pela idade.
+
+Termina com erro se alguma busca discordar da pontuação de todas as notícias
+que têm algum termo da busca (sem os atalhos dos termos comuns).
+
+Uso:
+    python benchmarks/bench_news_search.py --sizes 10000,100000 --queries 2000
+"""
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from news_index import NewsIndex, tokenize  # noqa: E402
+
+# Sílabas das palavras sintéticas: palavras variadas como as reais
+SYLLABLES = [consonant + vowel + end for consonant in 'bcdfglmnprstv'
+             for vowel in 'aeiou' for end in ('', '', 'r', 's')]
+
+# Palavras que aparecem em boa parte das notícias
+COMMON = ['furia', 'partida', 'time', 'vitoria', 'mapa', 'campeonato', 'jogador', 'equipe']
+
+DAY = 86400
+
+# Notícias indexadas depois que o índice está cheio, para medir a atualização
+NEW_ARTICLES = 1000
+
+
+def make_words(rng, count):
+    words = set()
+    while len(words) < count:
+        words.add(''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_articles(count, seed):
+    """Notícias sintéticas, uma por dia a cada 20, com a palavra do texto sorteada pela lei de Zipf."""
+    rng = random.Random(seed)
+    words = make_words(rng, 20000)
+    names = make_words(rng, 2000)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+    articles = []
+    for i in range(count):
+        subject = rng.sample(names, 2)
+        title = ' '.join([rng.choice(COMMON), subject[0]] + rng.choices(words, weights, k=5))
+        body = ' '.join(rng.choices(words, weights, k=60) + subject + rng.sample(COMMON, 3))
+        day = time.gmtime(1_700_000_000 + (i // 20) * DAY)
+        articles.append({
+            'title': title,
+            'body': body,
+            'date': time.strftime('%d/%m/%Y', day),
+            'link': f'https://draft5.gg/noticia/{i}'
+        })
+    return articles, names
+
+
+def make_queries(names, count, seed):
+    """Buscas de um ou dois termos: um nome, um nome e uma palavra comum, ou duas comuns."""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        kind = rng.random()
+        if kind < 0.5:
+            queries.append(rng.choice(names))
+        elif kind < 0.9:
+            queries.append(f'{rng.choice(COMMON)} {rng.choice(names)}')
+        else:
+            queries.append(' '.join(rng.sample(COMMON, 2)))
+    return queries
+
+
+def exhaustive(index, query, limit):
+    """Pontua todas as notícias que têm algum termo da busca (referência)."""
+    scores = {}
+    count = len(index._items)
+    for term in dict.fromkeys(tokenize(query)):
+        postings = index._postings.get(term)
+        if postings:
+            weight = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            index._score(scores, weight, postings.items())
+    return sorted((round(score, 9) for score in scores.values()), reverse=True)[:limit]
+
+
+def percentile(values, fraction):
+    return sorted(values)[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def search_latencies(index, queries):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query, 10)
+        latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def run(size, count, seed):
+    articles, names = make_articles(size + NEW_ARTICLES, seed)
+    queries = make_queries(names, count, seed + 1)
+
+    # Sem limite de idade na montagem, para medir a busca com todas as notícias
+    index = NewsIndex(max_age=10 ** 6, max_docs=size + NEW_ARTICLES, cache_size=0)
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for article in articles[:size]:
+        index.add(article)
+    memory = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    started = time.perf_counter()
+    for article in articles[size:]:
+        index.add(article)
+    build = (time.perf_counter() - started) / NEW_ARTICLES
+
+    latencies = search_latencies(index, queries)
+    index.cache_size = 256
+    cached = search_latencies(index, queries)
+
+    mismatches = 0
+    for query in queries[:max(1, count // 10)]:
+        found = [round(score, 9) for score, _ in index.search(query, 10)]
+        mismatches += found != exhaustive(index, query, 10)
+
+    # Idade máxima de metade do período: metade das notícias sai de uma vez
+    days = (size // 20) // 2
+    index.max_age = days * DAY
+    started = time.perf_counter()
+    index.update([])
+    evict = time.perf_counter() - started
+    return {
+        'build': build,
+        'memory': memory,
+        'p50': statistics.median(latencies),
+        'p99': percentile(latencies, 0.99),
+        'cached_p50': statistics.median(cached),
+        'cached_p99': percentile(cached, 0.99),
+        'evict': evict,
+        'evicted': index.evictions,
+        'mismatches': mismatches
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--sizes', default='10000,100000',
+                        help='quantidades de notícias, separadas por vírgula')
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=23)
+    args = parser.parse_args()
+
+    print(f"{'notícias':>10}{'indexar':>12}{'memória':>11}{'busca p50':>12}{'busca p99':>12}"
+          f"{'c/ cache p50':>15}{'c/ cache p99':>15}{'remoção':>18}{'divergências':>14}")
+    failed = False
+    for size in (int(value) for value in args.sizes.split(',')):
+        result = run(size, args.queries, args.seed)
+        print(f"{size:>10}{result['build'] * 1e6:>7.0f} µs/n{result['memory'] / 2 ** 20:>7.0f} MiB"
+              f"{result['p50'] * 1e6:>9.0f} µs{result['p99'] * 1e6:>9.0f} µs"
+              f"{result['cached_p50'] * 1e6:>12.0f} µs{result['cached_p99'] * 1e6:>12.0f} µs"
+              f"{result['evict'] * 1000:>6.0f} ms ({result['evicted']:>6})"
+              f"{result['mismatches']:>14}")
+        failed = failed or result['mismatches'] > 0
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Benchmark da extração das páginas do Draft5.
+
+Compara, para cada página das fixtures, três formas de extrair os dados:
+- árvore: BeautifulSoup com a árvore completa (abordagem antiga)
+- strainer: BeautifulSoup limitado aos blocos de interesse com SoupStrainer
+- fluxo: extratores em fluxo de draft5_parser
+
+As páginas são ampliadas repetindo os blocos de interesse (--scale) e
+intercaladas com marcação irrelevante, para simular páginas grandes. Para cada
+abordagem são medidos o tempo médio e o pico de memória (tracemalloc).
+
+Uso:
+    python benchmarks/bench_parser.py --scale 200 --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import draft5_parser  # noqa: E402
+from fake_draft5 import FIXTURES_DIR  # noqa: E402
+
+BASE_URL = 'https://draft5.gg'
+
+# Página -> (arquivo, classes dos blocos, função de extração em fluxo)
+PAGES = {
+    'news': ('noticias.html', ['news-item'], draft5_parser.parse_news),
+    'matches': ('proximas-partidas.html', ['match-item'], draft5_parser.parse_matches),
+    'results': ('resultados.html', ['match-result'], draft5_parser.parse_results),
+    'tournaments': ('campeonatos.html', ['tournament-item'], draft5_parser.parse_tournaments),
+    'line-up': ('equipe.html', ['player-card', 'coach-card'], draft5_parser.parse_lineup)
+}
+
+# Marcação irrelevante intercalada entre os blocos (menus, anúncios, scripts)
+NOISE = (
+    '<div class="ad-slot"><ul class="menu">'
+    + ''.join('<li><a href="/x/%d">Link %d</a></li>' % (i, i) for i in range(20))
+    + '</ul><script>window.dataLayer = window.dataLayer || [];</script></div>\n'
+)
+
+
+def scale_page(html, containers, scale):
+    """Repete os blocos de interesse da página, intercalando com ruído."""
+    blocks = [str(tag) for tag in
+              BeautifulSoup(html, 'html.parser').find_all(class_=containers)]
+    if not blocks:
+        return html
+    # Insere as cópias logo antes do fechamento do <main>
+    position = html.index('</main>')
+    body = ''.join(NOISE + block for _ in range(scale) for block in blocks)
+    return html[:position] + body + html[position:]
+
+
+def _text(node, class_name):
+    child = node.find(class_=class_name)
+    return child.get_text(strip=True) if child else ''
+
+
+def full_tree(html, containers):
+    """Abordagem antiga: árvore completa e busca pelos blocos."""
+    soup = BeautifulSoup(html, 'html.parser')
+    return [_text(item, 'date') or item.get_text(strip=True)
+            for item in soup.find_all(class_=containers)]
+
+
+def strainer(html, containers):
+    """Árvore restrita aos blocos de interesse."""
+    soup = BeautifulSoup(html, 'html.parser',
+                         parse_only=SoupStrainer(class_=containers))
+    return [_text(item, 'date') or item.get_text(strip=True)
+            for item in soup.find_all(class_=containers, recursive=False)]
+
+
+def measure(func, repeat):
+    """Retorna (tempo médio em ms, pico de memória em KiB, resultado)."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat * 1000
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--scale', type=int, default=200,
+                        help='quantas vezes repetir os blocos de cada página')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'página':<12} {'KiB':>7} {'registros':>9} | "
+          f"{'árvore ms':>10} {'KiB':>8} | {'strainer ms':>11} {'KiB':>8} | "
+          f"{'fluxo ms':>9} {'KiB':>8}")
+    for name, (filename, containers, stream) in PAGES.items():
+        with open(os.path.join(FIXTURES_DIR, filename), encoding='utf-8') as f:
+            html = scale_page(f.read(), containers, args.scale)
+
+        tree_ms, tree_kib, tree_result = measure(
+            lambda: full_tree(html, containers), args.repeat)
+        strainer_ms, strainer_kib, _ = measure(
+            lambda: strainer(html, containers), args.repeat)
+        stream_ms, stream_kib, records = measure(
+            lambda: stream(html, BASE_URL), args.repeat)
+
+        assert len(records) == len(tree_result), name
+        print(f"{name:<12} {len(html) / 1024:>7.0f} {len(records):>9} | "
+              f"{tree_ms:>10.1f} {tree_kib:>8.0f} | {strainer_ms:>11.1f} {strainer_kib:>8.0f} | "
+              f"{stream_ms:>9.1f} {stream_kib:>8.0f}")
+
+
+if __name__ == '__main__':
+    main()
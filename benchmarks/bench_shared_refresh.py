@@ -0,0 +1,184 @@
+"""
+Confere a atualização compartilhada do Draft5 com vários workers.
+
+Sobe o Draft5 local e N workers da aplicação (processos separados, cada um na
+sua porta, todos com o mesmo snapshot) no modo compartilhado de create_app, e
+confere pelo /metrics de cada worker e pelas requisições que chegam ao Draft5:
+- há exatamente um líder;
+- o Draft5 recebe uma busca por página a cada intervalo, não uma por worker;
+- quando uma página muda, todos os workers passam a servir a mesma versão nova;
+- se o líder morre, outro worker assume e o ritmo das buscas continua o mesmo.
+
+Termina com erro se algum desses comportamentos não for o esperado.
+
+Uso:
+    python benchmarks/bench_shared_refresh.py --workers 4 --interval 1 --rounds 5
+"""
+import argparse
+import hashlib
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_draft5 import start_server  # noqa: E402
+from load_chat import free_port  # noqa: E402
+
+WORKER_COMMANDS = {
+    'asgi': ['-m', 'uvicorn', '--factory', 'asgi_app:create_app', '--host', '127.0.0.1',
+             '--port', '{port}', '--log-level', 'warning'],
+    'flask': ['-c', "import flask_app; flask_app.create_app(preload_data=False); "
+                    "flask_app.start_background_refresh(); "
+                    "flask_app.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+}
+
+NEWS_PATH = '/equipe/330-FURIA/noticias'
+
+
+def report(name, ok, detail):
+    print(f"{'ok ' if ok else 'FALHOU'} {name:<30} {detail}")
+    return ok
+
+
+def read_metrics(port):
+    """Lê furia_data_version e furia_draft5_refresh_leader do worker, ou None."""
+    try:
+        text = httpx.get(f'http://127.0.0.1:{port}/metrics', timeout=2).text
+    except httpx.HTTPError:
+        return None
+    values = {}
+    for line in text.splitlines():
+        name, _, value = line.partition(' ')
+        if name in ('furia_data_version', 'furia_draft5_refresh_leader'):
+            values[name] = float(value)
+    return values
+
+
+def states(workers):
+    """{porta: (versão, líder)} dos workers que responderam."""
+    result = {}
+    for port in workers:
+        values = read_metrics(port)
+        if values:
+            result[port] = (int(values['furia_data_version']),
+                            bool(values['furia_draft5_refresh_leader']))
+    return result
+
+
+def wait_for(condition, timeout, step=0.05):
+    """Espera condition() ser verdadeira; devolve (resultado, segundos)."""
+    started = time.monotonic()
+    while True:
+        result = condition()
+        elapsed = time.monotonic() - started
+        if result or elapsed > timeout:
+            return result, elapsed
+        time.sleep(step)
+
+
+def news_hits(server):
+    with server.lock:
+        return server.hits.get(NEWS_PATH, 0)
+
+
+def fetch_rate(server, interval, rounds):
+    """Buscas da página de notícias durante rounds intervalos."""
+    before = news_hits(server)
+    time.sleep(interval * rounds)
+    return news_hits(server) - before
+
+
+def change_news(server):
+    """Muda a página de notícias do Draft5 local (novo corpo e novo ETag)."""
+    body, _ = server.pages[NEWS_PATH]
+    body += b'\n<!-- atualizada -->'
+    server.pages[NEWS_PATH] = (body, '"%s"' % hashlib.sha1(body).hexdigest())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--server', choices=sorted(WORKER_COMMANDS), default='flask')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--interval', type=int, default=1,
+                        help='intervalo de atualização (DRAFT5_REFRESH_INTERVAL), em segundos')
+    parser.add_argument('--rounds', type=int, default=5,
+                        help='intervalos observados em cada medida do ritmo de buscas')
+    args = parser.parse_args()
+
+    draft5 = start_server()
+    directory = tempfile.TemporaryDirectory()
+    env = dict(os.environ, DRAFT5_BASE_URL=draft5.base_url,
+               DRAFT5_REFRESH_INTERVAL=str(args.interval),
+               DRAFT5_SNAPSHOT_PATH=os.path.join(directory.name, 'snapshot.bin'),
+               MATCH_DB_PATH=os.path.join(directory.name, 'matches.sqlite3'))
+    processes = {}
+    for _ in range(args.workers):
+        port = free_port()
+        command = [sys.executable] + [part.replace('{port}', str(port))
+                                      for part in WORKER_COMMANDS[args.server]]
+        processes[port] = subprocess.Popen(command, cwd=ROOT_DIR, env=env,
+                                           stdout=subprocess.DEVNULL,
+                                           stderr=subprocess.DEVNULL)
+    # Tolerância de um intervalo mais uma checagem dos seguidores (e a subida dos workers)
+    timeout = args.interval * 3 + 30
+    results = []
+    try:
+        ready, elapsed = wait_for(
+            lambda: (lambda s: len(s) == args.workers and all(v >= 1 for v, _ in s.values()))(
+                states(processes)), timeout)
+        print(f"{args.workers} workers ({args.server}), intervalo de {args.interval} s")
+        if not ready:
+            report('workers com dados', False, 'os workers não carregaram os dados a tempo')
+            sys.exit(1)
+
+        current = states(processes)
+        leaders = [port for port, (_, leader) in current.items() if leader]
+        results.append(report('um único líder', len(leaders) == 1,
+                              f"líderes: {len(leaders)} de {len(current)} workers"))
+
+        fetches = fetch_rate(draft5, args.interval, args.rounds)
+        results.append(report('uma busca por intervalo', abs(fetches - args.rounds) <= 1,
+                              f"{fetches} buscas em {args.rounds} intervalos "
+                              f"(sem o líder seriam ~{args.rounds * args.workers})"))
+
+        version = max(v for v, _ in current.values())
+        change_news(draft5)
+        converged, elapsed = wait_for(
+            lambda: (lambda s: len(s) == len(processes)
+                     and {v for v, _ in s.values()} == {version + 1})(states(processes)),
+            timeout)
+        results.append(report('mesma versão em todos', bool(converged),
+                              f"versão {version} -> {version + 1} em todos os workers "
+                              f"em {elapsed * 1000:.0f} ms"))
+
+        leader = leaders[0] if leaders else next(iter(processes))
+        processes.pop(leader).send_signal(signal.SIGKILL)
+        new_leaders, elapsed = wait_for(
+            lambda: [port for port, (_, is_leader) in states(processes).items() if is_leader],
+            timeout)
+        results.append(report('outro worker assume', len(new_leaders or []) == 1,
+                              f"líder morto; novo líder em {elapsed * 1000:.0f} ms"))
+
+        fetches = fetch_rate(draft5, args.interval, args.rounds)
+        results.append(report('ritmo depois da troca', abs(fetches - args.rounds) <= 1,
+                              f"{fetches} buscas em {args.rounds} intervalos"))
+    finally:
+        for process in processes.values():
+            process.terminate()
+        for process in processes.values():
+            process.wait()
+        draft5.shutdown()
+        directory.cleanup()
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
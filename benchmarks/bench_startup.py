@@ -0,0 +1,288 @@
+"""
+Custo de subir a aplicação: importação, primeira resposta e memória por worker.
+
+Mede três coisas:
+- tempo de importar flask_app e de montar os dados (flask_app.preload), cada
+  um num processo novo, e quais módulos do scraper ficaram para depois;
+- tempo entre iniciar o servidor e a primeira resposta do /api/chat;
+- memória de cada worker (RSS, PSS e privada) depois de algumas requisições.
+
+O gunicorn não é dependência do projeto, então os workers são criados por um
+servidor pre-fork mínimo (werkzeug sobre um socket compartilhado), em quatro
+modos:
+- spawn: cada worker é um processo novo que importa tudo (como uvicorn --workers);
+- spawn-preload: idem, chamando create_app() em cada worker;
+- fork: o processo principal importa a aplicação e cria os workers por fork;
+- fork-preload: idem, com create_app() (dados montados e gc.freeze) antes do
+  fork, como gunicorn --preload 'flask_app:create_app()'.
+
+O PSS divide as páginas compartilhadas entre os processos que as usam: é ele
+que mostra o ganho do fork-preload, já que o RSS de cada worker conta as
+páginas compartilhadas inteiras.
+
+Uso:
+    python benchmarks/bench_startup.py --workers 4 --requests 400
+"""
+import argparse
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from bench_intents import CORPUS  # noqa: E402
+from fake_draft5 import start_server  # noqa: E402
+
+MODES = ('spawn', 'spawn-preload', 'fork', 'fork-preload')
+
+# Módulos usados só pelo atualizador do Draft5, que não devem vir com o import
+DEFERRED_MODULES = ('requests', 'urllib3', 'asyncio', 'draft5_parser')
+
+IMPORT_SCRIPT = """
+import sys, time
+started = time.perf_counter()
+import flask_app
+imported = time.perf_counter() - started
+deferred = [name for name in {deferred!r} if name not in sys.modules]
+preloaded = flask_app.preload()
+print(imported, preloaded, ','.join(deferred) or '-')
+"""
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def measure_imports(env, runs):
+    """Importa e monta os dados em processos novos; devolve (import, preload, adiados)."""
+    script = IMPORT_SCRIPT.format(deferred=DEFERRED_MODULES)
+    imports, preloads = [], []
+    deferred = ''
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, '-c', script], cwd=ROOT_DIR, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        imported, preloaded, deferred = output.strip().splitlines()[-1].split(' ')
+        imports.append(float(imported))
+        preloads.append(float(preloaded))
+    return statistics.median(imports), statistics.median(preloads), deferred
+
+
+def serve(fd):
+    """Atende requisições no socket herdado até o processo ser encerrado."""
+    import logging
+
+    from werkzeug.serving import make_server
+
+    import flask_app
+
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    server = make_server('127.0.0.1', 0, flask_app.app, threaded=True, fd=fd)
+    server.serve_forever()
+
+
+def run_worker(preload, fd):
+    """Worker do modo spawn: importa a aplicação do zero e atende."""
+    import flask_app
+
+    flask_app.create_app(preload_data=preload)
+    serve(fd)
+
+
+def run_master(mode, workers, port):
+    """Abre o socket e cria os workers (por fork ou como processos novos)."""
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+    fd = sock.fileno()
+    children = []
+
+    if mode.startswith('fork'):
+        import flask_app
+
+        flask_app.create_app(preload_data=mode == 'fork-preload')
+        for _ in range(workers):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    serve(fd)
+                finally:
+                    os._exit(0)
+            children.append(pid)
+    else:
+        command = [sys.executable, os.path.abspath(__file__), '--worker', mode, '--fd', str(fd)]
+        children = [subprocess.Popen(command, pass_fds=(fd,)).pid for _ in range(workers)]
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        os._exit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    while True:
+        signal.pause()
+
+
+def child_pids(pid):
+    """PIDs dos processos filhos (pelo PPid de /proc/<pid>/status)."""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/status') as f:
+                for line in f:
+                    if line.startswith('PPid:'):
+                        if int(line.split()[1]) == pid:
+                            children.append(int(entry))
+                        break
+        except OSError:
+            continue
+    return children
+
+
+def memory(pid):
+    """Memória do processo em KiB: {'rss', 'pss', 'private'} (de smaps_rollup)."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': values.get('Rss', 0),
+        'pss': values.get('Pss', 0),
+        'private': values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    }
+
+
+def send_traffic(base_url, total, concurrency):
+    """Mensagens do chat e rotas de leitura, cada uma numa conexão nova."""
+    paths = ['/api/lineup', '/api/news', '/api/tournaments', '/']
+
+    def request(i):
+        if i % 2:
+            return httpx.get(base_url + paths[i // 2 % len(paths)], timeout=30).status_code
+        return httpx.post(base_url + '/api/chat', json={'message': CORPUS[i % len(CORPUS)]},
+                          timeout=30).status_code
+
+    with ThreadPoolExecutor(concurrency) as executor:
+        return sum(status == 200 for status in executor.map(request, range(total)))
+
+
+def run_mode(mode, args, env):
+    """Sobe o servidor no modo informado e devolve as medidas."""
+    port = free_port()
+    base_url = f'http://127.0.0.1:{port}'
+    command = [sys.executable, os.path.abspath(__file__), '--master', mode,
+               '--workers', str(args.workers), '--port', str(port)]
+    started = time.perf_counter()
+    master = subprocess.Popen(command, cwd=ROOT_DIR, env=env)
+    try:
+        first = None
+        while time.perf_counter() - started < args.timeout:
+            try:
+                response = httpx.post(base_url + '/api/chat', json={'message': 'line-up'},
+                                      timeout=5)
+                if response.status_code == 200:
+                    first = time.perf_counter() - started
+                    break
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.005)
+        if first is None:
+            raise RuntimeError(f'o servidor ({mode}) não respondeu')
+
+        ok = send_traffic(base_url, args.requests, args.concurrency)
+        workers = child_pids(master.pid)
+        usage = [memory(pid) for pid in workers]
+        master_usage = memory(master.pid)
+    finally:
+        master.terminate()
+        master.wait()
+
+    total_pss = sum(u['pss'] for u in usage) + master_usage['pss']
+    return {
+        'first': first,
+        'ok': ok,
+        'workers': len(usage),
+        'rss': statistics.mean(u['rss'] for u in usage),
+        'pss': statistics.mean(u['pss'] for u in usage),
+        'private': statistics.mean(u['private'] for u in usage),
+        'total_pss': total_pss
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=400,
+                        help='requisições enviadas antes de medir a memória')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--runs', type=int, default=5,
+                        help='repetições da medida de importação')
+    parser.add_argument('--modes', default=','.join(MODES))
+    parser.add_argument('--timeout', type=float, default=60)
+    # Uso interno: processo principal e workers do servidor pre-fork
+    parser.add_argument('--master', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--worker', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--fd', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.master:
+        run_master(args.master, args.workers, args.port)
+        return
+    if args.worker:
+        run_worker(args.worker == 'spawn-preload', args.fd)
+        return
+
+    draft5 = start_server()
+    with tempfile.TemporaryDirectory() as directory:
+        # O atualizador de cada worker busca no Draft5 local; o snapshot fica desligado
+        env = dict(os.environ, DRAFT5_BASE_URL=draft5.base_url, DRAFT5_SNAPSHOT_PATH='',
+                   MATCH_DB_PATH=os.path.join(directory, 'matches.sqlite3'),
+                   PYTHONPATH=ROOT_DIR)
+
+        imported, preloaded, deferred = measure_imports(env, args.runs)
+        print(f"import flask_app {imported * 1000:7.1f} ms   preload {preloaded * 1000:7.1f} ms"
+              f"   (mediana de {args.runs})")
+        print(f"importados só na primeira atualização: {deferred.replace('-', 'nenhum')}")
+        print(f"\n{args.workers} workers, {args.requests} requisições; memória média por "
+              "worker em MiB")
+        print(f"{'modo':<14}{'1ª resposta':>12}{'RSS':>8}{'PSS':>8}{'privada':>9}"
+              f"{'PSS total':>11}")
+        for mode in args.modes.split(','):
+            result = run_mode(mode, args, env)
+            print(f"{mode:<14}{result['first'] * 1000:>9.0f} ms"
+                  f"{result['rss'] / 1024:>8.1f}{result['pss'] / 1024:>8.1f}"
+                  f"{result['private'] / 1024:>9.1f}{result['total_pss'] / 1024:>11.1f}"
+                  + ('' if result['ok'] == args.requests else
+                     f"   ({args.requests - result['ok']} erros)"))
+    draft5.shutdown()
+
+
+if __name__ == '__main__':
+    main()
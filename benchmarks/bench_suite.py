@@ -0,0 +1,391 @@
+"""
+Suíte reprodutível de carga e latência da API do chat.
+
+Reproduz as conversas de torcedores de fixtures/fan_messages.json (saudações,
+estatísticas por data, line-up, notícias, erros de digitação, mensagens sem
+sentido...) contra /api/chat, intercaladas com as leituras de /api/news e
+/api/lineup que a página faz (com If-None-Match, como o navegador). Os dados
+vêm do Draft5 local (fake_draft5.py), então as respostas são sempre as mesmas.
+
+A sequência de requisições é sorteada com uma semente fixa: duas rodadas com os
+mesmos parâmetros enviam exatamente as mesmas mensagens, na mesma ordem. O
+relatório mostra a vazão e os percentis p50/p95/p99 por rota e por intenção
+(a intenção que o torcedor quis expressar, anotada no corpus).
+
+Com --save-baseline o resultado é gravado em benchmarks/baselines/<alvo>.json;
+nas rodadas seguintes ele é comparado com o baseline e o script termina com
+código 1 se alguma latência (--metric) piorar ou a vazão cair mais que
+--threshold, ou se alguma requisição falhar.
+
+Alvos:
+- sem --server: dentro do processo, pelo cliente de testes do Flask
+- --server asgi --workers N: uvicorn com N processos (subprocesso)
+- --server flask: servidor do Flask com threads (um processo)
+- --url: um servidor já rodando (ex.: gunicorn -w 4 flask_app:app)
+
+Uso:
+    python benchmarks/bench_suite.py --requests 5000 --save-baseline
+    python benchmarks/bench_suite.py --requests 5000 --threshold 0.2
+    python benchmarks/bench_suite.py --server asgi --workers 4 --concurrency 32
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from fake_draft5 import start_server  # noqa: E402
+from load_chat import free_port, percentile  # noqa: E402
+
+CORPUS_PATH = os.path.join(BENCH_DIR, 'fixtures', 'fan_messages.json')
+BASELINE_DIR = os.path.join(BENCH_DIR, 'baselines')
+
+# Rotas de leitura que a página consulta, e o peso de cada uma entre as leituras
+READ_ENDPOINTS = {'/api/news': 2, '/api/lineup': 1}
+
+# Grupos com menos amostras que isso não entram na comparação com o baseline
+MIN_SAMPLES = 20
+
+
+def load_corpus(path=CORPUS_PATH):
+    """Lê as conversas do corpus ({category, weight, messages: [[mensagem, intenção]]})."""
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)['conversations']
+
+
+def make_plan(conversations, requests, clients, read_ratio=0.3, seed=42):
+    """
+    Sorteia a sequência de requisições de cada cliente simulado.
+
+    Cada cliente escolhe uma conversa (pelo peso), envia todas as mensagens
+    dela numa mesma sessão e, entre uma conversa e outra, faz leituras de
+    /api/news e /api/lineup na proporção read_ratio.
+
+    Returns:
+        list: Uma lista de passos por cliente; cada passo é
+            (rota, intenção ou None, mensagem ou None, nova_sessão)
+    """
+    rng = random.Random(seed)
+    weights = [conversation.get('weight', 1) for conversation in conversations]
+    reads = list(READ_ENDPOINTS)
+    read_weights = list(READ_ENDPOINTS.values())
+    plans = [[] for _ in range(clients)]
+    for i in range(requests):
+        plan = plans[i % clients]
+        if plan and plan[-1][0] == '/api/chat' and plan[-1][4]:
+            # Conversa em andamento: próxima mensagem dela
+            remaining = plan[-1][4]
+            (message, intent), rest = remaining[0], remaining[1:]
+            plan.append(('/api/chat', intent, message, False, rest))
+        elif rng.random() < read_ratio:
+            plan.append((rng.choices(reads, read_weights)[0], None, None, False, ()))
+        else:
+            conversation = rng.choices(conversations, weights)[0]['messages']
+            (message, intent), rest = conversation[0], tuple(conversation[1:])
+            plan.append(('/api/chat', intent, message, True, rest))
+    return [[step[:4] for step in plan] for plan in plans]
+
+
+def summarize(samples, elapsed):
+    """
+    Calcula vazão e percentis por rota e por intenção.
+
+    Args:
+        samples (list): Lista de (rota, intenção, latência em s, ok)
+        elapsed (float): Duração da rodada em segundos
+
+    Returns:
+        dict: {'endpoints': {...}, 'intents': {...}} com count, errors, rps,
+            p50_ms, p95_ms e p99_ms de cada grupo
+    """
+    groups = {'endpoints': {}, 'intents': {}}
+    for endpoint, intent, latency, ok in samples:
+        keys = [('endpoints', endpoint)]
+        if intent is not None:
+            keys.append(('intents', intent))
+        for kind, name in keys:
+            group = groups[kind].setdefault(name, {'latencies': [], 'errors': 0})
+            if ok:
+                group['latencies'].append(latency)
+            else:
+                group['errors'] += 1
+
+    result = {}
+    for kind, entries in groups.items():
+        result[kind] = {}
+        for name, group in sorted(entries.items()):
+            latencies = sorted(group['latencies'])
+            stats = {'count': len(latencies), 'errors': group['errors'],
+                     'rps': round(len(latencies) / elapsed, 1)}
+            for label, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+                value = percentile(latencies, fraction) * 1000 if latencies else None
+                stats[f'{label}_ms'] = round(value, 3) if value is not None else None
+            result[kind][name] = stats
+    return result
+
+
+def run_in_process(plans, warmup):
+    """Executa o plano pelo cliente de testes do Flask, uma thread por cliente."""
+    draft5 = start_server()
+    os.environ['DRAFT5_BASE_URL'] = draft5.base_url
+    directory = tempfile.mkdtemp()
+    os.environ.setdefault('MATCH_DB_PATH', os.path.join(directory, 'matches.sqlite3'))
+    # Sem snapshot de rodadas anteriores (nem gravação em data/)
+    os.environ['DRAFT5_SNAPSHOT_PATH'] = os.path.join(directory, 'snapshot.bin')
+    import flask_app
+
+    # Carrega as fixtures nos caches, como a primeira atualização em segundo plano
+    flask_app.draft5_refresher.refresh()
+
+    def execute(plan, samples):
+        client = flask_app.app.test_client()
+        session_id = None
+        etags = {}
+        for endpoint, intent, message, new_session in plan:
+            start = time.perf_counter()
+            if message is None:
+                headers = {'If-None-Match': etags[endpoint]} if endpoint in etags else {}
+                response = client.get(endpoint, headers=headers)
+                ok = response.status_code in (200, 304)
+                if ok:
+                    etags[endpoint] = response.headers['ETag']
+            else:
+                if new_session:
+                    session_id = None
+                response = client.post(endpoint, json={'message': message,
+                                                       'session_id': session_id})
+                ok = response.status_code == 200
+                if ok:
+                    session_id = response.get_json()['session_id']
+            samples.append((endpoint, intent, time.perf_counter() - start, ok))
+
+    execute([step for plan in plans for step in plan][:warmup], [])
+    samples = []
+    threads = [threading.Thread(target=execute, args=(plan, samples)) for plan in plans]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    draft5.shutdown()
+    return samples, elapsed
+
+
+async def run_http_async(url, plans, warmup):
+    import httpx
+
+    async def execute(client, plan, samples):
+        session_id = None
+        etags = {}
+        for endpoint, intent, message, new_session in plan:
+            start = time.perf_counter()
+            try:
+                if message is None:
+                    headers = {'If-None-Match': etags[endpoint]} if endpoint in etags else {}
+                    response = await client.get(url + endpoint, headers=headers)
+                    ok = response.status_code in (200, 304)
+                    if ok:
+                        etags[endpoint] = response.headers['ETag']
+                else:
+                    if new_session:
+                        session_id = None
+                    response = await client.post(url + endpoint, json={
+                        'message': message, 'session_id': session_id})
+                    ok = response.status_code == 200
+                    if ok:
+                        session_id = response.json()['session_id']
+            except httpx.HTTPError:
+                ok = False
+            samples.append((endpoint, intent, time.perf_counter() - start, ok))
+
+    limits = httpx.Limits(max_connections=len(plans))
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        await execute(client, [step for plan in plans for step in plan][:warmup], [])
+        samples = []
+        start = time.perf_counter()
+        await asyncio.gather(*(execute(client, plan, samples) for plan in plans))
+        return samples, time.perf_counter() - start
+
+
+def start_app_server(kind, workers, port, draft5_url, db_path, snapshot_path=''):
+    """Sobe a aplicação num subprocesso (uvicorn com N workers ou Flask) e espera ela responder."""
+    import subprocess
+
+    import httpx
+
+    if kind == 'asgi':
+        command = ['-m', 'uvicorn', 'asgi_app:app', '--host', '127.0.0.1', '--port', str(port),
+                   '--workers', str(workers), '--log-level', 'warning']
+    else:
+        command = ['-c', "import flask_app; flask_app.start_background_refresh(); "
+                         f"flask_app.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+    env = dict(os.environ, DRAFT5_BASE_URL=draft5_url, MATCH_DB_PATH=db_path,
+               DRAFT5_SNAPSHOT_PATH=snapshot_path)
+    process = subprocess.Popen([sys.executable] + command, cwd=ROOT_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            # Espera os dados das fixtures chegarem (a versão dos dados deixa de ser 0)
+            metrics = httpx.get(f'http://127.0.0.1:{port}/metrics', timeout=1).text
+            if 'furia_data_version 0\n' not in metrics:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f'a aplicação ({kind}) não respondeu')
+
+
+def run_server(kind, workers, plans, warmup):
+    draft5 = start_server()
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        process = start_app_server(kind, workers, port, draft5.base_url,
+                                   os.path.join(directory, 'matches.sqlite3'))
+        try:
+            return asyncio.run(run_http_async(f'http://127.0.0.1:{port}', plans, warmup))
+        finally:
+            process.terminate()
+            process.wait()
+            draft5.shutdown()
+
+
+def compare(result, baseline, threshold, metric='p95_ms', min_delta_ms=0.5):
+    """
+    Compara uma rodada com o baseline.
+
+    Uma latência só conta como regressão se passar de baseline * (1 + threshold)
+    e também de baseline + min_delta_ms, para que variações de microssegundos
+    em respostas muito rápidas não reprovem a rodada.
+
+    Returns:
+        list: Descrição de cada regressão encontrada (vazia se nenhuma)
+    """
+    regressions = []
+    for kind in ('endpoints', 'intents'):
+        for name, current in result[kind].items():
+            if current['errors']:
+                regressions.append(f"{name}: {current['errors']} requisições com erro")
+            before = baseline.get(kind, {}).get(name)
+            if not before or min(before['count'], current['count']) < MIN_SAMPLES:
+                continue
+            old, new = before[metric], current[metric]
+            if old is not None and new is not None and \
+                    new > old * (1 + threshold) and new - old > min_delta_ms:
+                regressions.append(f"{name}: {metric} {old:.2f} -> {new:.2f} ms "
+                                   f"(+{(new / old - 1) * 100:.0f}%)")
+            if kind == 'endpoints' and current['rps'] < before['rps'] * (1 - threshold):
+                regressions.append(f"{name}: vazão {before['rps']:.0f} -> {current['rps']:.0f} req/s")
+    return regressions
+
+
+def print_report(result):
+    for kind, title in (('endpoints', 'rota'), ('intents', 'intenção')):
+        print(f"\n{title:<18} {'req':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} "
+              f"{'p99 ms':>8} {'erros':>6}")
+        for name, stats in result[kind].items():
+            print(f"{name:<18} {stats['count']:>6} {stats['rps']:>8.0f} "
+                  + ' '.join(f"{stats[key]:>8.2f}" if stats[key] is not None else f"{'-':>8}"
+                             for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+                  + f" {stats['errors']:>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--server', choices=('asgi', 'flask'),
+                        help='sobe a aplicação num subprocesso (padrão: dentro do processo)')
+    parser.add_argument('--workers', type=int, default=1, help='processos do uvicorn (--server asgi)')
+    parser.add_argument('--url', help='servidor já rodando (ex.: http://127.0.0.1:3000)')
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--warmup', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='clientes simultâneos (padrão: 1 no processo, 16 por HTTP)')
+    parser.add_argument('--read-ratio', type=float, default=0.3,
+                        help='fração das requisições que são leituras de /api/news e /api/lineup')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--baseline', help='arquivo do baseline (padrão: baselines/<alvo>.json)')
+    parser.add_argument('--save-baseline', action='store_true',
+                        help='grava o resultado como novo baseline em vez de comparar')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='piora relativa tolerada antes de reprovar (0.2 = 20%%)')
+    parser.add_argument('--metric', choices=('p50_ms', 'p95_ms', 'p99_ms'), default='p95_ms')
+    parser.add_argument('--output', help='grava também o resultado desta rodada neste arquivo')
+    args = parser.parse_args()
+
+    if args.server == 'flask' and args.workers != 1:
+        parser.error('o servidor do Flask roda num processo só; para vários workers '
+                     'suba-o com gunicorn e use --url')
+    if args.url:
+        target = 'url'
+    elif args.server:
+        target = f'{args.server}-{args.workers}w'
+    else:
+        target = 'inprocess'
+    concurrency = args.concurrency or (1 if target == 'inprocess' else 16)
+
+    plans = make_plan(load_corpus(), args.requests, concurrency, args.read_ratio, args.seed)
+    print(f"alvo: {target}, {args.requests} requisições, {concurrency} clientes, semente {args.seed}")
+    if args.url:
+        samples, elapsed = asyncio.run(run_http_async(args.url.rstrip('/'), plans, args.warmup))
+    elif args.server:
+        samples, elapsed = run_server(args.server, args.workers, plans, args.warmup)
+    else:
+        samples, elapsed = run_in_process(plans, args.warmup)
+
+    result = summarize(samples, elapsed)
+    result['meta'] = {
+        'target': target, 'requests': args.requests, 'concurrency': concurrency,
+        'read_ratio': args.read_ratio, 'seed': args.seed, 'elapsed_s': round(elapsed, 3),
+        'rps': round(len(samples) / elapsed, 1), 'python': platform.python_version(),
+        'cpus': os.cpu_count(), 'date': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+    print(f"total: {result['meta']['rps']:.0f} req/s em {elapsed:.2f} s")
+    print_report(result)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f'{target}.json')
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(baseline_path), exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"\nbaseline gravado em {baseline_path}")
+        return 0
+
+    if not os.path.exists(baseline_path):
+        print(f"\nsem baseline em {baseline_path} (use --save-baseline para criar)")
+        return 0
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    meta = baseline.get('meta', {})
+    if any(meta.get(key) != result['meta'][key]
+           for key in ('requests', 'concurrency', 'read_ratio', 'seed')):
+        print("\naviso: o baseline foi gravado com outros parâmetros; a comparação é aproximada")
+
+    regressions = compare(result, baseline, args.threshold, args.metric)
+    if regressions:
+        print(f"\n{len(regressions)} regressão(ões) em relação a {baseline_path}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nsem regressões em relação a {baseline_path} "
+          f"({args.metric}, tolerância {args.threshold:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,202 @@
+"""
+Confere a agenda de atualização e o limite de memória dos times acompanhados.
+
+Sobe o Draft5 local com as páginas de equipe de N times sintéticos (parte
+deles com partida hoje, os demais divididos entre as prioridades high, normal
+e low), importa a aplicação com esses times em DRAFT5_TEAMS e deixa o
+team_scheduler rodando por alguns intervalos. Mede:
+- o ritmo das buscas ao Draft5 e o menor tempo entre duas atualizações de
+  times (não pode ser menor que o espaçamento);
+- quantas vezes cada grupo de times foi atualizado (os com partida hoje mais,
+  os de prioridade baixa menos);
+- o tamanho das partições em memória, que não pode passar do limite
+  (TEAM_CACHE_BYTES), e as partições descartadas;
+- o tempo de get_team_data com a partição em memória e recarregada do
+  snapshot do time.
+
+Termina com erro se o espaçamento ou o limite de memória não forem respeitados.
+
+Uso:
+    python benchmarks/bench_teams.py --teams 200 --interval 8 --live-interval 2 --duration 20
+"""
+import argparse
+import hashlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from fake_draft5 import load_fixtures, start_server  # noqa: E402
+
+PRIORITIES = ('high', 'normal', 'low')
+
+
+def report(name, ok, detail):
+    print(f"{'ok ' if ok else 'FALHOU'} {name:<30} {detail}")
+    return ok
+
+
+def with_etag(body):
+    return body, '"%s"' % hashlib.sha1(body).hexdigest()
+
+
+def make_teams(count, live):
+    """Slugs e grupos ('live' ou a prioridade) dos times sintéticos."""
+    teams = []
+    for i in range(count):
+        slug = f"{10000 + i}-Time-{i}"
+        group = 'live' if i < live else PRIORITIES[i % len(PRIORITIES)]
+        teams.append((slug, group))
+    return teams
+
+
+def make_pages(teams):
+    """Fixtures do Draft5 com as páginas de equipe de cada time e as partidas de hoje."""
+    pages = load_fixtures()
+    news, _ = pages['/equipe/330-FURIA/noticias']
+    lineup, _ = pages['/equipe/330-FURIA']
+    today = datetime.now().strftime('%d/%m/%Y')
+    matches = []
+    for slug, group in teams:
+        name = slug.split('-', 1)[1].replace('-', ' ').encode()
+        pages[f'/equipe/{slug}/noticias'] = with_etag(news.replace(b'FURIA', name))
+        pages[f'/equipe/{slug}'] = with_etag(lineup.replace(b'FURIA', name))
+        if group == 'live':
+            matches.append(
+                b'<div class="match-item"><div class="team">' + name + b'</div>'
+                b'<div class="opponent">MIBR</div><div class="date">' + today.encode() +
+                b'</div><div class="tournament">PGL Astana 2025</div>'
+                b'<a class="match-link" href="/partida/1">Ver partida</a></div>')
+    body, _ = pages['/proximas-partidas']
+    pages['/proximas-partidas'] = with_etag(
+        body.replace(b'<section class="upcoming-matches">',
+                     b'<section class="upcoming-matches">' + b''.join(matches)))
+    return pages
+
+
+def team_hits(server):
+    with server.lock:
+        return sum(hits for path, hits in server.hits.items()
+                   if path.startswith('/equipe/') and not path.startswith('/equipe/330-'))
+
+
+def timed(func, repeat):
+    """Mediana, em microssegundos, de repeat chamadas de func()."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return statistics.median(times) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--teams', type=int, default=200)
+    parser.add_argument('--live', type=int, default=10,
+                        help='times com partida hoje')
+    parser.add_argument('--interval', type=int, default=8,
+                        help='intervalo de atualização (DRAFT5_REFRESH_INTERVAL), em segundos')
+    parser.add_argument('--live-interval', type=int, default=2,
+                        help='intervalo dos times com partida hoje, em segundos')
+    parser.add_argument('--cache-kb', type=int, default=64,
+                        help='limite de memória das partições (TEAM_CACHE_BYTES), em KiB')
+    parser.add_argument('--duration', type=float, default=20,
+                        help='tempo de observação, em segundos')
+    args = parser.parse_args()
+
+    teams = make_teams(args.teams, args.live)
+    draft5 = start_server(pages=make_pages(teams))
+    directory = tempfile.TemporaryDirectory()
+    os.environ.update(
+        DRAFT5_BASE_URL=draft5.base_url,
+        DRAFT5_TEAMS=','.join(f"{slug}:{group if group != 'live' else 'normal'}"
+                              for slug, group in teams),
+        DRAFT5_REFRESH_INTERVAL=str(args.interval),
+        DRAFT5_LIVE_REFRESH_INTERVAL=str(args.live_interval),
+        TEAM_CACHE_BYTES=str(args.cache_kb * 1024),
+        DRAFT5_SNAPSHOT_PATH=os.path.join(directory.name, 'snapshot.bin'),
+        MATCH_DB_PATH=os.path.join(directory.name, 'matches.sqlite3'))
+
+    import flask_app
+    from teams import partition_size
+
+    # Partidas de hoje carregadas antes da agenda começar
+    flask_app.draft5_refresher.refresh()
+    scheduler = flask_app.team_scheduler
+    starts = []
+    refreshed = {}
+    refresh = scheduler.refresh
+
+    def observed(team):
+        starts.append(time.monotonic())
+        refreshed[team.slug] = refreshed.get(team.slug, 0) + 1
+        return refresh(team)
+
+    scheduler.refresh = observed
+    scheduler.schedule()
+    peak = 0
+    before = team_hits(draft5)
+    scheduler.start()
+    started = time.monotonic()
+    while time.monotonic() - started < args.duration:
+        peak = max(peak, flask_app.team_partitions.bytes)
+        time.sleep(0.01)
+    scheduler.stop()
+    elapsed = time.monotonic() - started
+    fetches = team_hits(draft5) - before
+
+    spacing = scheduler.spacing
+    print(f"{args.teams} times ({args.live} com partida hoje), intervalo de {args.interval} s "
+          f"({args.live_interval} s ao vivo), espaçamento de {spacing * 1000:.0f} ms, "
+          f"{elapsed:.0f} s")
+    results = []
+    gaps = [b - a for a, b in zip(starts, starts[1:])]
+    results.append(report('espaçamento entre times', not gaps or min(gaps) >= spacing * 0.95,
+                          f"menor intervalo {min(gaps, default=0) * 1000:.0f} ms; "
+                          f"{len(starts)} atualizações"))
+    limit = 2 * elapsed / spacing
+    results.append(report('ritmo das buscas', fetches <= limit + 2,
+                          f"{fetches / elapsed:.1f} páginas/s (limite "
+                          f"{limit / elapsed:.1f} páginas/s)"))
+
+    groups = {}
+    for slug, group in teams:
+        groups.setdefault(group, []).append(refreshed.get(slug, 0))
+    detail = ', '.join(f"{group} {statistics.mean(counts):.1f}"
+                       for group, counts in groups.items())
+    print(f"    atualizações por time: {detail}")
+
+    budget = args.cache_kb * 1024
+    # Uma partição pode passar do limite sozinha (a que acabou de entrar nunca sai)
+    largest = max((partition_size(flask_app.team_partitions.peek(slug))
+                   for slug, _ in teams if slug in flask_app.team_partitions), default=0)
+    results.append(report('limite de memória', peak <= budget + largest,
+                          f"pico {peak / 1024:.0f} KiB de {args.cache_kb} KiB; "
+                          f"{len(flask_app.team_partitions)} times em memória, "
+                          f"{flask_app.team_partitions.evictions} descartados"))
+
+    team = next(t for t in flask_app.FOLLOWED_TEAMS if t.slug in flask_app.team_partitions)
+    hit = timed(lambda: flask_app.get_team_data(team), 1000)
+
+    def reload():
+        flask_app.team_partitions.discard(team.slug)
+        flask_app.get_team_data(team)
+
+    miss = timed(reload, 200)
+    print(f"    get_team_data: {hit:.1f} µs em memória, {miss:.0f} µs do snapshot")
+
+    draft5.shutdown()
+    directory.cleanup()
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
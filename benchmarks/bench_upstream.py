@@ -0,0 +1,230 @@
+"""
+Cenários das proteções das chamadas ao Draft5 (upstream.py) contra o Draft5 local.
+
+Usa o fake_draft5 com atraso e erros injetados para conferir, nos clientes
+síncrono (requests) e assíncrono (httpx):
+- coalescência: muitas chamadas simultâneas à mesma página viram uma requisição;
+- limite por host: nunca há mais requisições simultâneas que max_per_host;
+- tempo limite: um Draft5 travado falha em ~read timeout, não em minutos;
+- cache negativo: uma página que acabou de falhar não é pedida de novo;
+- disjuntor: com o Draft5 fora do ar o circuito abre, as chamadas param de
+  chegar nele e o atualizador publica os últimos dados bons como stale; quando
+  o Draft5 volta, a requisição de teste fecha o circuito;
+- requisição de teste cancelada: o circuito volta a 'open' (em vez de ficar
+  preso em teste) e uma nova requisição de teste passa depois da espera.
+
+Cada cenário imprime o resultado e termina com erro se o comportamento não for
+o esperado.
+
+Uso:
+    python benchmarks/bench_upstream.py --callers 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from fake_draft5 import start_server  # noqa: E402
+from draft5 import AsyncDraft5Client, Draft5Client, Draft5Refresher  # noqa: E402
+from upstream import CircuitOpenError, UpstreamGuard  # noqa: E402
+
+
+def report(name, ok, detail):
+    print(f"{'ok ' if ok else 'FALHOU'} {name:<28} {detail}")
+    return ok
+
+
+def total_hits(server):
+    with server.lock:
+        return sum(server.hits.values())
+
+
+def coalescing(callers):
+    server = start_server(delay=0.3)
+    client = Draft5Client(server.base_url)
+    url = client.urls['news']
+    barrier = threading.Barrier(callers)
+    results = []
+
+    def call():
+        barrier.wait()
+        results.append(client.fetch_page(url))
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    hits = total_hits(server)
+    client.close()
+    server.shutdown()
+    return report('coalescência (threads)', hits == 1 and len(results) == callers,
+                  f"{callers} chamadas -> {hits} requisição(ões) em {elapsed * 1000:.0f} ms")
+
+
+async def coalescing_async(callers):
+    server = start_server(delay=0.3)
+    client = AsyncDraft5Client(server.base_url)
+    url = client.urls['news']
+    start = time.perf_counter()
+    results = await asyncio.gather(*(client.fetch_page(url) for _ in range(callers)))
+    elapsed = time.perf_counter() - start
+    hits = total_hits(server)
+    await client.aclose()
+    server.shutdown()
+    return report('coalescência (event loop)', hits == 1 and len(results) == callers,
+                  f"{callers} chamadas -> {hits} requisição(ões) em {elapsed * 1000:.0f} ms")
+
+
+def per_host_limit():
+    server = start_server(delay=0.2)
+    client = Draft5Client(server.base_url, guard=UpstreamGuard(max_per_host=2))
+    pages = client.fetch_all()
+    client.close()
+    server.shutdown()
+    return report('limite por host', len(pages) == 5 and server.max_in_flight <= 2,
+                  f"5 páginas, no máximo {server.max_in_flight} simultâneas (limite 2)")
+
+
+def timeout():
+    server = start_server(delay=2)
+    client = Draft5Client(server.base_url, timeout=(0.5, 0.3))
+    start = time.perf_counter()
+    try:
+        client.fetch_page(client.urls['news'])
+        failed = False
+    except Exception as e:
+        failed = 'Timeout' in type(e).__name__
+    elapsed = time.perf_counter() - start
+    client.close()
+    server.shutdown()
+    return report('tempo limite de leitura', failed and elapsed < 1,
+                  f"Draft5 travado (2 s): falhou em {elapsed * 1000:.0f} ms")
+
+
+def negative_cache():
+    server = start_server(error_rate=1)
+    client = Draft5Client(server.base_url, guard=UpstreamGuard(negative_ttl=5))
+    url = client.urls['news']
+    errors = 0
+    for _ in range(10):
+        try:
+            client.fetch_page(url)
+        except Exception:
+            errors += 1
+    hits = total_hits(server)
+    client.close()
+    server.shutdown()
+    return report('cache negativo', errors == 10 and hits == 1,
+                  f"10 chamadas com erro -> {hits} requisição(ões)")
+
+
+def circuit_breaker():
+    server = start_server()
+    guard = UpstreamGuard(failures=3, reset=1, negative_ttl=0)
+    client = Draft5Client(server.base_url, guard=guard)
+    published = []
+    refresher = Draft5Refresher(lambda data, changed, stale: published.append((data, stale)),
+                                client=client)
+    ok = True
+
+    refresher.refresh()
+    good = published[-1][0]
+    ok &= report('disjuntor: Draft5 no ar', not published[-1][1] and len(good) == 5,
+                 f"{len(good)} páginas publicadas, nenhuma stale")
+
+    server.error_rate = 1
+    before = total_hits(server)
+    refresher.refresh()
+    refresher.refresh()
+    hits = total_hits(server) - before
+    data, stale = published[-1]
+    ok &= report('disjuntor: Draft5 fora do ar',
+                 guard.open_hosts() and data == good and len(stale) == 5 and hits <= 5,
+                 f"2 atualizações -> {hits} requisições, circuito aberto para "
+                 f"{guard.open_hosts()}, {len(stale)} páginas stale com os últimos dados bons")
+
+    try:
+        client.fetch_page(client.urls['news'])
+        refused = False
+    except CircuitOpenError:
+        refused = True
+    ok &= report('disjuntor: chamada recusada', refused, "CircuitOpenError sem requisição")
+
+    server.error_rate = 0
+    time.sleep(1.1)
+    # Na primeira atualização só a requisição de teste passa; ela fecha o circuito
+    refresher.refresh()
+    probe_stale = len(published[-1][1])
+    refresher.refresh()
+    ok &= report('disjuntor: Draft5 de volta', not guard.open_hosts() and not published[-1][1],
+                 f"requisição de teste fechou o circuito ({probe_stale} páginas ainda stale), "
+                 "próxima atualização sem stale")
+    client.close()
+    server.shutdown()
+    return ok
+
+
+async def cancelled_probe():
+    server = start_server(delay=0.5)
+    guard = UpstreamGuard(failures=1, reset=0.2, negative_ttl=0)
+    client = AsyncDraft5Client(server.base_url, guard=guard)
+    url = client.urls['news']
+    # Circuito aberto por uma falha anterior; depois da espera, a próxima chamada é o teste
+    breaker = guard.breaker(urlsplit(url).netloc)
+    breaker.record_failure()
+    await asyncio.sleep(0.25)
+
+    # A requisição de teste é cancelada no meio (ex.: o cliente desconectou)
+    probe = asyncio.ensure_future(client.fetch_page(url))
+    await asyncio.sleep(0.1)
+    probe.cancel()
+    try:
+        await probe
+    except asyncio.CancelledError:
+        pass
+    state = breaker.state
+
+    server.delay = 0
+    await asyncio.sleep(0.25)
+    try:
+        await client.fetch_page(url)
+        recovered = not guard.open_hosts()
+    except Exception:
+        recovered = False
+    await client.aclose()
+    server.shutdown()
+    return report('teste cancelado', state == 'open' and recovered,
+                  f"circuito '{state}' depois do cancelamento; nova requisição de teste "
+                  f"{'fechou' if recovered else 'não fechou'} o circuito")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--callers', type=int, default=50,
+                        help='chamadas simultâneas nos cenários de coalescência')
+    args = parser.parse_args()
+
+    results = [
+        coalescing(args.callers),
+        asyncio.run(coalescing_async(args.callers)),
+        per_host_limit(),
+        timeout(),
+        negative_cache(),
+        circuit_breaker(),
+        asyncio.run(cancelled_probe()),
+    ]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+Tempo entre reiniciar a aplicação e a primeira resposta com dados reais.
+
+Sobe o Draft5 local com cada página demorando --delay segundos (um Draft5
+lento logo depois de um deploy) e mede, a partir do início do processo da
+aplicação, quanto tempo leva até /api/tournaments responder com os dados das
+fixtures em vez dos dados padrão. A primeira rodada começa sem snapshot (e o
+grava); a segunda reinicia a aplicação com o snapshot da primeira.
+
+Uso:
+    python benchmarks/bench_warm_start.py --server flask --delay 3
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+
+from fake_draft5 import start_server  # noqa: E402
+from load_chat import SERVER_COMMANDS, free_port  # noqa: E402
+from snapshot import Snapshot  # noqa: E402
+
+# Campeonato devolvido enquanto não há dados do Draft5 (ver fetch_furia_tournaments)
+FALLBACK_TOURNAMENT = 'PGL Astana 2025'
+
+
+def is_good(response):
+    """Resposta com os dados do Draft5 (e não os dados padrão)."""
+    if response.status_code != 200:
+        return False
+    tournaments = response.json()
+    return bool(tournaments) and [t['name'] for t in tournaments] != [FALLBACK_TOURNAMENT]
+
+
+def restart(kind, draft5_url, db_path, snapshot_path, timeout):
+    """
+    Sobe a aplicação e mede o tempo até a primeira resposta e até a primeira boa.
+
+    Returns:
+        tuple: (segundos até responder, segundos até a primeira resposta boa)
+    """
+    port = free_port()
+    env = dict(os.environ, DRAFT5_BASE_URL=draft5_url, MATCH_DB_PATH=db_path,
+               DRAFT5_SNAPSHOT_PATH=snapshot_path)
+    command = [sys.executable] + [part.replace('{port}', str(port))
+                                  for part in SERVER_COMMANDS[kind]]
+    url = f'http://127.0.0.1:{port}/api/tournaments'
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    first = None
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                response = httpx.get(url, timeout=1)
+            except httpx.HTTPError:
+                time.sleep(0.01)
+                continue
+            if first is None:
+                first = time.perf_counter() - start
+            if is_good(response):
+                good = time.perf_counter() - start
+                # Espera o atualizador gravar o snapshot antes de derrubar o processo
+                while not os.path.exists(snapshot_path) and time.perf_counter() - start < timeout:
+                    time.sleep(0.01)
+                return first, good
+            time.sleep(0.01)
+        raise RuntimeError('a aplicação não respondeu com dados do Draft5 a tempo')
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def snapshot_read_times(path):
+    """Tempo para abrir o snapshot (só o cabeçalho) e para ler todas as seções."""
+    start = time.perf_counter()
+    snapshot = Snapshot(path)
+    opened = time.perf_counter() - start
+    for name in snapshot:
+        snapshot[name]
+    return opened, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--server', choices=sorted(SERVER_COMMANDS), default='flask')
+    parser.add_argument('--delay', type=float, default=3.0,
+                        help='atraso de cada página do Draft5, em segundos')
+    parser.add_argument('--timeout', type=float, default=60)
+    args = parser.parse_args()
+
+    draft5 = start_server(delay=args.delay)
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = os.path.join(directory, 'matches.sqlite3')
+        snapshot_path = os.path.join(directory, 'snapshot.bin')
+        print(f"servidor: {args.server}, Draft5 com {args.delay:.1f} s por página")
+
+        for name in ('sem snapshot', 'com snapshot'):
+            first, good = restart(args.server, draft5.base_url, db_path, snapshot_path,
+                                  args.timeout)
+            print(f"{name:<14} primeira resposta {first * 1000:7.0f} ms"
+                  f"   primeira resposta com dados {good * 1000:7.0f} ms")
+
+        opened, loaded = snapshot_read_times(snapshot_path)
+        print(f"snapshot: {os.path.getsize(snapshot_path)} bytes, abrir {opened * 1000:.2f} ms, "
+              f"ler todas as seções {loaded * 1000:.2f} ms")
+    draft5.shutdown()
+
+
+if __name__ == '__main__':
+    main()
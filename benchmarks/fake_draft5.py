@@ -0,0 +1,150 @@
+"""
+Servidor local que imita o Draft5 servindo as páginas salvas em fixtures/draft5.
+
+Responde com ETag e Last-Modified e devolve 304 para requisições condicionais,
+permitindo testar o atualizador sem acessar o draft5.gg. A opção --delay atrasa
+todas as respostas, para simular um Draft5 lento, e --error-rate faz uma parte
+delas (sorteada) responder 503, para simular um Draft5 instável ou fora do ar.
+
+Uso:
+    python benchmarks/fake_draft5.py --port 8055
+    DRAFT5_BASE_URL=http://127.0.0.1:8055 python flask_app.py
+"""
+import argparse
+import hashlib
+import os
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'draft5')
+
+# Caminho do Draft5 -> arquivo de fixture
+ROUTES = {
+    '/equipe/330-FURIA/noticias': 'noticias.html',
+    '/proximas-partidas': 'proximas-partidas.html',
+    '/resultados': 'resultados.html',
+    '/campeonatos': 'campeonatos.html',
+    '/equipe/330-FURIA': 'equipe.html'
+}
+
+
+def load_fixtures(fixtures_dir=FIXTURES_DIR, routes=ROUTES):
+    """Carrega as fixtures em memória no formato {caminho: (corpo, etag)}."""
+    pages = {}
+    for path, filename in routes.items():
+        with open(os.path.join(fixtures_dir, filename), 'rb') as f:
+            body = f.read()
+        pages[path] = (body, '"%s"' % hashlib.sha1(body).hexdigest())
+    return pages
+
+
+class FakeDraft5Handler(BaseHTTPRequestHandler):
+    """Handler que serve as fixtures e registra quantas requisições recebeu."""
+
+    server_version = 'FakeDraft5/1.0'
+
+    def do_GET(self):
+        server = self.server
+        path = self.path.split('?', 1)[0]
+        with server.lock:
+            server.hits[path] = server.hits.get(path, 0) + 1
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            fail = server.error_rate and server.rng.random() < server.error_rate
+        try:
+            if server.delay:
+                time.sleep(server.delay)
+            if fail:
+                with server.lock:
+                    server.errors += 1
+                self.send_error(503)
+                return
+            self.serve_page(server, path)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # O cliente desistiu (ex.: tempo limite esgotado)
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+    def serve_page(self, server, path):
+        page = server.pages.get(path)
+        if page is None:
+            self.send_error(404)
+            return
+
+        body, etag = page
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', server.last_modified)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(host='127.0.0.1', port=0, pages=None, delay=0, error_rate=0, seed=0):
+    """
+    Cria (sem iniciar) o servidor falso do Draft5.
+
+    delay e error_rate podem ser trocados com o servidor rodando.
+
+    Args:
+        host (str): Endereço de escuta
+        port (int): Porta (0 escolhe uma porta livre)
+        pages (dict): Páginas a servir (padrão: fixtures de fixtures/draft5)
+        delay (float): Atraso, em segundos, aplicado a todas as respostas
+        error_rate (float): Fração das respostas que saem com erro 503 (1 = todas)
+        seed (int): Semente do sorteio dos erros
+
+    Returns:
+        ThreadingHTTPServer: Servidor com os atributos pages, hits, errors,
+        max_in_flight e base_url
+    """
+    server = ThreadingHTTPServer((host, port), FakeDraft5Handler)
+    server.daemon_threads = True
+    server.pages = pages if pages is not None else load_fixtures()
+    server.hits = {}
+    server.delay = delay
+    server.error_rate = error_rate
+    server.rng = random.Random(seed)
+    server.errors = 0
+    server.in_flight = 0
+    server.max_in_flight = 0
+    server.lock = threading.Lock()
+    server.last_modified = formatdate(usegmt=True)
+    server.base_url = 'http://%s:%d' % server.server_address[:2]
+    return server
+
+
+def start_server(**kwargs):
+    """Cria o servidor falso e o coloca para rodar numa thread em segundo plano."""
+    server = make_server(**kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8055)
+    parser.add_argument('--delay', type=float, default=0,
+                        help='atraso de cada resposta em segundos')
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help='fração das respostas com erro 503 (1 = todas)')
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, delay=args.delay, error_rate=args.error_rate)
+    print(f"Draft5 falso rodando em {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,136 @@
+"""
+Teste de carga do /api/chat com o Draft5 rápido e lento.
+
+Sobe o Draft5 local (fake_draft5.py) e a aplicação num subprocesso (modo ASGI
+com uvicorn ou modo Flask), com o atualizador rodando a cada segundo, e dispara
+mensagens do chat em paralelo. A rodada é feita duas vezes: com o Draft5
+respondendo na hora e com cada página demorando --slow segundos. No modo ASGI
+a vazão e a latência do chat devem ficar praticamente iguais nas duas rodadas.
+
+Uso:
+    python benchmarks/load_chat.py --server asgi --concurrency 50 --duration 10
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from bench_intents import CORPUS  # noqa: E402
+from fake_draft5 import start_server  # noqa: E402
+
+SERVER_COMMANDS = {
+    'asgi': ['-m', 'uvicorn', 'asgi_app:app', '--host', '127.0.0.1', '--port', '{port}',
+             '--log-level', 'warning'],
+    'flask': ['-c', "import flask_app; flask_app.start_background_refresh(); "
+                    "flask_app.app.run(host='127.0.0.1', port={port}, threaded=True)"]
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_app(kind, port, draft5_url, db_path):
+    """Sobe a aplicação num subprocesso e espera ela responder."""
+    env = dict(os.environ, DRAFT5_BASE_URL=draft5_url, DRAFT5_REFRESH_INTERVAL='1',
+               MATCH_DB_PATH=db_path, DRAFT5_SNAPSHOT_PATH='')
+    command = [sys.executable] + [part.replace('{port}', str(port))
+                                  for part in SERVER_COMMANDS[kind]]
+    process = subprocess.Popen(command, cwd=ROOT_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f'http://127.0.0.1:{port}/api/lineup', timeout=1)
+            return process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'a aplicação ({kind}) não respondeu')
+
+
+async def load(url, concurrency, duration):
+    """Dispara mensagens em paralelo e devolve (latências em s, erros)."""
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def worker(client, offset):
+        nonlocal errors
+        session_id = None
+        i = offset
+        while time.monotonic() < deadline:
+            payload = {'message': CORPUS[i % len(CORPUS)], 'session_id': session_id}
+            start = time.perf_counter()
+            try:
+                response = await client.post(url, json=payload)
+                response.raise_for_status()
+                session_id = response.json()['session_id']
+                latencies.append(time.perf_counter() - start)
+            except httpx.HTTPError:
+                errors += 1
+            i += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=30) as client:
+        await asyncio.gather(*(worker(client, i) for i in range(concurrency)))
+    return latencies, errors
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_scenario(name, args, delay):
+    draft5 = start_server(delay=delay)
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        process = start_app(args.server, port, draft5.base_url,
+                            os.path.join(directory, 'matches.sqlite3'))
+        try:
+            latencies, errors = asyncio.run(load(f'http://127.0.0.1:{port}/api/chat',
+                                                 args.concurrency, args.duration))
+        finally:
+            process.terminate()
+            process.wait()
+    draft5.shutdown()
+
+    latencies.sort()
+    if not latencies:
+        print(f"{name:<24} nenhuma resposta ({errors} erros)")
+        return
+    print(f"{name:<24} {len(latencies) / args.duration:>8.0f} req/s"
+          f"  p50 {percentile(latencies, 0.50) * 1000:7.1f} ms"
+          f"  p95 {percentile(latencies, 0.95) * 1000:7.1f} ms"
+          f"  p99 {percentile(latencies, 0.99) * 1000:7.1f} ms"
+          f"  erros {errors}  requisições ao Draft5 {sum(draft5.hits.values())}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--server', choices=sorted(SERVER_COMMANDS), default='asgi')
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--slow', type=float, default=2.0,
+                        help='atraso de cada página do Draft5 lento, em segundos')
+    args = parser.parse_args()
+
+    print(f"servidor: {args.server}, {args.concurrency} clientes, {args.duration:.0f} s por rodada")
+    run_scenario('Draft5 rápido', args, delay=0)
+    run_scenario(f'Draft5 lento ({args.slow:.1f} s)', args, delay=args.slow)
+
+
+if __name__ == '__main__':
+    main()
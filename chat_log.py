@@ -0,0 +1,330 @@
+"""
+Registro das conversas do chat, para moderação e análise.
+
+Cada mensagem respondida vira um registro (momento, sessão, mensagem, intenção
+e se caiu na resposta padrão). Gravar em disco dentro da rota do chat somaria
+a latência do disco a cada resposta, então record só coloca o registro numa
+fila em memória com tamanho máximo; uma thread por processo esvazia a fila e
+grava os registros em lotes.
+
+Cada lote vira um membro gzip anexado ao arquivo atual (JSON, um registro por
+linha). Um arquivo gzip com vários membros é lido como um só, e um lote
+interrompido no meio (ex.: o processo morreu) só perde aquele lote. O arquivo
+muda a cada dia e quando passa de max_bytes; o nome leva o pid, então vários
+workers podem gravar no mesmo diretório.
+
+Com a fila cheia (disco lento, pico de mensagens), a política 'drop' descarta o
+registro na hora e a 'block' espera até block_timeout segundos por espaço antes
+de descartar. Os descartes aparecem em furia_chat_log_records{result="dropped"}.
+
+O resumo offline lê os arquivos e mostra a frequência de cada intenção e as
+mensagens mais comuns que ficaram sem resposta (intenção padrão).
+
+Uso:
+    python chat_log.py data/chat_logs --top 20 --since 2025-04-01
+"""
+import argparse
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+import zlib
+from collections import Counter
+from datetime import datetime
+
+from intents import FALLBACK_INTENT, normalize
+from metrics import CHAT_LOG_RECORDS
+
+# Diretório dos arquivos (vazio desliga o registro)
+CHAT_LOG_DIR = os.getenv('CHAT_LOG_DIR', os.path.join('data', 'chat_logs'))
+
+# Política com a fila cheia: 'drop' (descarta) ou 'block' (espera por espaço)
+CHAT_LOG_POLICY = os.getenv('CHAT_LOG_POLICY', 'drop')
+
+# Tamanho máximo da fila, em registros
+CHAT_LOG_QUEUE = int(os.getenv('CHAT_LOG_QUEUE', '10000'))
+
+# Registros por lote e tempo máximo (em segundos) até gravar um lote incompleto
+CHAT_LOG_BATCH = int(os.getenv('CHAT_LOG_BATCH', '500'))
+CHAT_LOG_FLUSH_INTERVAL = float(os.getenv('CHAT_LOG_FLUSH_INTERVAL', '1'))
+
+# Tamanho (comprimido) a partir do qual o registro passa para um arquivo novo
+CHAT_LOG_MAX_BYTES = int(os.getenv('CHAT_LOG_MAX_BYTES', str(16 * 1024 * 1024)))
+
+POLICIES = ('drop', 'block')
+
+# Marca de fim colocada na fila por stop
+_STOP = object()
+
+
+class ChatLog:
+    """
+    Fila e gravação em lotes dos registros das conversas (ver o início do módulo).
+
+    A thread de gravação é iniciada no primeiro registro de cada processo
+    (threads não sobrevivem ao fork dos workers).
+
+    Args:
+        directory (str): Diretório dos arquivos (vazio ou None desliga o registro)
+        policy (str): 'drop' ou 'block', com a fila cheia
+        queue_size (int): Tamanho máximo da fila
+        batch_size (int): Número máximo de registros por lote
+        flush_interval (float): Tempo máximo até gravar um lote incompleto
+        max_bytes (int): Tamanho do arquivo a partir do qual outro é criado
+        block_timeout (float): Espera máxima por espaço na fila (política 'block')
+    """
+
+    def __init__(self, directory=CHAT_LOG_DIR, policy=CHAT_LOG_POLICY, queue_size=CHAT_LOG_QUEUE,
+                 batch_size=CHAT_LOG_BATCH, flush_interval=CHAT_LOG_FLUSH_INTERVAL,
+                 max_bytes=CHAT_LOG_MAX_BYTES, block_timeout=1.0):
+        if policy not in POLICIES:
+            raise ValueError(f'Política inválida para o registro do chat: {policy}')
+        self.directory = directory
+        self.policy = policy
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.block_timeout = block_timeout
+        self.path = None  # Arquivo atual deste processo
+        self._day = None
+        self._size = 0
+        self._files = 0  # Arquivos criados por este processo (parte do nome)
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._start_lock = threading.Lock()
+        self._written = CHAT_LOG_RECORDS.labels('written')
+        self._dropped = CHAT_LOG_RECORDS.labels('dropped')
+        self._errors = CHAT_LOG_RECORDS.labels('error')
+
+    @property
+    def enabled(self):
+        return bool(self.directory)
+
+    @property
+    def pending(self):
+        """Registros na fila, ainda não gravados."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def record(self, session_id, message, intent):
+        """
+        Coloca o registro de uma mensagem respondida na fila (não espera o disco).
+
+        Args:
+            session_id (str): Id da sessão
+            message (str): Mensagem como foi digitada
+            intent (str): Intenção identificada
+
+        Returns:
+            bool: False se o registro foi descartado (fila cheia) ou está desligado
+        """
+        if not self.directory:
+            return False
+        if self._pid != os.getpid():
+            self.start()
+        entry = (time.time(), session_id, message, intent)
+        try:
+            if self.policy == 'block':
+                self._queue.put(entry, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(entry)
+        except queue.Full:
+            self._dropped.inc()
+            return False
+        return True
+
+    def start(self):
+        """Cria a fila e inicia a thread de gravação deste processo."""
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(self.queue_size)
+            self.path = None
+            self._thread = threading.Thread(target=self._run, args=(self._queue,),
+                                            name='chat-log', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def stop(self):
+        """Grava o que está na fila e para a thread de gravação."""
+        if self._pid != os.getpid() or self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._pid = None
+
+    def flush(self):
+        """Espera a gravação de tudo o que já está na fila."""
+        if self._pid == os.getpid():
+            self._queue.join()
+
+    def _run(self, pending):
+        stopping = False
+        while not stopping:
+            try:
+                entry = pending.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = []
+            # Junta o lote: o que já está na fila, até batch_size ou flush_interval
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if entry is _STOP:
+                    stopping = True
+                else:
+                    batch.append(entry)
+                if stopping or len(batch) >= self.batch_size:
+                    break
+                try:
+                    entry = pending.get_nowait()
+                except queue.Empty:
+                    wait = deadline - time.monotonic()
+                    if wait <= 0:
+                        break
+                    try:
+                        entry = pending.get(timeout=wait)
+                    except queue.Empty:
+                        break
+            try:
+                if batch:
+                    self._write(batch)
+                    self._written.inc(len(batch))
+            except Exception as e:
+                self._errors.inc(len(batch))
+                print(f"Erro ao gravar o registro do chat: {str(e)}")
+            finally:
+                for _ in range(len(batch) + stopping):
+                    pending.task_done()
+
+    def _write(self, batch):
+        """Grava o lote como um membro gzip no arquivo atual (trocando de arquivo se preciso)."""
+        lines = ''.join(
+            json.dumps({
+                'ts': datetime.fromtimestamp(timestamp).isoformat(timespec='milliseconds'),
+                'session': session_id,
+                'message': message,
+                'intent': intent,
+                'fallback': intent == FALLBACK_INTENT
+            }, ensure_ascii=False) + '\n'
+            for timestamp, session_id, message, intent in batch)
+        data = gzip.compress(lines.encode('utf-8'), compresslevel=6)
+
+        day = time.strftime('%Y%m%d', time.localtime(batch[0][0]))
+        if self.path is None or day != self._day or self._size + len(data) > self.max_bytes:
+            os.makedirs(self.directory, exist_ok=True)
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(batch[0][0]))
+            self._files += 1
+            self.path = os.path.join(self.directory,
+                                     f'chat-{stamp}-{os.getpid()}-{self._files}.jsonl.gz')
+            self._day, self._size = day, 0
+        with open(self.path, 'ab') as file:
+            file.write(data)
+        self._size += len(data)
+
+
+def log_files(directory):
+    """Arquivos do registro no diretório, do mais antigo para o mais novo."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, name) for name in os.listdir(directory)
+                  if name.startswith('chat-') and name.endswith('.jsonl.gz'))
+
+
+def read_records(paths):
+    """
+    Lê os registros dos arquivos.
+
+    Um lote truncado no fim de um arquivo (gravação interrompida) é ignorado.
+
+    Yields:
+        dict: Registros {ts, session, message, intent, fallback}
+    """
+    for path in paths:
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+        except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+            print(f"Registro incompleto em {path}: {str(e)}")
+
+
+def summarize(records, top=20, since=None):
+    """
+    Resume os registros: mensagens por intenção e as mais comuns sem resposta.
+
+    As mensagens sem resposta são agrupadas pela forma normalizada (sem
+    acentos, maiúsculas nem espaços repetidos).
+
+    Args:
+        records (iterable): Registros lidos por read_records
+        top (int): Número de mensagens sem resposta listadas
+        since (str): Só registros a partir desta data (ISO, ex.: "2025-04-01")
+
+    Returns:
+        dict: {total, sessions, intents: [(intent, n)], fallback_ratio,
+        unanswered: [(mensagem, n)], first, last}
+    """
+    intents = Counter()
+    unanswered = Counter()
+    examples = {}
+    sessions = set()
+    total = 0
+    first = last = None
+    for record in records:
+        if since and record['ts'] < since:
+            continue
+        total += 1
+        sessions.add(record['session'])
+        intents[record['intent']] += 1
+        first = min(first or record['ts'], record['ts'])
+        last = max(last or record['ts'], record['ts'])
+        if record['fallback']:
+            key = ' '.join(normalize(record['message']).split())
+            unanswered[key] += 1
+            examples.setdefault(key, record['message'].strip())
+    return {
+        'total': total,
+        'sessions': len(sessions),
+        'intents': intents.most_common(),
+        'fallback_ratio': intents[FALLBACK_INTENT] / total if total else 0.0,
+        'unanswered': [(examples[key], count) for key, count in unanswered.most_common(top)],
+        'first': first,
+        'last': last
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('directory', nargs='?', default=CHAT_LOG_DIR,
+                        help='diretório dos arquivos do registro')
+    parser.add_argument('--top', type=int, default=20,
+                        help='quantidade de mensagens sem resposta listadas')
+    parser.add_argument('--since', help='só registros a partir desta data (ex.: 2025-04-01)')
+    parser.add_argument('--json', action='store_true', help='resumo em JSON')
+    args = parser.parse_args()
+
+    paths = log_files(args.directory)
+    summary = summarize(read_records(paths), args.top, args.since)
+    if args.json:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+        return
+    print(f"{summary['total']} mensagens de {summary['sessions']} sessões em {len(paths)} arquivos"
+          + (f" ({summary['first']} a {summary['last']})" if summary['total'] else ''))
+    print(f"sem resposta: {summary['fallback_ratio']:.1%}\n")
+    print('Mensagens por intenção:')
+    for intent, count in summary['intents']:
+        print(f"  {intent:<20}{count:>8}{count / summary['total']:>8.1%}")
+    if summary['unanswered']:
+        print('\nMensagens mais comuns sem resposta:')
+        for message, count in summary['unanswered']:
+            print(f"  {count:>6}  {message}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,458 @@
+"""
+Cliente HTTP e atualizador em segundo plano dos dados do Draft5.
+
+As cinco páginas do Draft5 são baixadas em paralelo por uma única sessão HTTP
+com pool de conexões, usando requisições condicionais (ETag/If-Modified-Since)
+para não baixar de novo o que não mudou. O atualizador roda numa thread e
+publica os dados já processados nos caches da aplicação, de modo que as rotas
+nunca precisam esperar pelo draft5.gg.
+
+O AsyncDraft5Client e o AsyncDraft5Refresher fazem o mesmo sobre o httpx, para
+o modo de execução ASGI (asgi_app.py).
+
+Toda requisição passa pelo UpstreamGuard (upstream.py): chamadas simultâneas à
+mesma página viram uma só, há um limite de conexões por host, falhas recentes
+ficam num cache negativo e, com o Draft5 fora do ar, o disjuntor passa a
+recusar as chamadas na hora. Nesse caso o atualizador continua publicando os
+últimos dados bons, marcados como desatualizados (stale).
+
+As páginas de equipe (notícias e line-up) são as do time principal
+(teams.HOME_TEAM); fetch_urls baixa as de outros times pela mesma sessão.
+
+A URL base pode ser trocada pela variável de ambiente DRAFT5_BASE_URL, o que
+permite rodar contra o servidor local de fixtures (benchmarks/fake_draft5.py).
+
+O requests, o asyncio e os parsers só são importados quando a primeira
+requisição ou atualização acontece: quem só importa a aplicação (ex.: um
+worker que ainda não atendeu nada) não paga por eles.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import UPSTREAM_FAILURES, UPSTREAM_LATENCY, UPSTREAM_RESPONSES
+from teams import HOME_TEAM
+from upstream import UpstreamGuard
+
+# URL base do Draft5 (pode apontar para um servidor local de testes)
+DRAFT5_BASE_URL = os.getenv('DRAFT5_BASE_URL', 'https://draft5.gg').rstrip('/')
+
+# Intervalo entre as atualizações em segundo plano (em segundos)
+REFRESH_INTERVAL = int(os.getenv('DRAFT5_REFRESH_INTERVAL', '300'))
+
+# Tempo limite de conexão e de leitura das requisições (em segundos)
+REQUEST_TIMEOUT = (3.05, 10)
+
+# Cabeçalhos enviados em todas as requisições ao Draft5
+REQUEST_HEADERS = {'User-Agent': 'FURIA-Chat/1.0'}
+
+# Páginas de equipe do Draft5 (uma de cada por time)
+TEAM_PATHS = {
+    'news': "/equipe/{slug}/noticias",
+    'line-up': "/equipe/{slug}"
+}
+
+
+def team_paths(slug):
+    """Caminhos das páginas de equipe do time com o slug informado (ex.: '330-FURIA')."""
+    return {name: path.format(slug=slug) for name, path in TEAM_PATHS.items()}
+
+
+# Caminhos das páginas do Draft5 usadas pela aplicação (as de equipe são do time principal)
+DRAFT5_PATHS = {
+    'news': team_paths(HOME_TEAM.slug)['news'],
+    'matches': "/proximas-partidas",
+    'results': "/resultados",
+    'tournaments': "/campeonatos",
+    'line-up': team_paths(HOME_TEAM.slug)['line-up']
+}
+
+
+def build_urls(base_url=None, paths=None):
+    """
+    Monta as URLs completas das páginas do Draft5.
+
+    Args:
+        base_url (str): URL base (padrão: DRAFT5_BASE_URL)
+        paths (dict): Caminhos por página (padrão: DRAFT5_PATHS)
+
+    Returns:
+        dict: Dicionário {nome da página: URL}
+    """
+    base_url = (base_url or DRAFT5_BASE_URL).rstrip('/')
+    return {name: base_url + path for name, path in (paths or DRAFT5_PATHS).items()}
+
+
+def failure_reason(error):
+    """Classifica uma exceção de requisição (requests ou httpx) para as métricas."""
+    name = type(error).__name__
+    if 'Timeout' in name:
+        return 'timeout'
+    if 'Connect' in name:
+        return 'connection'
+    return 'error'
+
+
+class _ConditionalRequests:
+    """
+    Validadores das requisições condicionais, compartilhados pelos dois clientes.
+
+    Guarda, para cada URL, o ETag, o Last-Modified e o corpo da última resposta
+    200. Quando o servidor responde 304, o corpo guardado é reaproveitado.
+    """
+
+    def __init__(self, base_url, timeout, guard=None):
+        self.base_url = (base_url or DRAFT5_BASE_URL).rstrip('/')
+        self.urls = build_urls(self.base_url)
+        self.timeout = timeout
+        self.guard = guard or UpstreamGuard()
+        self._validators = {}
+        self._lock = threading.Lock()
+
+    def _conditional_headers(self, url):
+        """Retorna (cabeçalhos condicionais, resposta guardada) para a URL."""
+        with self._lock:
+            cached = self._validators.get(url)
+
+        headers = {}
+        if cached:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+        return headers, cached
+
+    def _observe(self, url, started, status=None, error=None):
+        """Registra nas métricas a duração, o código HTTP ou a falha de uma requisição."""
+        UPSTREAM_LATENCY.labels(url).observe(time.perf_counter() - started)
+        if error is not None:
+            UPSTREAM_FAILURES.labels(url, failure_reason(error)).inc()
+            return
+        UPSTREAM_RESPONSES.labels(url, str(status)).inc()
+        if status >= 400:
+            UPSTREAM_FAILURES.labels(url, 'status').inc()
+
+    def forget(self, urls):
+        """Descarta os validadores e os corpos guardados das URLs (ex.: de um time descartado)."""
+        with self._lock:
+            for url in urls:
+                self._validators.pop(url, None)
+
+    def _remember(self, url, response_headers, body):
+        """Guarda os validadores e o corpo de uma resposta 200."""
+        with self._lock:
+            self._validators[url] = {
+                'etag': response_headers.get('ETag'),
+                'last_modified': response_headers.get('Last-Modified'),
+                'body': body
+            }
+
+
+class Draft5Client(_ConditionalRequests):
+    """
+    Cliente HTTP do Draft5 com sessão reaproveitada e requisições condicionais.
+
+    Args:
+        base_url (str): URL base (padrão: DRAFT5_BASE_URL)
+        timeout (tuple): Tempos limite de (conexão, leitura), em segundos
+        guard (UpstreamGuard): Proteções das chamadas (padrão: um novo UpstreamGuard)
+    """
+
+    def __init__(self, base_url=None, timeout=REQUEST_TIMEOUT, guard=None):
+        super().__init__(base_url, timeout, guard)
+        self._session = None
+        self._executor = ThreadPoolExecutor(max_workers=len(self.urls),
+                                            thread_name_prefix='draft5')
+
+    @property
+    def session(self):
+        """Sessão HTTP com pool de conexões, criada na primeira requisição."""
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=4,
+                                          pool_maxsize=self.guard.max_per_host)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    session.headers.update(REQUEST_HEADERS)
+                    self._session = session
+        return self._session
+
+    def fetch_page(self, url):
+        """
+        Baixa uma página usando requisição condicional.
+
+        Chamadas simultâneas para a mesma URL recebem o resultado de uma única
+        requisição. Com o circuito do host aberto, levanta CircuitOpenError.
+
+        Args:
+            url (str): URL da página
+
+        Returns:
+            tuple: (html, modificado) onde modificado é False em respostas 304
+        """
+        return self.guard.call(url, lambda: self._fetch_page(url))
+
+    def _fetch_page(self, url):
+        headers, cached = self._conditional_headers(url)
+        started = time.perf_counter()
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except Exception as e:
+            self._observe(url, started, error=e)
+            raise
+        self._observe(url, started, status=response.status_code)
+
+        if response.status_code == 304 and cached:
+            return cached['body'], False
+
+        response.raise_for_status()
+        self._remember(url, response.headers, response.text)
+        return response.text, True
+
+    def fetch_all(self):
+        """
+        Baixa todas as páginas do Draft5 em paralelo.
+
+        Returns:
+            dict: Dicionário {nome da página: (html, modificado)}. Páginas que
+            falharam ficam de fora do resultado.
+        """
+        return self.fetch_urls(self.urls)
+
+    def fetch_urls(self, urls):
+        """
+        Baixa as páginas informadas em paralelo, pela mesma sessão e proteções.
+
+        Args:
+            urls (dict): {nome da página: URL} (ex.: as páginas de equipe de outro time)
+
+        Returns:
+            dict: Como em fetch_all
+        """
+        futures = {
+            name: self._executor.submit(self.fetch_page, url)
+            for name, url in urls.items()
+        }
+        pages = {}
+        for name, future in futures.items():
+            try:
+                pages[name] = future.result()
+            except Exception as e:
+                print(f"Erro ao buscar dados ({urls[name]}): {str(e)}")
+        return pages
+
+    def close(self):
+        """Encerra o pool de threads e a sessão HTTP."""
+        self._executor.shutdown(wait=False)
+        if self._session is not None:
+            self._session.close()
+
+
+class AsyncDraft5Client(_ConditionalRequests):
+    """
+    Cliente HTTP assíncrono do Draft5 (httpx), usado no modo ASGI.
+
+    As requisições ficam no event loop, então nenhuma thread fica presa
+    esperando o Draft5.
+    """
+
+    def __init__(self, base_url=None, timeout=REQUEST_TIMEOUT, guard=None):
+        import httpx
+
+        super().__init__(base_url, timeout, guard)
+        connect, read = timeout
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read, connect=connect),
+            limits=httpx.Limits(max_connections=self.guard.max_per_host),
+            headers=REQUEST_HEADERS
+        )
+
+    async def fetch_page(self, url):
+        """Versão assíncrona de Draft5Client.fetch_page."""
+        return await self.guard.call_async(url, lambda: self._fetch_page(url))
+
+    async def _fetch_page(self, url):
+        headers, cached = self._conditional_headers(url)
+        started = time.perf_counter()
+        try:
+            response = await self.client.get(url, headers=headers)
+        except Exception as e:
+            self._observe(url, started, error=e)
+            raise
+        self._observe(url, started, status=response.status_code)
+
+        if response.status_code == 304 and cached:
+            return cached['body'], False
+
+        response.raise_for_status()
+        self._remember(url, response.headers, response.text)
+        return response.text, True
+
+    async def fetch_all(self):
+        """Versão assíncrona de Draft5Client.fetch_all (todas as páginas ao mesmo tempo)."""
+        import asyncio
+
+        names = list(self.urls)
+        results = await asyncio.gather(
+            *(self.fetch_page(self.urls[name]) for name in names),
+            return_exceptions=True
+        )
+        pages = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                print(f"Erro ao buscar dados ({self.urls[name]}): {str(result)}")
+            else:
+                pages[name] = result
+        return pages
+
+    async def aclose(self):
+        """Encerra o cliente HTTP."""
+        await self.client.aclose()
+
+
+class Draft5Refresher:
+    """
+    Atualizador periódico dos dados do Draft5.
+
+    A cada intervalo baixa todas as páginas, processa apenas as que mudaram e
+    entrega o resultado para a função publish(dados, mudou, desatualizadas),
+    responsável por gravar nos caches da aplicação. Páginas que não puderam ser
+    baixadas continuam com os últimos dados bons e entram em desatualizadas.
+
+    initial (ex.: o snapshot em disco) fornece os últimos dados bons das
+    páginas que ainda não foram baixadas nenhuma vez desde o início.
+    """
+
+    def __init__(self, publish, client=None, interval=REFRESH_INTERVAL, initial=None):
+        self.publish = publish
+        self.client = client or Draft5Client()
+        self.interval = interval
+        self.initial = initial if initial is not None else {}
+        self.stale = set()
+        self._parsed = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        """
+        Executa uma atualização completa e publica os dados processados.
+
+        Returns:
+            dict: Dados processados por página, ou None se nenhuma página foi obtida
+        """
+        return self.process(self.client.fetch_all())
+
+    def process(self, pages):
+        """
+        Processa as páginas baixadas e publica o resultado.
+
+        Args:
+            pages (dict): Resultado de fetch_all ({página: (html, modificado)})
+
+        Returns:
+            dict: Dados processados por página, ou None se nenhuma página foi
+            obtida e não há dados anteriores
+        """
+        if not pages and not self._parsed and not self.initial:
+            return None
+
+        from draft5_parser import PARSERS
+
+        changed = False
+        for name, (html, modified) in pages.items():
+            if modified or name not in self._parsed:
+                try:
+                    self._parsed[name] = PARSERS[name](html, self.client.base_url)
+                    changed = True
+                except Exception as e:
+                    print(f"Erro ao processar dados ({name}): {str(e)}")
+
+        for name in self.initial:
+            # Página que nunca foi baixada: segue com os dados do snapshot
+            if name not in self._parsed:
+                self._parsed[name] = self.initial[name]
+
+        data = dict(self._parsed)
+        stale = {name for name in data if name not in pages}
+        changed = changed or stale != self.stale
+        self.stale = stale
+        self.publish(data, changed, stale)
+        return data
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Erro ao atualizar dados do Draft5: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Inicia a thread de atualização (se ainda não estiver rodando)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='draft5-refresher',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Sinaliza para a thread de atualização parar."""
+        self._stop.set()
+
+
+class AsyncDraft5Refresher(Draft5Refresher):
+    """
+    Atualizador periódico para o modo ASGI.
+
+    Roda como uma tarefa do event loop; o download usa o AsyncDraft5Client e o
+    processamento do HTML vai para uma thread, para não travar o loop.
+    """
+
+    def __init__(self, publish, client=None, interval=REFRESH_INTERVAL, initial=None):
+        super().__init__(publish, client=client or AsyncDraft5Client(), interval=interval,
+                         initial=initial)
+        self._task = None
+
+    async def refresh(self):
+        """Executa uma atualização completa e publica os dados processados."""
+        import asyncio
+
+        pages = await self.client.fetch_all()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.process, pages)
+
+    async def _run_async(self):
+        import asyncio
+
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"Erro ao atualizar dados do Draft5: {str(e)}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """Cria a tarefa de atualização no event loop atual (se ainda não existir)."""
+        import asyncio
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run_async())
+
+    async def stop(self):
+        """Cancela a tarefa de atualização e fecha o cliente HTTP."""
+        import asyncio
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        await self.client.aclose()
@@ -0,0 +1,295 @@
+"""
+Extração de dados das páginas do Draft5.
+
+Em vez de montar a árvore completa do documento com o BeautifulSoup, cada
+página é lida por um parser em fluxo (html.parser.HTMLParser) que só presta
+atenção nos blocos que interessam (ex.: div.match-result) e nos campos dentro
+deles. Todo o resto do HTML é descartado assim que é lido, então o custo de CPU
+e de memória fica proporcional ao que é extraído, não ao tamanho da página.
+
+Cada tipo de página tem uma função extract_* que devolve registros tipados
+(NamedTuple) e uma função parse_* que devolve os mesmos dados como dicionários,
+formato usado pelos caches e pelas rotas da API.
+
+O benchmark em benchmarks/bench_parser.py compara esta abordagem com a árvore
+completa do BeautifulSoup.
+"""
+from html.parser import HTMLParser
+from typing import NamedTuple
+from urllib.parse import urljoin
+
+
+class NewsItem(NamedTuple):
+    """Notícia da página de notícias da equipe."""
+    title: str
+    date: str
+    link: str
+
+
+class Match(NamedTuple):
+    """Partida da página de próximas partidas."""
+    team: str
+    opponent: str
+    date: str
+    tournament: str
+    link: str
+
+
+class MatchResult(NamedTuple):
+    """Resultado de partida (página de resultados ou da equipe)."""
+    team: str
+    score: str
+    opponent: str
+    date: str
+    tournament: str
+    link: str
+
+
+class Tournament(NamedTuple):
+    """Campeonato da página de campeonatos."""
+    name: str
+    date: str
+    link: str
+
+
+class MapScore(NamedTuple):
+    """Placar de um mapa da página da partida."""
+    map: str
+    score: str
+
+
+class PlayerStats(NamedTuple):
+    """Linha de estatísticas de um jogador na página da partida."""
+    team: str
+    player: str
+    kd: str
+    kd_diff: str
+    adr: str
+    kast: str
+    rating: str
+
+
+class PageLink(NamedTuple):
+    """Link de navegação entre as páginas de uma listagem."""
+    next: str
+
+
+class Player(NamedTuple):
+    """Integrante do line-up (jogador ou coach)."""
+    nickname: str
+    name: str
+    role: str
+    country: str
+
+
+# Tags HTML que não têm tag de fechamento
+VOID_TAGS = frozenset([
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+    'link', 'meta', 'param', 'source', 'track', 'wbr'
+])
+
+
+class _RecordExtractor(HTMLParser):
+    """
+    Parser em fluxo que monta um registro para cada bloco com as classes informadas.
+
+    Args:
+        record_type: NamedTuple a ser criado para cada bloco
+        containers (iterable): Classes CSS que identificam o bloco de um registro
+        fields (dict): {campo do registro: classe CSS do elemento com o texto}
+        links (dict): {campo do registro: classe CSS do <a> com o href}
+        base_url (str): URL base usada para tornar os links absolutos
+    """
+
+    def __init__(self, record_type, containers, fields, links, base_url):
+        super().__init__(convert_charrefs=True)
+        self.record_type = record_type
+        self.containers = frozenset(containers)
+        self.fields = {class_name: name for name, class_name in fields.items()}
+        self.links = {class_name: name for name, class_name in links.items()}
+        self.base_url = base_url + '/'
+        self.records = []
+        self._depth = 0          # profundidade dentro do bloco atual (0 = fora)
+        self._values = None      # valores do registro em construção
+        self._field = None       # campo cujo texto está sendo lido
+        self._field_depth = 0
+        self._chunks = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in VOID_TAGS:
+            return
+        if self._depth:
+            self._depth += 1
+            if self._field:
+                self._field_depth += 1
+                return
+            classes = self._classes(attrs)
+            if not classes:
+                return
+            for class_name in classes:
+                if class_name in self.fields:
+                    name = self.fields[class_name]
+                    if name not in self._values:
+                        self._field = name
+                        self._field_depth = 1
+                        self._chunks = []
+                    return
+                if tag == 'a' and class_name in self.links:
+                    href = dict(attrs).get('href')
+                    if href:
+                        self._values.setdefault(self.links[class_name],
+                                                urljoin(self.base_url, href))
+                    return
+            return
+
+        classes = self._classes(attrs)
+        if classes and not self.containers.isdisjoint(classes):
+            self._depth = 1
+            self._values = {}
+
+    def handle_endtag(self, tag):
+        if not self._depth or tag in VOID_TAGS:
+            return
+        if self._field:
+            self._field_depth -= 1
+            if not self._field_depth:
+                self._values[self._field] = ''.join(self._chunks).strip()
+                self._field = None
+        self._depth -= 1
+        if not self._depth:
+            values = self._values
+            self.records.append(self.record_type(
+                *(values.get(name, '') for name in self.record_type._fields)
+            ))
+            self._values = None
+
+    def handle_data(self, data):
+        if self._field:
+            self._chunks.append(data)
+
+    @staticmethod
+    def _classes(attrs):
+        for name, value in attrs:
+            if name == 'class' and value:
+                return value.split()
+        return None
+
+
+def _extract(html, base_url, record_type, containers, fields, links):
+    parser = _RecordExtractor(record_type, containers, fields, links, base_url)
+    parser.feed(html)
+    parser.close()
+    return parser.records
+
+
+def extract_news(html, base_url):
+    """
+    Extrai as notícias da página de notícias da equipe.
+
+    Args:
+        html (str): HTML da página
+        base_url (str): URL base usada para tornar os links absolutos
+
+    Returns:
+        list: Lista de NewsItem
+    """
+    return _extract(html, base_url, NewsItem, ['news-item'],
+                    {'title': 'news-title', 'date': 'news-date'},
+                    {'link': 'news-link'})
+
+
+def extract_matches(html, base_url):
+    """Extrai as próximas partidas (lista de Match)."""
+    return _extract(html, base_url, Match, ['match-item'],
+                    {'team': 'team', 'opponent': 'opponent', 'date': 'date',
+                     'tournament': 'tournament'},
+                    {'link': 'match-link'})
+
+
+def extract_results(html, base_url):
+    """Extrai os resultados das partidas (lista de MatchResult)."""
+    return _extract(html, base_url, MatchResult, ['match-result'],
+                    {'team': 'team', 'score': 'score', 'opponent': 'opponent',
+                     'date': 'date', 'tournament': 'tournament'},
+                    {'link': 'match-link'})
+
+
+def extract_tournaments(html, base_url):
+    """Extrai a lista de campeonatos (lista de Tournament)."""
+    return _extract(html, base_url, Tournament, ['tournament-item'],
+                    {'name': 'tournament-name', 'date': 'tournament-date'},
+                    {'link': 'tournament-link'})
+
+
+def extract_lineup(html, base_url):
+    """Extrai o line-up, jogadores e coach, da página da equipe (lista de Player)."""
+    return _extract(html, base_url, Player, ['player-card', 'coach-card'],
+                    {'nickname': 'nickname', 'name': 'name', 'role': 'role',
+                     'country': 'country'},
+                    {})
+
+
+def extract_match_maps(html, base_url):
+    """Extrai os placares dos mapas da página da partida (lista de MapScore)."""
+    return _extract(html, base_url, MapScore, ['map-result'],
+                    {'map': 'map-name', 'score': 'map-score'}, {})
+
+
+def extract_match_stats(html, base_url):
+    """Extrai as estatísticas dos jogadores da página da partida (lista de PlayerStats)."""
+    return _extract(html, base_url, PlayerStats, ['player-stats'],
+                    {'team': 'team', 'player': 'nickname', 'kd': 'kd', 'kd_diff': 'kd-diff',
+                     'adr': 'adr', 'kast': 'kast', 'rating': 'rating'},
+                    {})
+
+
+def extract_next_page(html, base_url):
+    """
+    Extrai o link da próxima página de uma listagem paginada (ex.: resultados).
+
+    Returns:
+        str: URL da próxima página, ou None na última
+    """
+    for record in _extract(html, base_url, PageLink, ['pagination'], {}, {'next': 'next-page'}):
+        if record.next:
+            return record.next
+    return None
+
+
+def parse_match(html, base_url):
+    """
+    Extrai os placares dos mapas e as estatísticas dos jogadores da página da partida.
+
+    Fica no nível do módulo para poder rodar num pool de processos (ver backfill.py).
+
+    Returns:
+        dict: {'maps': [MapScore como dict], 'players': [PlayerStats como dict]}
+    """
+    return {
+        'maps': [record._asdict() for record in extract_match_maps(html, base_url)],
+        'players': [record._asdict() for record in extract_match_stats(html, base_url)]
+    }
+
+
+def _as_dicts(extract):
+    def parse(html, base_url):
+        return [record._asdict() for record in extract(html, base_url)]
+    parse.__name__ = extract.__name__.replace('extract_', 'parse_')
+    parse.__doc__ = extract.__doc__
+    return parse
+
+
+parse_news = _as_dicts(extract_news)
+parse_matches = _as_dicts(extract_matches)
+parse_results = _as_dicts(extract_results)
+parse_tournaments = _as_dicts(extract_tournaments)
+parse_lineup = _as_dicts(extract_lineup)
+
+# Função de extração usada para cada página do Draft5
+PARSERS = {
+    'news': parse_news,
+    'matches': parse_matches,
+    'results': parse_results,
+    'tournaments': parse_tournaments,
+    'line-up': parse_lineup
+}
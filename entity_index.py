@@ -0,0 +1,252 @@
+"""
+Busca tolerante a erros de digitação nos nomes das entidades do chat.
+
+O torcedor escreve "kscerto", "falen", "mongolz" ou "bucareste" e o
+IntentMatcher, que só reconhece os nomes exatos, não acharia nada. O
+FuzzyIndex guarda os termos num índice invertido de trigramas (" fa", "fal",
+"all"...): para uma palavra digitada, só os termos que têm trigramas em comum
+com ela viram candidatos, e só esses passam pela distância de edição. Cada
+erro de digitação destrói no máximo quatro trigramas, então um termo a k erros
+da palavra tem pelo menos len(trigramas) - 4k trigramas em comum; os demais
+são descartados sem calcular a distância. Assim a busca não cresce com o
+tamanho do vocabulário, só com o número de termos parecidos.
+
+O EntityIndex usa dois FuzzyIndex: um para os nomes (e para cada palavra dos
+nomes compostos, então "mongolz" encontra "The MongolZ") e outro para textos
+longos, como os títulos das notícias, comparados com a mensagem inteira pela
+fração de trigramas em comum.
+
+Os termos já chegam normalizados (ver intents.normalize).
+"""
+import re
+from collections import Counter
+
+# Palavras menores que isso só valem escritas exatamente
+MIN_FUZZY_LENGTH = 5
+
+# Fração mínima dos trigramas da mensagem presentes num texto longo (ex.: título)
+MIN_PHRASE_SIMILARITY = 0.6
+
+# Mensagens mais curtas que isso não são comparadas com os textos longos
+MIN_PHRASE_LENGTH = 12
+
+# Palavras de nomes compostos que não identificam a entidade sozinhas
+GENERIC_WORDS = frozenset((
+    'team', 'gaming', 'esports', 'club', 'major', 'open', 'masters', 'league', 'series',
+    'season', 'stage', 'final', 'finals', 'world', 'global', 'championship', 'cup', 'furia'
+))
+
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def max_typos(length):
+    """Erros de digitação aceitos numa palavra com o tamanho informado."""
+    if length < MIN_FUZZY_LENGTH:
+        return 0
+    return 1 if length < 8 else 2
+
+
+def trigrams(text):
+    """Trigramas do texto com um espaço em cada ponta (" ab", "abc", ..., "yz ")."""
+    padded = f' {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """
+    Distância de edição entre a e b, contando a troca de duas letras vizinhas como um erro.
+
+    Só calcula a faixa da matriz a até limit da diagonal (as demais células já
+    passam do limite) e para assim que a distância passa de limit (retorna
+    limit + 1).
+    """
+    len_a, len_b = len(a), len(b)
+    if abs(len_a - len_b) > limit:
+        return limit + 1
+    if a == b:
+        return 0
+    over = limit + 1
+    previous2 = None
+    previous = [j if j <= limit else over for j in range(len_b + 1)]
+    for i in range(1, len_a + 1):
+        char_a = a[i - 1]
+        current = [over] * (len_b + 1)
+        if i <= limit:
+            current[0] = i
+        lowest = current[0]
+        for j in range(max(1, i - limit), min(len_b, i + limit) + 1):
+            char_b = b[j - 1]
+            value = previous[j - 1] + (char_a != char_b)
+            if previous[j] + 1 < value:
+                value = previous[j] + 1
+            if current[j - 1] + 1 < value:
+                value = current[j - 1] + 1
+            if (previous2 is not None and j > 1 and char_a == b[j - 2]
+                    and a[i - 2] == char_b and previous2[j - 2] + 1 < value):
+                value = previous2[j - 2] + 1
+            current[j] = value
+            if value < lowest:
+                lowest = value
+        if lowest > limit:
+            return over
+        previous2, previous = previous, current
+    return previous[len_b] if previous[len_b] <= limit else over
+
+
+class FuzzyIndex:
+    """
+    Termos com um valor associado, indexados por trigramas.
+
+    Um termo pode ter vários valores (ex.: "bucharest" aponta para todas as
+    edições do torneio); os valores voltam na ordem em que foram adicionados.
+    """
+
+    def __init__(self):
+        self.terms = []
+        self.values = []
+        self._ids = {}
+        self._grams = []
+        self._postings = {}  # trigrama -> ids dos termos
+        self._by_length = {}  # (tamanho do termo, trigrama) -> ids dos termos
+
+    def __len__(self):
+        return len(self.terms)
+
+    def add(self, term, value):
+        term_id = self._ids.get(term)
+        if term_id is None:
+            term_id = self._ids[term] = len(self.terms)
+            grams = trigrams(term)
+            self.terms.append(term)
+            self.values.append([])
+            self._grams.append(len(grams))
+            for gram in grams:
+                self._postings.setdefault(gram, []).append(term_id)
+                self._by_length.setdefault((len(term), gram), []).append(term_id)
+        if value not in self.values[term_id]:
+            self.values[term_id].append(value)
+
+    def _shared(self, grams):
+        """{id do termo: trigramas em comum} dos termos com algum trigrama do texto."""
+        counts = Counter()
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings:
+                counts.update(postings)
+        return counts
+
+    def lookup(self, word):
+        """
+        Procura o termo mais próximo da palavra (até max_typos erros).
+
+        Returns:
+            tuple: (distância, valores) do termo mais próximo, ou None
+        """
+        term_id = self._ids.get(word)
+        if term_id is not None:
+            return 0, self.values[term_id]
+        limit = max_typos(len(word))
+        if not limit:
+            return None
+
+        grams = trigrams(word)
+        # Só os termos com até limit letras a mais ou a menos viram candidatos
+        counts = Counter()
+        for length in range(len(word) - limit, len(word) + limit + 1):
+            for gram in grams:
+                postings = self._by_length.get((length, gram))
+                if postings:
+                    counts.update(postings)
+        needed = len(grams) - 4 * limit
+        # Mais trigramas em comum primeiro (no empate, o termo mais antigo): o
+        # primeiro termo achado com uma distância ganha dos seguintes com a
+        # mesma distância, e a busca para quando nenhum pode ficar mais perto
+        candidates = sorted((-shared, term_id) for term_id, shared in counts.items()
+                            if shared >= needed)
+        best = None
+        allowed_max = limit
+        for shared, term_id in candidates:
+            shared = -shared
+            if shared < len(grams) - 4 * allowed_max:
+                break
+            term = self.terms[term_id]
+            allowed = min(allowed_max, max_typos(len(term)))
+            if abs(len(term) - len(word)) > allowed \
+                    or shared < max(len(grams), self._grams[term_id]) - 4 * allowed:
+                continue
+            distance = edit_distance(word, term, allowed)
+            if distance > allowed:
+                continue
+            best = (distance, term_id)
+            # Daqui em diante só interessa quem chega mais perto
+            allowed_max = distance - 1
+            if allowed_max < 1:
+                break
+        if best is None:
+            return None
+        return best[0], self.values[best[1]]
+
+    def search(self, text, min_similarity=MIN_PHRASE_SIMILARITY):
+        """
+        Procura o termo que contém a maior fração dos trigramas do texto.
+
+        Returns:
+            tuple: (similaridade, valores) do termo mais parecido, ou None
+        """
+        grams = trigrams(text)
+        best = None
+        for term_id, shared in self._shared(grams).items():
+            similarity = shared / len(grams)
+            if similarity >= min_similarity and (best is None or similarity > best[0]):
+                best = (similarity, term_id)
+        if best is None:
+            return None
+        return best[0], self.values[best[1]]
+
+
+class EntityIndex:
+    """
+    Nomes das entidades de cada tipo, com busca tolerante a erros.
+
+    Args:
+        entities (dict): {tipo: {nome normalizado: nome original}} (ex.: jogadores)
+        phrases (dict): {tipo: {texto normalizado: texto original}} (ex.: títulos das notícias)
+    """
+
+    def __init__(self, entities=None, phrases=None):
+        self.words = FuzzyIndex()
+        self.phrases = FuzzyIndex()
+        for kind, names in (entities or {}).items():
+            for key, name in names.items():
+                self.words.add(key, (kind, name))
+                parts = WORD_RE.findall(key)
+                if len(parts) > 1:
+                    for part in parts:
+                        if len(part) >= MIN_FUZZY_LENGTH and not part.isdigit() \
+                                and part not in GENERIC_WORDS:
+                            self.words.add(part, (kind, name))
+        for kind, texts in (phrases or {}).items():
+            for key, text in texts.items():
+                self.phrases.add(key, (kind, text))
+
+    def find_word(self, word):
+        """
+        Entidades com o nome (ou uma palavra do nome) parecido com a palavra.
+
+        Returns:
+            list: Pares (tipo, nome original); vazia se nada for parecido
+        """
+        found = self.words.lookup(word)
+        return found[1] if found else []
+
+    def find_phrase(self, text):
+        """
+        Entidades cujo texto longo contém a maior parte da mensagem.
+
+        Returns:
+            list: Pares (tipo, texto original); vazia se nada for parecido
+        """
+        if len(text) < MIN_PHRASE_LENGTH or not len(self.phrases):
+            return []
+        found = self.phrases.search(text)
+        return found[1] if found else []
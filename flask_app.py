@@ -1,15 +1,13 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, Response, g, request, jsonify, render_template
 from flask_cors import CORS
+import atexit
+import gc
 import json
-from datetime import datetime, timedelta
-import requests
-from bs4 import BeautifulSoup
+from datetime import datetime
 import os
+import time
 from dotenv import load_dotenv
 
-# Dicionário para controlar o estado do usuário durante a conversa
-estado_usuario = {}
-
 # Carrega variáveis de ambiente do arquivo .env
 load_dotenv()
 
@@ -18,75 +16,183 @@ app = Flask(__name__,
             template_folder='templates')
 CORS(app)  # Habilita CORS para todas as rotas
 
+from assets import IMMUTABLE_CACHE_CONTROL, asset_url, load_manifest
+from chat_log import ChatLog
+from draft5 import DRAFT5_PATHS, REFRESH_INTERVAL, Draft5Client, Draft5Refresher, build_urls, team_paths
+from http_cache import HTML_CACHE_CONTROL, PayloadCache, conditional_response, encode_html
+from intents import FALLBACK_INTENT, IntentMatcher, normalize
+from match_store import DISPLAY_DATE_RE, MatchStore
+from metrics import CACHE_REQUESTS, CONTENT_TYPE, INTENT_LATENCY, ROUTE_LATENCY, TEAM_REFRESHES, registry
+from news_broker import NewsBroker
+from news_index import NewsIndex
+from player_stats import PlayerStatsStore
+from render_cache import RenderCache
+from sessions import SessionState, SessionStore, is_valid_session_id, new_session_id
+from shared_refresh import SharedRefresher
+from snapshot import SNAPSHOT_PATH, LazyCache, load_snapshot, save_snapshot
+from teams import (FOLLOWED_TEAMS, HOME_TEAM, LIVE_REFRESH_INTERVAL, PRIORITY_FACTORS,
+                   RefreshScheduler, TeamPartitions, find_team, team_games)
+
+# O template resolve as imagens pelo manifest do build de assets
+app.add_template_global(asset_url)
+
 # Cache para armazenar as notícias
-news_cache = {
+news_cache = LazyCache({
     'last_update': None,
     'news': []
-}
+})
+
+# Cache para os demais dados do Draft5 (preenchido pelo atualizador ou pelo snapshot)
+draft5_cache = LazyCache({
+    'last_update': None,
+    'version': 0,
+    'matches': [],
+    'results': [],
+    'tournaments': [],
+    'line-up': [],
+    'stale': []  # Páginas com os últimos dados bons porque o Draft5 falhou
+})
+
+# Contadores de acerto do cache de notícias (o resto das vezes vai para os dados padrão)
+news_cache_hit = CACHE_REQUESTS.labels('news', 'hit')
+news_cache_miss = CACHE_REQUESTS.labels('news', 'miss')
 
-def fetch_draft5_data():
+def publish_draft5_data(data, changed=True, stale=()):
     """
-    Busca dados do site Draft5.
+    Publica nos caches os dados processados pelo atualizador do Draft5.
     
-    Esta função faz web scraping do site Draft5 para obter informações sobre:
-    - Notícias da FURIA
-    - Próximas partidas
-    - Resultados
-    - Campeonatos
-    - Line-up da equipe
+    Args:
+        data (dict): Dados processados por página
+        changed (bool): Indica se alguma página mudou desde a última atualização
+        stale (iterable): Páginas que não puderam ser baixadas (os dados são os
+            últimos bons)
+    """
+    now = datetime.now()
+    if data.get('news'):
+        news_cache['news'] = data['news']
+    news_cache['last_update'] = now
+
+    for name in ('matches', 'results', 'tournaments', 'line-up'):
+        if name in data:
+            draft5_cache[name] = data[name]
+    draft5_cache['stale'] = sorted(stale)
+    if changed:
+        draft5_cache['version'] += 1
+        if SNAPSHOT_PATH:
+            try:
+                save_snapshot(SNAPSHOT_PATH, data, draft5_cache['version'],
+                              now.isoformat(), stale)
+            except OSError as e:
+                print(f"Erro ao gravar o snapshot: {str(e)}")
+    draft5_cache['last_update'] = now
+    if data.get('news'):
+        # Avisa as abas inscritas em /api/news/stream (só se algo mudou), com a
+        # versão do snapshot, a mesma nos outros workers
+        news_broker.publish(data['news'], draft5_cache['version'])
+    if changed and data.get('results'):
+        # Resultados novos do Draft5 entram no repositório de partidas (os já
+        # gravados mantêm placares, estatísticas e link)
+        try:
+            match_store.upsert_matches(fetch_furia_results())
+        except Exception as e:
+            print(f"Erro ao gravar os resultados no repositório de partidas: {str(e)}")
+    if changed:
+        # Remonta o índice de entidades (adversários, torneios, notícias) já aqui
+        get_intent_matcher()
+        get_news_index()
+
+def warm_start(path=SNAPSHOT_PATH):
+    """
+    Preenche os caches com o último snapshot gravado, sem esperar o Draft5.
     
-    Returns:
-        dict: Dicionário contendo os dados encontrados ou None em caso de erro
-    """
-    urls = {
-        'news': "https://draft5.gg/equipe/330-FURIA/noticias",
-        'matches': "https://draft5.gg/proximas-partidas",
-        'results': "https://draft5.gg/resultados",
-        'tournaments': "https://draft5.gg/campeonatos",
-        'line-up': "https://draft5.gg/equipe/330-FURIA"
-    }
+    Só o cabeçalho do snapshot é lido aqui; os dados de cada página são lidos
+    na primeira vez que forem consultados (ver snapshot.LazyCache). O
+    atualizador em segundo plano continua revalidando tudo com o Draft5.
     
-    try:
-        url = "https://draft5.gg/equipe/330-FURIA"
-        response = requests.get(url)
+    Args:
+        path (str): Arquivo do snapshot
         
-        if response.status_code == 200:
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Busca informações do último jogo
-            match = soup.find('div', class_='match-result')
-            if match:
-                return {
-                    "team": match.find('div', class_='team').text,
-                    "score": match.find('div', class_='score').text,
-                    "opponent": match.find('div', class_='opponent').text,
-                    "date": match.find('div', class_='date').text
-                }
-            else:
-                return {"error": "Resultado não encontrado"}
-        else:
-            return {"error": "Erro ao acessar a página"}
-    except Exception as e:
-        print(f"Erro ao buscar dados: {str(e)}")
-        return None
+    Returns:
+        Snapshot: Snapshot carregado, ou None se não havia um
+    """
+    snapshot = load_snapshot(path)
+    if snapshot is not None:
+        apply_snapshot(snapshot)
+    return snapshot
+
+def apply_snapshot(snapshot):
+    """
+    Passa a servir os dados do snapshot (lidos sob demanda, ver snapshot.LazyCache).
+    
+    Args:
+        snapshot (Snapshot): Snapshot aberto
+    """
+    news_cache.attach(snapshot, {'news': 'news'})
+    draft5_cache.attach(snapshot, {name: name for name in
+                                   ('matches', 'results', 'tournaments', 'line-up')})
+    last_update = datetime.fromisoformat(snapshot.last_update) if snapshot.last_update else None
+    news_cache['last_update'] = draft5_cache['last_update'] = last_update
+    draft5_cache['version'] = snapshot.version
+    draft5_cache['stale'] = list(snapshot.stale)
+
+def adopt_snapshot(snapshot):
+    """
+    Publica nos caches o snapshot gravado pelo worker líder (ver shared_refresh).
+    
+    Os caches de respostas são indexados pela versão dos dados, então a troca
+    da versão basta para que todos passem a usar os dados novos.
+    
+    Args:
+        snapshot (Snapshot): Snapshot aberto
+    """
+    if snapshot.version == draft5_cache['version']:
+        return
+    apply_snapshot(snapshot)
+    news_broker.publish(news_cache['news'], snapshot.version)
+    get_intent_matcher()
+    get_news_index()
+
+# Últimos dados gravados, servidos até a primeira atualização do Draft5
+draft5_snapshot = warm_start()
+
+def start_background_refresh():
+    """
+    Inicia o atualizador em segundo plano dos dados do Draft5.
+    
+    No modo compartilhado (create_app com vários workers), só o worker líder
+    busca o Draft5; os demais acompanham o snapshot gravado por ele. Os times
+    acompanhados (DRAFT5_TEAMS) seguem a agenda do team_scheduler.
+    """
+    refresher_state['pid'] = os.getpid()
+    if refresher_state['shared'] and shared_refresher is not None:
+        shared_refresher.start()
+    else:
+        draft5_refresher.start()
+    team_scheduler.start()
+
+# Processo em que o atualizador foi iniciado (threads não sobrevivem ao fork)
+refresher_state = {
+    'enabled': False,
+    'shared': False,
+    'pid': None
+}
 
 def fetch_furia_news():
     """
     Busca ou retorna do cache as notícias da FURIA.
     
-    Esta função implementa um sistema de cache para evitar requisições desnecessárias.
-    O cache é atualizado a cada 5 minutos.
+    O cache é preenchido pelo atualizador em segundo plano a cada 5 minutos,
+    então esta função nunca espera pelo Draft5. Enquanto nenhuma atualização
+    tiver dado certo, retorna as notícias padrão abaixo.
     
     Returns:
         list: Lista de notícias da FURIA
     """
-    global news_cache
-    
-    # Verifica se o cache está atualizado (menos de 5 minutos)
-    if (news_cache['last_update'] and 
-        datetime.now() - news_cache['last_update'] < timedelta(minutes=5)):
+    if news_cache['last_update'] and news_cache['news']:
+        news_cache_hit.inc()
         return news_cache['news']
     
+    news_cache_miss.inc()
     # Dados mockados para teste (substituir por dados reais posteriormente)
     return [
         {
@@ -106,16 +212,76 @@ def fetch_furia_news():
         }
     ]
 
+# Canal de atualizações das notícias (/api/news/stream)
+news_broker = NewsBroker(fetch_furia_news(), version=draft5_cache['version'])
+
+# Índice de busca das notícias (/api/news/search e "notícias sobre ..." no chat)
+news_index = NewsIndex()
+
+# Versão dos dados que o índice de notícias já recebeu
+news_index_state = {
+    'version': None
+}
+
+def get_news_index():
+    """
+    Retorna o índice de busca das notícias, com as notícias da versão atual dos dados.
+    
+    Só as notícias novas são indexadas (ver news_index.NewsIndex.update); as
+    que saíram da página do Draft5 continuam buscáveis até saírem pela idade.
+    O atualizador do Draft5 já o atualiza depois de cada atualização.
+    
+    Returns:
+        NewsIndex: Índice das notícias
+    """
+    version = data_version()
+    if news_index_state['version'] != version:
+        news_index.update(fetch_furia_news())
+        news_index_state['version'] = version
+    return news_index
+
+def home_games(page):
+    """Partidas ('matches') ou resultados ('results') da FURIA nas páginas gerais do Draft5."""
+    return team_games(draft5_cache.get(page, []), HOME_TEAM.name)
+
+def fetch_furia_tournaments():
+    """
+    Retorna do cache os campeonatos da página de campeonatos do Draft5.
+    
+    Enquanto nenhuma atualização tiver dado certo, retorna o próximo
+    campeonato conhecido da FURIA.
+    
+    Returns:
+        list: Lista de campeonatos ({name, date, link})
+    """
+    if draft5_cache['tournaments']:
+        return draft5_cache['tournaments']
+
+    return [
+        {
+            "name": "PGL Astana 2025",
+            "date": "10/05/2025 - 18/05/2025",
+            "link": "https://draft5.gg/campeonatos"
+        }
+    ]
+
 def fetch_furia_lineup():
     """
     Retorna o line-up atual da FURIA.
     
-    Esta função retorna informações detalhadas sobre cada jogador da equipe,
-    incluindo estatísticas e informações pessoais.
+    Vem da página da equipe no Draft5 (jogadores e coach, com nome, função e
+    país). Enquanto nenhuma atualização tiver dado certo, retorna o line-up
+    padrão abaixo, que também traz idade e estatísticas.
     
     Returns:
-        dict: Dicionário contendo informações do line-up atual da FURIA
+        dict: {'players': [jogadores], 'coach': coach ou None}
     """
+    lineup = draft5_cache['line-up']
+    if lineup:
+        players = [player for player in lineup if normalize(player['role']) != 'coach']
+        coaches = [player for player in lineup if normalize(player['role']) == 'coach']
+        return {'players': players, 'coach': coaches[0] if coaches else None}
+
     return {
         "players": [
             {
@@ -201,12 +367,27 @@ def fetch_furia_results():
     """
     Retorna os últimos resultados da FURIA.
     
-    Esta função retorna um histórico detalhado dos últimos jogos da equipe,
-    incluindo placares, estatísticas e informações do torneio.
+    Vêm da página de resultados do Draft5, no formato do repositório de
+    partidas (sem placares por mapa nem estatísticas, que só o backfill traz).
+    Enquanto nenhuma atualização tiver dado certo, retorna o histórico padrão
+    abaixo, com placares e estatísticas.
     
     Returns:
-        list: Lista de dicionários contendo informações dos últimos jogos
+        list: Lista de partidas ({data, adversario, resultado, torneio, ...})
     """
+    results = [
+        {
+            "data": result['date'],
+            "adversario": result['opponent'],
+            "resultado": result['score'],
+            "torneio": result['tournament'],
+            "link": result['link']
+        }
+        for result in home_games('results') if DISPLAY_DATE_RE.fullmatch(result['date'])
+    ]
+    if results:
+        return results
+
     return [
         {
             "data": "08/04/2025",
@@ -301,329 +482,1596 @@ def fetch_furia_results():
         }
     ]
 
-# Dicionário para controlar o contexto da conversa com o usuário
-user_context = {
-    "esperando_estatisticas": False,  # Indica se está aguardando confirmação para mostrar estatísticas
-    "esperando_data_estatisticas": False  # Indica se está aguardando a data para mostrar estatísticas
+# Estado da conversa de cada sessão (expira após 30 minutos sem uso)
+session_store = SessionStore(
+    ttl=int(os.getenv('SESSION_TTL', '1800')),
+    max_size=int(os.getenv('SESSION_MAX', '200000'))
+)
+
+# Repositório indexado de partidas (SQLite), alimentado com os resultados conhecidos
+# (e com o histórico baixado por backfill.py, que pode rodar com a aplicação no ar)
+match_store = MatchStore()
+match_store.upsert_matches(fetch_furia_results())
+
+# Jogos listados no histórico do chat
+HISTORY_LIMIT = 5
+
+# Estatísticas numéricas em colunas, remontadas quando o repositório de partidas muda
+player_stats_cache = {
+    'version': None,
+    'store': None
 }
 
-def process_chat_message(message):
+def get_player_stats():
     """
-    Processa a mensagem do chat e retorna uma resposta apropriada.
+    Retorna o PlayerStatsStore montado a partir de todas as partidas do repositório.
     
-    Esta função é o coração do chatbot, analisando a mensagem do usuário
-    e retornando respostas relevantes sobre a FURIA.
+    O texto das estatísticas ("31/28", "70.55%") é convertido uma única vez por
+    versão do repositório de partidas.
     
-    Args:
-        message (str): Mensagem do usuário
-        
     Returns:
-        str: Resposta formatada em HTML
+        PlayerStatsStore: Estatísticas em formato colunar
     """
-    message = message.lower()
-    global user_context
-    
-    # Se estiver esperando data de estatísticas
-    if user_context["esperando_data_estatisticas"]:
-        user_context["esperando_data_estatisticas"] = False
-        results = fetch_furia_results()
-
-        data_mencoes = ["08/04/2025", "07/04/2025", "06/04/2025", "05/04/2025"]
-        data_encontrada = None
-
-        for data in data_mencoes:
-            if data in message:
-                data_encontrada = data
-                break
-
-        if data_encontrada:
-            for result in results:
-                if result["data"] == data_encontrada:
-                    response = f"📅Estatísticas do jogo contra {result['adversario']} em {result['data']}📅:\n\n"
-                    response += "🐯FURIA🐯:\n"
-                    for jogador, stats in result['estatisticas']['FURIA'].items():
-                        response += f"\n{jogador}:\n"
-                        for stat, valor in stats.items():
-                            response += f"- {stat}: {valor}\n"
-
-                    if result['adversario'] in result['estatisticas']:
-                        response += f"\n{result['adversario']}:\n"
-                        for jogador, stats in result['estatisticas'][result['adversario']].items():
-                            response += f"\n{jogador}:\n"
-                            for stat, valor in stats.items():
-                                response += f"- {stat}: {valor}\n"
-
-                    response += "\nPrecisa de mais alguma informação, torcedor? Posso te ajudar com:\n"
-                    response += "- Últimos resultados\n"
-                    response += "- Próximos jogos\n"
-                    response += "- Notícias recentes\n"
-                    response += "- Campeonatos\n"
-                    response += "- Line-up FURIA\n"
-                    response_html = response.replace("\n", "<br>")
-                    return response_html
-        return "Desculpe, não consegui encontrar as estatísticas para a data informada. As datas disponíveis são: 08/04/2025, 07/04/2025, 06/04/2025, 05/04/2025"
-    
-    # Caso encontre as seguintes palavras na mensagem do usuario, o chatbot vai aguardar uma data para mostrar as estatisticas.
-    elif "específicas" in message or "stats" in message or "estatisticas" in message:
-        user_context["esperando_data_estatisticas"] = True
-        response = "Por favor, especifique a data do jogo que deseja ver as estatísticas.\n"
-        response += "Datas disponíveis:\n"
-        response += "- 📅08/04/2025\n"
-        response += "- 📅07/04/2025\n"
-        response += "- 📅06/04/2025\n"
-        response += "- 📅05/04/2025"
-        response_html = response.replace("\n", "<br>")
-        return response_html
-    
-    # Caso encontre as seguintes palavras na mensagem do usuario, o chatbot vai responder uma mensagem de despedida.
-    elif "tchau" in message or "até logo" in message or "adeus" in message or "muito obrigado" in message or "obrigado" in message or "flw" in message:
+    if player_stats_cache['version'] != match_store.version:
+        player_stats_cache['store'] = PlayerStatsStore(match_store.latest(limit=-1))
+        player_stats_cache['version'] = match_store.version
+    return player_stats_cache['store']
 
-        return "Valeu, torcedor! Vamo que vamo com a FURIA! 🐯🔥 #VamoFURIA"
-    
-    # Caso encontre as seguintes palavras na mensagem do usuario, o chatbot vai mostrar as noticias mais recentes.
-    elif "notícia" in message or "novidade" in message or "noticia" in message or "noticias" in message or "novidades" in message:
-        news = fetch_furia_news()
-        if news:
-            latest_news = news[0]
-            response = f"📅A última notícia é: {latest_news['title']} ({latest_news['date']})📅\n\n"
-            response += "Precisa de mais alguma informação, torcedor?🐯🔥\nPosso te ajudar com:\n"
-            response += "- Últimos resultados\n"
-            response += "- Próximos jogos\n"
-            response += "- Estatísticas específicas de algum jogo\n"
-            response += "- Campeonatos\n"
-            response += "- Line-up FURIA\n"
+def data_version():
+    """Retorna a versão atual dos dados (muda a cada atualização do Draft5 ou das partidas)."""
+    return (draft5_cache['version'], match_store.version)
 
-            # Aqui é onde você converte para HTML com <br>
-            response_html = response.replace("\n", "<br>")
-            return response_html
-            return response
-        return "Desculpe, não consegui encontrar notícias recentes."
-    
-    # Caso encontre as seguintes palavras na mensagem do usuario, o chatbot vai mostrar o último jogo da FURIA.
-    elif "resultado do" in message or "último jogo" in message or "ultimo jogo" in message or "ultimo resultado da" in message or "ultima partida" in message or "última" in message or "última partida" in message or "ultima" in message:
-        
-        results = fetch_furia_results()
-        if results:
-            latest_result = results[0]
-            response = "🎮 ÚLTIMO JOGO DA FURIA 🎮\n"
-            response += "=" * 40 + "\n\n"
-            response += f"🏆 Torneio: {latest_result['torneio']}\n"
-            response += f"📅 Data: {latest_result['data']}\n"
-            response += f"⚔️ Adversário: {latest_result['adversario']}\n"
-            response += f"📊 Resultado Final: {latest_result['resultado']}\n\n"
-            response += "🗺️ PLACARES POR MAPA:\n"
-            response += "-" * 20 + "\n"
+# Respostas já renderizadas, refeitas só quando a versão dos dados muda
+render_cache = RenderCache(data_version)
 
-            for mapa, placar in latest_result['placares'].items():
-                response += f"• {mapa}: {placar}\n"
-            response += "\n" + "=" * 40 + "\n\n"
-            response += "❓ Deseja ver as estatísticas detalhadas deste jogo?\n"
-            
-              #  Ativa o contexto de estatísticas
-            user_context["esperando_estatisticas"] = True
+def stream_or(sections, default):
+    """
+    Repassa as seções de uma resposta; se não houver nenhuma, entrega default().
+    
+    Args:
+        sections (iterator): Seções geradas por uma função render_*_sections
+        default (callable): Função que retorna a resposta alternativa
+    """
+    first = next(sections, None)
+    if first is None:
+        yield default()
+        return
+    yield first
+    yield from sections
 
-            return response.replace("\n", "<br>")
+def render_player_block(jogador, stats, marcador):
+    """Renderiza o bloco de estatísticas de um jogador (uma seção da resposta)."""
+    response = f"\n{jogador}:\n"
+    for stat, valor in stats.items():
+        response += f"{marcador}{stat}: {valor}\n"
+    return response.replace("\n", "<br>")
 
-            # Se o usuário respondeu "sim" e está esperando as estatísticas
-    if user_context["esperando_estatisticas"] and ("sim" in message or "estatísticas" in message):
-            # Desativa o estado para evitar repetir
-        user_context["esperando_estatisticas"] = False
+@render_cache.cached_sections
+def render_stats_by_date_sections(data_encontrada):
+    """Renderiza, em seções, as estatísticas do jogo da data (aaaa-mm-dd) informada (nenhuma seção se não houver jogo)."""
+    for result in match_store.get_by_date(data_encontrada):
+        if result.get('estatisticas', {}).get(HOME_TEAM.name):
+            response = f"📅Estatísticas do jogo contra {result['adversario']} em {result['data']}📅:\n\n"
+            response += "🐯FURIA🐯:\n"
+            yield response.replace("\n", "<br>")
+            for jogador, stats in result['estatisticas'][HOME_TEAM.name].items():
+                yield render_player_block(jogador, stats, "- ")
 
-        results = fetch_furia_results()
-        if results:
-            latest_result = results[0]
-            response = "📊 ESTATÍSTICAS DO ÚLTIMO JOGO 📊\n"
-            response += "=" * 40 + "\n\n"
-            response += f"⚔️ FURIA vs {latest_result['adversario']}\n"
-            response += f"📅 {latest_result['data']}\n\n"
+            if result['adversario'] in result['estatisticas']:
+                yield f"<br>{result['adversario']}:<br>"
+                for jogador, stats in result['estatisticas'][result['adversario']].items():
+                    yield render_player_block(jogador, stats, "- ")
 
-            response += " FURIA :\n"
-            response += "-" * 20 + "\n"
-            for jogador, stats in latest_result['estatisticas']['FURIA'].items():
-                response += f"\n{jogador}:\n"
-                for stat, valor in stats.items():
-                    response += f"• {stat}: {valor}\n"
-
-            if latest_result['adversario'] in latest_result['estatisticas']:
-                response += f"\n⚔️ {latest_result['adversario']}:\n"
-                response += "-" * 20 + "\n"
-                for jogador, stats in latest_result['estatisticas'][latest_result['adversario']].items():
-                    response += f"\n{jogador}:\n"
-                    for stat, valor in stats.items():
-                        response += f"• {stat}: {valor}\n"
-
-            response += "\n" + "=" * 40 + "\n\n"
-            response += "💡 Posso te ajudar com:\n"
+            response = "\nPrecisa de mais alguma informação, torcedor? Posso te ajudar com:\n"
             response += "- Últimos resultados\n"
             response += "- Próximos jogos\n"
             response += "- Notícias recentes\n"
-            response += "- Estatísticas específicas de algum jogo\n"
             response += "- Campeonatos\n"
             response += "- Line-up FURIA\n"
+            yield response.replace("\n", "<br>")
+            return
+
+def stream_stats_by_date(state, entities):
+    """Responde, em seções, com as estatísticas do jogo da data informada pelo usuário."""
+    state.esperando_data_estatisticas = False
+    data_encontrada = match_store.resolve_date(entities.get('date'))
+    sections = render_stats_by_date_sections(data_encontrada) if data_encontrada else iter(())
+    yield from stream_or(sections, render_stats_not_found)
+
+def reply_stats_by_date(state, entities):
+    """Responde com as estatísticas do jogo da data informada pelo usuário."""
+    return "".join(stream_stats_by_date(state, entities))
+
+@render_cache.cached
+def render_stats_not_found():
+    """Renderiza a resposta para data sem estatísticas, listando as datas disponíveis."""
+    datas = ", ".join(match_store.available_dates(limit=10))
+    return f"Desculpe, não consegui encontrar as estatísticas para a data informada. As datas disponíveis são: {datas}"
+
+def stream_ask_stats_date(state, entities):
+    """Pede a data do jogo e aguarda a resposta para mostrar as estatísticas."""
+    # Se a data já veio na mensagem, responde direto
+    if entities.get('date'):
+        yield from stream_stats_by_date(state, entities)
+        return
+
+    state.esperando_data_estatisticas = True
+    yield render_ask_stats_date()
+
+def reply_ask_stats_date(state, entities):
+    """Pede a data do jogo e aguarda a resposta para mostrar as estatísticas."""
+    return "".join(stream_ask_stats_date(state, entities))
+
+@render_cache.cached
+def render_ask_stats_date():
+    """Renderiza o pedido da data do jogo."""
+    response = "Por favor, especifique a data do jogo que deseja ver as estatísticas.\n"
+    response += "Datas disponíveis:"
+    for data in match_store.available_dates(limit=10):
+        response += f"\n- 📅{data}"
+    response_html = response.replace("\n", "<br>")
+    return response_html
+
+def reply_goodbye(state, entities):
+    """Responde com uma mensagem de despedida."""
+    return "Valeu, torcedor! Vamo que vamo com a FURIA! 🐯🔥 #VamoFURIA"
+
+def reply_news(state, entities):
+    """Responde com a notícia citada na mensagem ou, sem ela, com a mais recente da FURIA."""
+    titles = entities.get('news')
+    if titles:
+        return render_news_item(titles[0])
+    return render_news()
+
+@render_cache.cached
+def render_news_item(titulo):
+    """Renderiza a notícia com o título informado."""
+    for item in fetch_furia_news():
+        if item['title'] == titulo:
+            response = f"📰 {item['title']} ({item['date']})\n"
+            response += f"🔗 {item['link']}\n"
             return response.replace("\n", "<br>")
+    return render_news()
 
-    # Caso nada tenha sido entendido
-        return "Desculpe, não entendi sua mensagem. Quer tentar de outro jeito? 🤔"
+def reply_news_search(state, entities):
+    """Responde com as notícias sobre o assunto da mensagem ou, sem ele, com a mais recente."""
+    topic = entities.get('topic')
+    if topic:
+        return render_news_search(topic)
+    return render_news()
 
-    # Usuário respondeu "não" ao convite de ver estatísticas
-    if user_context["esperando_estatisticas"] and ("não" in message or "nao" in message):
-        # Desativa o contexto
-        user_context["esperando_estatisticas"] = False
+# Notícias listadas na resposta de uma busca no chat
+NEWS_SEARCH_CHAT_LIMIT = 3
 
-        response = "💡 Tranquilo! Se precisar de mais alguma coisa, é só me chamar! 🐯🔥\n"
-        response += "  Posso te ajudar com:\n"
+# Buscas no chat guardadas no render_cache: o assunto é texto livre, então elas
+# ficam num espaço separado para não tirar do cache as outras respostas
+NEWS_SEARCH_CACHE_SIZE = int(os.getenv('NEWS_SEARCH_CACHE_SIZE', '128'))
+
+@render_cache.cached(max_size=NEWS_SEARCH_CACHE_SIZE)
+def render_news_search(assunto):
+    """Renderiza as notícias mais relevantes sobre o assunto."""
+    found = get_news_index().search(assunto, NEWS_SEARCH_CHAT_LIMIT)
+    if not found:
+        return f"Não encontrei notícias sobre {assunto}. 🤔<br>" + render_news()
+    response = f"📰 NOTÍCIAS SOBRE {assunto.upper()} 📰\n\n"
+    for _, item in found:
+        response += f"• {item['title']} ({item['date']})\n🔗 {item['link']}\n"
+    return response.replace("\n", "<br>")
+
+@render_cache.cached
+def render_news():
+    """Renderiza a notícia mais recente da FURIA."""
+    news = fetch_furia_news()
+    if news:
+        latest_news = news[0]
+        response = f"📅A última notícia é: {latest_news['title']} ({latest_news['date']})📅\n\n"
+        response += "Precisa de mais alguma informação, torcedor?🐯🔥\nPosso te ajudar com:\n"
         response += "- Últimos resultados\n"
         response += "- Próximos jogos\n"
-        response += "- Notícias recentes\n"
         response += "- Estatísticas específicas de algum jogo\n"
         response += "- Campeonatos\n"
         response += "- Line-up FURIA\n"
 
-        return response.replace("\n", "<br>")
-    
-    elif "últimos jogos" in message or "histórico" in message or "ultimos" in message or "historico" in message or "resultados" in message:
-        results = fetch_furia_results()
-        if results:
-            response = "Últimos jogos da FURIA:\n\n"
-            for result in results:
-                response += f"📅Data: {result['data']}📅\n"
-                response += f"⚔️Adversário: {result['adversario']}⚔️\n"
-                response += f"🏆Torneio: {result['torneio']}🏆\n"
-                response += f"🎮Resultado: {result['resultado']}🎮\n"
-                response += "🗺️Placares por mapa:\n"
-                for mapa, placar in result['placares'].items():
-                    response += f"- {mapa}: {placar}\n"
-                response += "\n"
-            response += "Precisa de mais alguma informação, torcedor?🐯🔥\n Posso te ajudar com:\n"
-            response += "- Próximos jogos\n"
-            response += "- Notícias recentes\n"
-            response += "- Estatísticas específicas de algum jogo\n"
-            response += "- Campeonatos\n"
-            response += "- Line-up FURIA\n\n"
+        # Aqui é onde você converte para HTML com <br>
+        response_html = response.replace("\n", "<br>")
+        return response_html
+    return "Desculpe, não consegui encontrar notícias recentes."
 
-            # Aqui é onde você converte para HTML com <br>
-            response_html = response.replace("\n", "<br>")
-            return response_html
-            return response
-        return "Desculpe, não consegui encontrar o histórico de jogos."
-    
-    
-        
-        
-    
-    # Caso encontre as seguintes palavras na mensagem do usuario, o chatbot vai mostrar o próximo jogo da FURIA.
-    elif "próximo jogo" in message or "próxima partida" in message or "proximo jogo" in message or "proxima partida" in message or "próximos jogos" in message or "proximos jogos" in message:
+def stream_last_game(state, entities):
+    """Responde, em seções, com o último jogo da FURIA e oferece as estatísticas detalhadas."""
+    sections = render_last_game_sections()
+    first = next(sections, None)
+    if first is None:
+        yield reply_fallback(state, entities)
+        return
 
-        response = "O próximo compromisso da FURIA é a PGL Astana 2025, que será realizada entre os dias 10 e 18 de maio, no Cazaquistão.\n\n"
-        response += "Precisa de mais alguma informação, torcedor?🐯🔥\nPosso te ajudar com:\n"
-        response += "- Últimos resultados\n"
+    # Ativa o contexto de estatísticas
+    state.esperando_estatisticas = True
+    yield first
+    yield from sections
+
+def reply_last_game(state, entities):
+    """Responde com o último jogo da FURIA e oferece as estatísticas detalhadas."""
+    return "".join(stream_last_game(state, entities))
+
+@render_cache.cached_sections
+def render_last_game_sections():
+    """Renderiza, em seções, o último jogo da FURIA (nenhuma seção se não houver resultados)."""
+    results = match_store.latest(limit=1)
+    if results:
+        latest_result = results[0]
+        response = "🎮 ÚLTIMO JOGO DA FURIA 🎮\n"
+        response += "=" * 40 + "\n\n"
+        response += f"🏆 Torneio: {latest_result['torneio']}\n"
+        response += f"📅 Data: {latest_result['data']}\n"
+        response += f"⚔️ Adversário: {latest_result['adversario']}\n"
+        response += f"📊 Resultado Final: {latest_result['resultado']}\n\n"
+        if latest_result.get('placares'):
+            response += "🗺️ PLACARES POR MAPA:\n"
+            response += "-" * 20 + "\n"
+        yield response.replace("\n", "<br>")
+
+        for mapa, placar in latest_result.get('placares', {}).items():
+            yield f"• {mapa}: {placar}<br>"
+
+        response = "\n" + "=" * 40 + "\n\n"
+        response += "❓ Deseja ver as estatísticas detalhadas deste jogo?\n"
+        yield response.replace("\n", "<br>")
+
+def stream_confirm_stats(state, entities):
+    """Usuário respondeu "sim": mostra, em seções, as estatísticas do último jogo."""
+    # Desativa o estado para evitar repetir
+    state.esperando_estatisticas = False
+
+    # Caso não haja resultados, pede para tentar de outro jeito
+    yield from stream_or(
+        render_last_game_stats_sections(),
+        lambda: "Desculpe, não entendi sua mensagem. Quer tentar de outro jeito? 🤔"
+    )
+
+def reply_confirm_stats(state, entities):
+    """Usuário respondeu "sim": mostra as estatísticas do último jogo."""
+    return "".join(stream_confirm_stats(state, entities))
+
+@render_cache.cached_sections
+def render_last_game_stats_sections():
+    """Renderiza, em seções, as estatísticas do último jogo (nenhuma seção se não houver estatísticas)."""
+    results = match_store.latest(limit=1)
+    if results and results[0].get('estatisticas', {}).get(HOME_TEAM.name):
+        latest_result = results[0]
+        response = "📊 ESTATÍSTICAS DO ÚLTIMO JOGO 📊\n"
+        response += "=" * 40 + "\n\n"
+        response += f"⚔️ FURIA vs {latest_result['adversario']}\n"
+        response += f"📅 {latest_result['data']}\n\n"
+
+        response += " FURIA :\n"
+        response += "-" * 20 + "\n"
+        yield response.replace("\n", "<br>")
+        for jogador, stats in latest_result['estatisticas'][HOME_TEAM.name].items():
+            yield render_player_block(jogador, stats, "• ")
+
+        if latest_result['adversario'] in latest_result['estatisticas']:
+            response = f"\n⚔️ {latest_result['adversario']}:\n"
+            response += "-" * 20 + "\n"
+            yield response.replace("\n", "<br>")
+            for jogador, stats in latest_result['estatisticas'][latest_result['adversario']].items():
+                yield render_player_block(jogador, stats, "• ")
 
+        response = "\n" + "=" * 40 + "\n\n"
+        response += "💡 Posso te ajudar com:\n"
+        response += "- Últimos resultados\n"
+        response += "- Próximos jogos\n"
         response += "- Notícias recentes\n"
         response += "- Estatísticas específicas de algum jogo\n"
         response += "- Campeonatos\n"
-        response += "- Line-up FURIA\n\n"
+        response += "- Line-up FURIA\n"
+        yield response.replace("\n", "<br>")
 
-        # Aqui é onde você converte para HTML com <br>
-        response_html = response.replace("\n", "<br>")
-        return response_html
-        return response
-    
-    # Caso encontre as seguintes palavras na mensagem do usuario, o chatbot vai mostrar o campeonato em qual a furia estara participando.
-    elif "campeonato" in message or "torneio" in message:
-        response = "A FURIA está classificada para a PGL Astana 2025, que acontecerá em maio no Cazaquistão.\n\n"
-        response += "Precisa de mais alguma informação, torcedor?🐯🔥\nPosso te ajudar com:\n"
-        response += "- Últimos resultados\n"
+def reply_decline_stats(state, entities):
+    """Usuário respondeu "não" ao convite de ver estatísticas."""
+    # Desativa o contexto
+    state.esperando_estatisticas = False
+    return render_decline_stats()
+
+@render_cache.cached
+def render_decline_stats():
+    """Renderiza a resposta ao "não" do convite de estatísticas."""
+    response = "💡 Tranquilo! Se precisar de mais alguma coisa, é só me chamar! 🐯🔥\n"
+    response += "  Posso te ajudar com:\n"
+    response += "- Últimos resultados\n"
+    response += "- Próximos jogos\n"
+    response += "- Notícias recentes\n"
+    response += "- Estatísticas específicas de algum jogo\n"
+    response += "- Campeonatos\n"
+    response += "- Line-up FURIA\n"
+
+    return response.replace("\n", "<br>")
+
+def stream_history(state, entities):
+    """Responde, em seções, com o histórico dos últimos jogos da FURIA."""
+    return render_history_sections()
+
+def reply_history(state, entities):
+    """Responde com o histórico dos últimos jogos da FURIA."""
+    return "".join(stream_history(state, entities))
+
+@render_cache.cached_sections
+def render_history_sections():
+    """Renderiza o histórico dos últimos jogos da FURIA, uma seção por jogo."""
+    results = match_store.latest(limit=HISTORY_LIMIT)
+    if results:
+        yield "Últimos jogos da FURIA:<br><br>"
+        for result in results:
+            response = f"📅Data: {result['data']}📅\n"
+            response += f"⚔️Adversário: {result['adversario']}⚔️\n"
+            response += f"🏆Torneio: {result['torneio']}🏆\n"
+            response += f"🎮Resultado: {result['resultado']}🎮\n"
+            if result.get('placares'):
+                response += "🗺️Placares por mapa:\n"
+            for mapa, placar in result.get('placares', {}).items():
+                response += f"- {mapa}: {placar}\n"
+            response += "\n"
+            yield response.replace("\n", "<br>")
+        response = "Precisa de mais alguma informação, torcedor?🐯🔥\n Posso te ajudar com:\n"
         response += "- Próximos jogos\n"
         response += "- Notícias recentes\n"
         response += "- Estatísticas específicas de algum jogo\n"
+        response += "- Campeonatos\n"
         response += "- Line-up FURIA\n\n"
 
         # Aqui é onde você converte para HTML com <br>
-        response_html = response.replace("\n", "<br>")
-        return response_html
-        return response
-    
-    # Caso encontre as seguintes palavras na mensagem do usuario, o chatbot vai mostrar o line-up da FURIA.
-    elif "line-up" in message or "lineup" in message or "jogadores" in message or "equipe" in message or "time" in message:
-        lineup = fetch_furia_lineup()
-        response = "🐯 LINE-UP DA FURIA 🐯\n"
-        response += "=" * 40 + "\n\n"
-        
-        for player in lineup['players']:
-            response += f"🎮 {player['nickname']} ({player['name']})\n"
-            response += f"📊 Role: {player['role']}\n"
-            response += f"🌎 País: {player['country']}\n"
+        yield response.replace("\n", "<br>")
+    else:
+        yield "Desculpe, não consegui encontrar o histórico de jogos."
+
+def reply_next_game(state, entities):
+    """Responde com o próximo jogo da FURIA."""
+    return render_next_game()
+
+@render_cache.cached
+def render_next_game():
+    """Renderiza o próximo jogo da FURIA."""
+    response = "O próximo compromisso da FURIA é a PGL Astana 2025, que será realizada entre os dias 10 e 18 de maio, no Cazaquistão.\n\n"
+    response += "Precisa de mais alguma informação, torcedor?🐯🔥\nPosso te ajudar com:\n"
+    response += "- Últimos resultados\n"
+
+    response += "- Notícias recentes\n"
+    response += "- Estatísticas específicas de algum jogo\n"
+    response += "- Campeonatos\n"
+    response += "- Line-up FURIA\n\n"
+
+    # Aqui é onde você converte para HTML com <br>
+    response_html = response.replace("\n", "<br>")
+    return response_html
+
+def reply_tournament(state, entities):
+    """Responde com o campeonato em que a FURIA estará participando."""
+    return render_tournament()
+
+@render_cache.cached
+def render_tournament():
+    """Renderiza o campeonato em que a FURIA estará participando."""
+    response = "A FURIA está classificada para a PGL Astana 2025, que acontecerá em maio no Cazaquistão.\n\n"
+    response += "Precisa de mais alguma informação, torcedor?🐯🔥\nPosso te ajudar com:\n"
+    response += "- Últimos resultados\n"
+    response += "- Próximos jogos\n"
+    response += "- Notícias recentes\n"
+    response += "- Estatísticas específicas de algum jogo\n"
+    response += "- Line-up FURIA\n\n"
+
+    # Aqui é onde você converte para HTML com <br>
+    response_html = response.replace("\n", "<br>")
+    return response_html
+
+def reply_lineup(state, entities):
+    """Responde com o line-up da FURIA."""
+    return render_lineup()
+
+@render_cache.cached
+def render_lineup():
+    """Renderiza o line-up da FURIA."""
+    lineup = fetch_furia_lineup()
+    response = "🐯 LINE-UP DA FURIA 🐯\n"
+    response += "=" * 40 + "\n\n"
+
+    for player in lineup['players']:
+        response += f"🎮 {player['nickname']} ({player['name']})\n"
+        response += f"📊 Role: {player['role']}\n"
+        response += f"🌎 País: {player['country']}\n"
+        # Idade e estatísticas só existem no line-up padrão (o Draft5 não as traz)
+        if 'age' in player:
             response += f"📅 Idade: {player['age']}\n"
+        if 'stats' in player:
             response += f"📈 Estatísticas:\n"
             response += f"   • Rating: {player['stats']['rating']}\n"
             response += f"   • Kills: {player['stats']['kills']}\n"
             response += f"   • Deaths: {player['stats']['deaths']}\n"
             response += f"   • Assists: {player['stats']['assists']}\n"
             response += f"   • Headshots: {player['stats']['headshots']}%\n"
-            response += "\n"
+        response += "\n"
+
+    coach = lineup['coach']
+    if coach:
+        response += f"👨‍🏫 Coach: {coach['name']} ({coach['nickname']})\n"
+        response += f"🌎 País: {coach['country']}\n"
+        if 'age' in coach:
+            response += f"📅 Idade: {coach['age']}\n"
+        response += "\n"
+
+    response += "=" * 40 + "\n\n"
+    response += "💡 Precisa de mais alguma informação, torcedor?🐯🔥\n"
+    response += "   Posso te ajudar com:\n"
+    response += "- Últimos resultados\n"
+    response += "- Próximos jogos\n"
+    response += "- Notícias recentes\n"
+    response += "- Campeonatos\n"
+
+    response += "- Estatísticas específicas de algum jogo\n"
+
+    response_html = response.replace("\n", "<br>")
+    return response_html
+
+def reply_player_average(state, entities):
+    """Responde com a média das estatísticas de um jogador nas últimas N partidas."""
+    players = entities.get('players')
+    if not players:
+        return render_player_average_help()
+    ultimos = entities.get('number')
+    if ultimos:
+        # Mais partidas do que as registradas dá a mesma resposta (e a mesma chave no cache)
+        ultimos = min(ultimos, get_player_stats().match_count)
+    return render_player_average(players[0], ultimos)
+
+@render_cache.cached
+def render_player_average(jogador, ultimos):
+    """Renderiza a média das estatísticas do jogador."""
+    media = get_player_stats().player_average(jogador, ultimos)
+    if media is None:
+        return f"Desculpe, não encontrei estatísticas de {jogador}. 🤔"
+
+    response = f"📈 DESEMPENHO DE {media.player} 📈\n"
+    response += "=" * 40 + "\n\n"
+    if ultimos:
+        response += f"🎮 Últimos {media.matches} jogos\n\n"
+    else:
+        response += f"🎮 {media.matches} jogos registrados\n\n"
+    response += f"• Rating médio: {media.rating:.2f}\n"
+    response += f"• ADR médio: {media.adr:.1f}\n"
+    response += f"• KAST médio: {media.kast:.1f}%\n"
+    response += f"• K/D: {media.kills}/{media.deaths} ({media.kills - media.deaths:+d})\n"
+    response += "\n" + "=" * 40 + "\n"
+    return response.replace("\n", "<br>")
+
+@render_cache.cached
+def render_player_average_help():
+    """Renderiza a explicação de como pedir a média de um jogador."""
+    response = "De qual jogador você quer ver o desempenho? 🤔\n"
+    response += "Exemplo: média do KSCERATO nos últimos 3 jogos"
+    return response.replace("\n", "<br>")
+
+def reply_map_win_rate(state, entities):
+    """Responde com o aproveitamento da FURIA num mapa (ou em todos)."""
+    maps = entities.get('maps')
+    return render_map_win_rate(maps[0] if maps else None)
+
+@render_cache.cached
+def render_map_win_rate(mapa):
+    """Renderiza o aproveitamento da FURIA no mapa informado (ou em todos os mapas)."""
+    stats = get_player_stats()
+    if mapa:
+        rate = stats.map_win_rate(mapa)
+        if rate is None:
+            return f"A FURIA ainda não tem jogos registrados na {mapa}. 🤔"
+        rates = [rate]
+    else:
+        rates = stats.map_win_rates()
+
+    response = "🗺️ APROVEITAMENTO DA FURIA POR MAPA 🗺️\n"
+    response += "=" * 40 + "\n\n"
+    for rate in rates:
+        response += f"• {rate.map}: {rate.win_rate:.0%} ({rate.won} vitórias em {rate.played} mapas)\n"
+    response += "\n" + "=" * 40 + "\n"
+    return response.replace("\n", "<br>")
+
+def reply_opponent_history(state, entities):
+    """Responde com os jogos da FURIA contra o adversário citado."""
+    return render_opponent_history(entities['opponents'][0])
+
+@render_cache.cached
+def render_opponent_history(adversario):
+    """Renderiza os últimos resultados e o próximo jogo da FURIA contra o adversário."""
+    key = normalize(adversario)
+    matches = match_store.by_opponent(adversario, limit=5)
+    # Resultados do Draft5 que ainda não estão no repositório de partidas
+    dates = {match['data'] for match in matches}
+    results = [result for result in home_games('results')
+               if normalize(result['opponent']) == key and result['date'] not in dates]
+    upcoming = [match for match in home_games('matches')
+                if normalize(match['opponent']) == key]
+    if not (matches or results or upcoming):
+        return f"Não encontrei jogos da FURIA contra {adversario}. 🤔"
+
+    response = f"⚔️ FURIA x {adversario} ⚔️\n"
+    response += "=" * 40 + "\n\n"
+    for match in upcoming:
+        response += f"📅 Próximo jogo: {match['date']} ({match['tournament']})\n"
+    if upcoming:
+        response += "\n"
+    for match in matches:
+        response += f"• {match['data']} - {match['torneio']}: {match['resultado']}\n"
+        for mapa, placar in match.get('placares', {}).items():
+            response += f"   - {mapa}: {placar}\n"
+    for result in results:
+        response += f"• {result['date']} - {result['tournament']}: {result['score']}\n"
+    response += "\n" + "=" * 40 + "\n"
+    return response.replace("\n", "<br>")
+
+def reply_tournament_history(state, entities):
+    """Responde com os jogos e os destaques da FURIA no torneio citado."""
+    return render_tournament_history(entities['tournaments'][0])
+
+@render_cache.cached
+def render_tournament_history(torneio):
+    """Renderiza os resultados da FURIA no torneio e os jogadores de maior rating nele."""
+    key = normalize(torneio)
+    matches = match_store.by_tournament(torneio, limit=HISTORY_LIMIT)
+    # Resultados do Draft5 que ainda não estão no repositório de partidas
+    dates = {match['data'] for match in matches}
+    results = [result for result in home_games('results')
+               if normalize(result['tournament']) == key and result['date'] not in dates]
+    ranking = get_player_stats().top('rating', torneio, limit=3)
+    if not (matches or results or ranking):
+        return f"Não encontrei jogos da FURIA no torneio {torneio}. 🤔"
+
+    response = f"🏆 FURIA NO {torneio.upper()} 🏆\n"
+    response += "=" * 40 + "\n\n"
+    for match in matches:
+        response += f"• {match['data']} - FURIA x {match['adversario']}: {match['resultado']}\n"
+    for result in results:
+        response += f"• {result['date']} - FURIA x {result['opponent']}: {result['score']}\n"
+    if ranking:
+        response += "\n⭐ Maiores ratings:\n"
+        for item in ranking:
+            response += f"• {item.player} ({item.team}): {item.value:.2f} em {item.matches} jogos\n"
+    response += "\n" + "=" * 40 + "\n"
+    return response.replace("\n", "<br>")
+
+# Estatística usada no ranking para cada métrica reconhecida na mensagem
+RANKING_METRICS = {
+    'ADR': 'adr',
+    'Rating': 'rating',
+    'KAST': 'kast'
+}
+
+def reply_top_players(state, entities):
+    """Responde com o ranking dos jogadores numa estatística (padrão: rating)."""
+    metrics = entities.get('metrics')
+    tournaments = entities.get('tournaments')
+    return render_top_players(metrics[0] if metrics else 'Rating',
+                              tournaments[0] if tournaments else None)
+
+@render_cache.cached
+def render_top_players(metrica, torneio):
+    """Renderiza o ranking dos jogadores no torneio (padrão: torneio mais recente)."""
+    stats = get_player_stats()
+    torneio = torneio or stats.latest_tournament
+    ranking = stats.top(RANKING_METRICS[metrica], torneio, limit=5)
+    if not ranking:
+        return f"Desculpe, não encontrei estatísticas do torneio {torneio}. 🤔"
+
+    response = f"🏆 TOP {metrica} - {torneio} 🏆\n"
+    response += "=" * 40 + "\n\n"
+    for posicao, item in enumerate(ranking, start=1):
+        valor = f"{item.value:.2f}" if metrica == 'Rating' else f"{item.value:.1f}"
+        response += f"{posicao}. {item.player} ({item.team}): {valor} em {item.matches} jogos\n"
+    response += "\n" + "=" * 40 + "\n"
+    return response.replace("\n", "<br>")
+
+def reply_fallback(state, entities):
+    """Resposta padrão quando a mensagem não é entendida."""
+    return render_fallback()
+
+@render_cache.cached
+def render_fallback():
+    """Renderiza a resposta padrão quando a mensagem não é entendida."""
+    response = "Desculpe, não entendi sua pergunta. Você pode perguntar sobre:\n"
+    response += "- Últimos resultados\n"
+    response += "- Próximos jogos\n"
+    response += "- Notícias recentes\n"
+
+    response += "- Estatísticas específicas de algum jogo\n"
+    response += "- Campeonatos\n\n"
+
+    response += "O que você gostaria de saber, torcedor? 🐯🔥"
+    # Aqui é onde você converte para HTML com <br>
+    response_html = response.replace("\n", "<br>")
+    return response_html
+
+# Função que responde cada intenção identificada pelo IntentMatcher
+INTENT_HANDLERS = {
+    'stats_by_date': reply_stats_by_date,
+    'confirm_stats': reply_confirm_stats,
+    'decline_stats': reply_decline_stats,
+    'ask_stats_date': reply_ask_stats_date,
+    'goodbye': reply_goodbye,
+    'news': reply_news,
+    'news_search': reply_news_search,
+    'last_game': reply_last_game,
+    'history': reply_history,
+    'next_game': reply_next_game,
+    'tournament': reply_tournament,
+    'lineup': reply_lineup,
+    'player_average': reply_player_average,
+    'map_win_rate': reply_map_win_rate,
+    'top_players': reply_top_players,
+    'opponent_history': reply_opponent_history,
+    'tournament_history': reply_tournament_history,
+    FALLBACK_INTENT: reply_fallback
+}
+
+# Intenções com respostas longas, enviadas em seções no chat em streaming
+INTENT_STREAMS = {
+    'stats_by_date': stream_stats_by_date,
+    'confirm_stats': stream_confirm_stats,
+    'ask_stats_date': stream_ask_stats_date,
+    'last_game': stream_last_game,
+    'history': stream_history
+}
+
+# Times acompanhados além da FURIA (DRAFT5_TEAMS); ver teams.py
+ALL_TEAMS = [HOME_TEAM] + FOLLOWED_TEAMS
+
+# Páginas da partição de cada time acompanhado
+TEAM_PAGES = ('news', 'line-up', 'matches', 'results')
+
+def team_snapshot_path(team):
+    """Arquivo do snapshot do time, ao lado do snapshot principal (None sem snapshot)."""
+    if not SNAPSHOT_PATH:
+        return None
+    return os.path.join(os.path.dirname(SNAPSHOT_PATH), 'teams', f"{team.slug}.bin")
+
+def forget_team(slug):
+    """Libera o que sobra de um time descartado pelo LRU (páginas e respostas guardadas)."""
+    draft5_client.forget(build_urls(draft5_client.base_url, team_paths(slug)).values())
+    payload_cache.discard(*(f"team:{slug}:{page}" for page in TEAM_PAGES))
+
+# Dados dos times acompanhados, num LRU limitado em bytes (TEAM_CACHE_BYTES)
+team_partitions = TeamPartitions(on_evict=forget_team)
+
+# Arquivo de snapshot já carregado de cada time: (inode, mtime, tamanho)
+team_snapshot_seen = {}
+
+def refresh_team(team):
+    """
+    Busca as páginas de equipe do time e monta a partição dele.
+    
+    Notícias e line-up vêm das páginas do time (requisições condicionais pela
+    sessão do cliente principal); partidas e resultados, das páginas gerais já
+    baixadas para a FURIA. A versão da partição só muda quando algo mudou, e
+    então o snapshot do time é regravado.
+    
+    Args:
+        team (Team): Time acompanhado
         
-        response += f"👨‍🏫 Coach: {lineup['coach']['name']} ({lineup['coach']['nickname']})\n"
-        response += f"🌎 País: {lineup['coach']['country']}\n"
-        response += f"📅 Idade: {lineup['coach']['age']}\n\n"
+    Returns:
+        dict: Partição do time
+    """
+    from draft5_parser import PARSERS
+
+    urls = build_urls(draft5_client.base_url, team_paths(team.slug))
+    try:
+        pages = draft5_client.fetch_urls(urls)
+        previous = team_partitions.peek(team.slug) or {}
+        data = {}
+        stale = []
+        for name in urls:
+            if name in pages:
+                html, modified = pages[name]
+                if modified or name not in previous:
+                    data[name] = PARSERS[name](html, draft5_client.base_url)
+                    continue
+            else:
+                stale.append(name)
+            data[name] = previous.get(name, [])
+        data['matches'] = team_games(draft5_cache['matches'], team.name)
+        data['results'] = team_games(draft5_cache['results'], team.name)
+
+        changed = any(data[name] != previous.get(name) for name in TEAM_PAGES) \
+            or stale != previous.get('stale')
+    except Exception:
+        # A agenda (teams.RefreshScheduler) registra o erro e segue para o próximo time
+        TEAM_REFRESHES.labels(team.slug, 'error').inc()
+        raise
+    version = previous.get('version', 0) + changed
+    last_update = datetime.now().isoformat()
+    partition = dict(data, version=version, last_update=last_update, stale=stale)
+    team_partitions.put(team.slug, partition)
+    TEAM_REFRESHES.labels(team.slug, 'changed' if changed else 'unchanged').inc()
+
+    path = team_snapshot_path(team)
+    if changed and path:
+        try:
+            save_snapshot(path, data, version, last_update, stale)
+            team_snapshot_seen[team.slug] = file_stat(path)
+        except OSError as e:
+            print(f"Erro ao gravar o snapshot de {team.name}: {str(e)}")
+    return partition
+
+def file_stat(path):
+    """(inode, mtime, tamanho) do arquivo, ou None se ele não existir."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+def get_team_data(team):
+    """
+    Retorna a partição com os dados do time acompanhado.
+    
+    Uma partição fora da memória (ainda não carregada ou descartada pelo LRU)
+    volta do snapshot do time. Nos workers que não buscam o Draft5 (ver
+    shared_refresh), a partição é recarregada quando o líder regrava o
+    snapshot. Sem partição nem snapshot, a atualização do time é antecipada.
+    
+    Args:
+        team (Team): Time acompanhado
         
-        response += "=" * 40 + "\n\n"
-        response += "💡 Precisa de mais alguma informação, torcedor?🐯🔥\n"
-        response += "   Posso te ajudar com:\n"
-        response += "- Últimos resultados\n"
-        response += "- Próximos jogos\n"
-        response += "- Notícias recentes\n"
-        response += "- Campeonatos\n"
+    Returns:
+        dict: Partição do time, ou None se os dados ainda não foram buscados
+    """
+    data = team_partitions.get(team.slug)
+    path = team_snapshot_path(team)
+    if path and (data is None or not team_scheduler.active()):
+        seen = file_stat(path)
+        if seen is not None and (data is None or seen != team_snapshot_seen.get(team.slug)):
+            snapshot = load_snapshot(path)
+            if snapshot is not None:
+                data = {name: snapshot[name] for name in snapshot.keys()}
+                data.update(version=snapshot.version, last_update=snapshot.last_update,
+                            stale=list(snapshot.stale))
+                team_partitions.put(team.slug, data)
+                team_snapshot_seen[team.slug] = seen
+    if data is None:
+        team_scheduler.request(team.slug)
+    return data
 
-        response += "- Estatísticas específicas de algum jogo\n"
+def is_live(team):
+    """Indica se o time tem partida marcada para hoje (pelas páginas gerais do Draft5)."""
+    today = datetime.now().strftime('%d/%m/%Y')
+    return any(match['date'].startswith(today)
+               for match in team_games(draft5_cache['matches'], team.name))
+
+def team_refresh_interval(team):
+    """Segundos até a próxima atualização do time: menos com partida hoje, mais com prioridade baixa."""
+    if is_live(team):
+        return min(LIVE_REFRESH_INTERVAL, REFRESH_INTERVAL)
+    return REFRESH_INTERVAL * PRIORITY_FACTORS[team.priority]
+
+def select_team(state, value):
+    """
+    Troca o time da conversa quando a requisição do chat informa 'team'.
+    
+    Args:
+        state (SessionState): Estado da conversa
+        value (str): Slug, número do Draft5 ou nome do time (ignorado se desconhecido)
+    """
+    team = find_team(value, ALL_TEAMS)
+    if team is not None:
+        state.team = None if team == HOME_TEAM else team.slug
+
+def conversation_team(state):
+    """Time acompanhado da conversa, ou None quando o assunto é a FURIA."""
+    if state is None or state.team is None:
+        return None
+    return find_team(state.team, FOLLOWED_TEAMS)
+
+def answer(intent, state, entities):
+    """Responde à intenção, com os dados do time da conversa quando não é a FURIA."""
+    team = conversation_team(state)
+    if team is None:
+        return INTENT_HANDLERS[intent](state, entities)
+    return reply_team(team, intent)
+
+def reply_team(team, intent):
+    """Responde a uma pergunta sobre um time acompanhado com os dados da partição dele."""
+    data = get_team_data(team)
+    if data is None:
+        return f"Ainda estou buscando os dados da {team.name}. Tente de novo em instantes! ⏳"
+    render = TEAM_RENDERS.get(intent, render_team_help)
+    return render(team.slug, data['version'])
+
+def team_partition(slug):
+    """Partição do time para as funções render_team_* (vazia se já foi descartada)."""
+    return team_partitions.peek(slug) or {}
+
+@render_cache.cached
+def render_team_news(slug, version):
+    """Renderiza as notícias mais recentes do time."""
+    team, news = find_team(slug, FOLLOWED_TEAMS), team_partition(slug).get('news')
+    if not news:
+        return f"Não encontrei notícias recentes da {team.name}. 🤔"
+    response = f"📰 NOTÍCIAS DA {team.name.upper()} 📰\n\n"
+    for item in news[:3]:
+        response += f"• {item['title']} ({item['date']})\n🔗 {item['link']}\n"
+    return response.replace("\n", "<br>")
+
+@render_cache.cached
+def render_team_last_game(slug, version):
+    """Renderiza o último resultado do time."""
+    team, results = find_team(slug, FOLLOWED_TEAMS), team_partition(slug).get('results')
+    if not results:
+        return f"Não encontrei resultados recentes da {team.name}. 🤔"
+    latest = results[0]
+    response = f"🎮 ÚLTIMO JOGO DA {team.name.upper()} 🎮\n"
+    response += "=" * 40 + "\n\n"
+    response += f"🏆 Torneio: {latest['tournament']}\n"
+    response += f"📅 Data: {latest['date']}\n"
+    response += f"⚔️ Adversário: {latest['opponent']}\n"
+    response += f"📊 Resultado Final: {latest['score']}\n"
+    return response.replace("\n", "<br>")
+
+@render_cache.cached
+def render_team_history(slug, version):
+    """Renderiza os últimos resultados do time."""
+    team, results = find_team(slug, FOLLOWED_TEAMS), team_partition(slug).get('results')
+    if not results:
+        return f"Não encontrei resultados recentes da {team.name}. 🤔"
+    response = f"📜 ÚLTIMOS JOGOS DA {team.name.upper()} 📜\n\n"
+    for result in results[:5]:
+        response += (f"• {result['date']} - {team.name} {result['score']} {result['opponent']}"
+                     f" ({result['tournament']})\n")
+    return response.replace("\n", "<br>")
+
+@render_cache.cached
+def render_team_next_game(slug, version):
+    """Renderiza os próximos jogos do time."""
+    team, matches = find_team(slug, FOLLOWED_TEAMS), team_partition(slug).get('matches')
+    if not matches:
+        return f"Não encontrei jogos marcados da {team.name}. 🤔"
+    response = f"📅 PRÓXIMOS JOGOS DA {team.name.upper()} 📅\n\n"
+    for match in matches:
+        response += f"• {match['date']} - {team.name} x {match['opponent']} ({match['tournament']})\n"
+    return response.replace("\n", "<br>")
+
+@render_cache.cached
+def render_team_tournament(slug, version):
+    """Renderiza os campeonatos dos próximos jogos (ou do último resultado) do time."""
+    team, data = find_team(slug, FOLLOWED_TEAMS), team_partition(slug)
+    games = data.get('matches') or data.get('results', [])[:1]
+    tournaments = list(dict.fromkeys(game['tournament'] for game in games))
+    if not tournaments:
+        return f"Não encontrei campeonatos da {team.name}. 🤔"
+    return f"🏆 A {team.name} está jogando: {', '.join(tournaments)}."
+
+@render_cache.cached
+def render_team_lineup(slug, version):
+    """Renderiza o line-up do time."""
+    team, lineup = find_team(slug, FOLLOWED_TEAMS), team_partition(slug).get('line-up')
+    if not lineup:
+        return f"Não encontrei o line-up da {team.name}. 🤔"
+    response = f"🐯 LINE-UP DA {team.name.upper()} 🐯\n\n"
+    for player in lineup:
+        response += f"🎮 {player['nickname']} ({player['name']}) - {player['role']}, {player['country']}\n"
+    return response.replace("\n", "<br>")
+
+@render_cache.cached
+def render_team_help(slug, version):
+    """Lista o que o chat sabe responder sobre um time acompanhado."""
+    team = find_team(slug, FOLLOWED_TEAMS)
+    response = f"Sobre a {team.name} eu posso te contar:\n"
+    response += "- Notícias recentes\n"
+    response += "- Último jogo e últimos resultados\n"
+    response += "- Próximos jogos e campeonatos\n"
+    response += "- Line-up\n"
+    return response.replace("\n", "<br>")
+
+# Intenções respondidas para os times acompanhados (as demais recebem render_team_help)
+TEAM_RENDERS = {
+    'news': render_team_news,
+    'news_search': render_team_news,
+    'last_game': render_team_last_game,
+    'history': render_team_history,
+    'next_game': render_team_next_game,
+    'tournament': render_team_tournament,
+    'lineup': render_team_lineup
+}
+
+def known_entities():
+    """
+    Retorna os nomes reconhecidos como entidade nas mensagens do chat.
+    
+    Jogadores são reconhecidos pelo apelido ou pelo nome (ex.: "Gabriel Toledo"
+    vira FalleN); adversários e torneios vêm dos resultados guardados e dos
+    dados do Draft5.
+    
+    Returns:
+        dict: Jogadores ({nome: apelido}), adversários, mapas, torneios e métricas
+    """
+    stats = get_player_stats()
+    players = {nickname: nickname for nickname in stats.players}
+    for player in fetch_furia_lineup()['players']:
+        players[player['nickname']] = player['nickname']
+        if player.get('name'):
+            players[player['name']] = player['nickname']
+
+    draft5_games = home_games('results') + home_games('matches')
+    opponents = match_store.opponents()
+    opponents += [team for team in stats.teams if team != HOME_TEAM.name]
+    opponents += [game['opponent'] for game in draft5_games]
+    # Torneios do mais recente para o mais antigo: "bucharest" fica com a última edição
+    tournaments = list(stats.tournaments) + match_store.tournaments()
+    tournaments += [game['tournament'] for game in draft5_games]
+    tournaments += [tournament['name'] for tournament in fetch_furia_tournaments()]
+    return {
+        'players': players,
+        'opponents': list(dict.fromkeys(name for name in opponents if name)),
+        'maps': sorted(stats.maps),
+        'tournaments': list(dict.fromkeys(name for name in tournaments if name)),
+        'metrics': sorted(RANKING_METRICS)
+    }
+
+def known_phrases():
+    """Textos longos reconhecidos quando a mensagem se parece com eles (títulos das notícias)."""
+    return {'news': [item['title'] for item in fetch_furia_news()]}
+
+# Identificador de intenções, remontado quando os dados mudam de versão
+intent_matcher_cache = {
+    'version': None,
+    'matcher': None
+}
+
+def get_intent_matcher():
+    """
+    Retorna o IntentMatcher com as entidades da versão atual dos dados.
+    
+    O atualizador do Draft5 já o remonta depois de cada atualização, então as
+    mensagens do chat não esperam pela compilação.
+    
+    Returns:
+        IntentMatcher: Identificador de intenções
+    """
+    version = data_version()
+    if intent_matcher_cache['version'] != version:
+        intent_matcher_cache['matcher'] = IntentMatcher(entities=known_entities(),
+                                                        phrases=known_phrases())
+        intent_matcher_cache['version'] = version
+    return intent_matcher_cache['matcher']
 
+# Registro das conversas (fila em memória gravada em lotes por uma thread, ver chat_log.py)
+chat_log = ChatLog()
+# Grava o que ainda estiver na fila quando o processo termina
+atexit.register(chat_log.stop)
+
+# Histogramas de latência por intenção, criados uma vez para não montar rótulos a cada mensagem
+intent_latency = {intent: INTENT_LATENCY.labels(intent) for intent in INTENT_HANDLERS}
+
+def process_chat_message(message, state=None, session_id=None):
+    """
+    Processa a mensagem do chat e retorna uma resposta apropriada.
+    
+    Esta função é o coração do chatbot, analisando a mensagem do usuário
+    e retornando respostas relevantes sobre a FURIA. A intenção é identificada
+    pelo IntentMatcher e respondida pela função correspondente em INTENT_HANDLERS.
+    
+    Args:
+        message (str): Mensagem do usuário
+        state (SessionState): Estado da conversa da sessão do usuário
+        session_id (str): Id da sessão, para o registro das conversas (sem ele,
+            ex.: no preload, a mensagem não é registrada)
         
-        response_html = response.replace("\n", "<br>")
-        return response_html
+    Returns:
+        str: Resposta formatada em HTML
+    """
+    if state is None:
+        state = SessionState()
+
+    started = time.perf_counter()
+    intent, entities = get_intent_matcher().match(message, state)
+    response = answer(intent, state, entities)
+    intent_latency[intent].observe(time.perf_counter() - started)
+    if session_id is not None:
+        chat_log.record(session_id, message, intent)
+    return response
+
+def stream_chat_message(message, state=None, session_id=None):
+    """
+    Versão em streaming de process_chat_message.
     
+    Gera a resposta seção por seção (cabeçalho, placares, um bloco por
+    jogador...) para as intenções de INTENT_STREAMS; as demais respostas saem
+    numa única seção. Juntas, as seções formam a mesma resposta de
+    process_chat_message.
+    
+    Args:
+        message (str): Mensagem do usuário
+        state (SessionState): Estado da conversa da sessão do usuário
+        session_id (str): Id da sessão, para o registro das conversas
+        
+    Yields:
+        str: Seções da resposta formatadas em HTML
+    """
+    if state is None:
+        state = SessionState()
+
+    started = time.perf_counter()
+    intent, entities = get_intent_matcher().match(message, state)
+    if session_id is not None:
+        chat_log.record(session_id, message, intent)
+    stream = INTENT_STREAMS.get(intent)
+    if stream is None or conversation_team(state) is not None:
+        yield answer(intent, state, entities)
     else:
-        response = "Desculpe, não entendi sua pergunta. Você pode perguntar sobre:\n"
-        response += "- Últimos resultados\n"
-        response += "- Próximos jogos\n"
-        response += "- Notícias recentes\n"
+        yield from stream(state, entities)
+    # Inclui o tempo de envio das seções anteriores, como o cliente percebe
+    intent_latency[intent].observe(time.perf_counter() - started)
 
-        response += "- Estatísticas específicas de algum jogo\n"
-        response += "- Campeonatos\n\n"
+def parse_chat_request(data):
+    """
+    Lê a mensagem e o id da sessão do corpo JSON de uma requisição de chat.
+    
+    Args:
+        data (dict): Corpo da requisição com 'message' e, opcionalmente, 'session_id'
+        
+    Returns:
+        tuple: (mensagem, session_id); um id novo é criado se o enviado for inválido
+    """
+    data = data or {}
+    message = data.get('message', '')
+    session_id = data.get('session_id')
+    if not is_valid_session_id(session_id):
+        session_id = new_session_id()
+    return message, session_id
 
-        response += "O que você gostaria de saber, torcedor? 🐯🔥"
-        # Aqui é onde você converte para HTML com <br>
-        response_html = response.replace("\n", "<br>")
-        return response_html
-        return response
+def chat_session(session_id, data):
+    """
+    Estado da sessão, já com o time da conversa trocado se a requisição informar 'team'.
+    
+    Args:
+        session_id (str): Id da sessão
+        data (dict): Corpo da requisição de chat
+        
+    Returns:
+        SessionState: Estado da conversa
+    """
+    state = session_store.get(session_id)
+    if isinstance(data, dict) and data.get('team') is not None:
+        select_team(state, data['team'])
+    return state
+
+def chat_response(data):
+    """
+    Monta a resposta da API de chat a partir do corpo JSON da requisição.
+    
+    Compartilhada pelas rotas Flask e ASGI (asgi_app.py).
+    
+    Args:
+        data (dict): Corpo da requisição com 'message' e, opcionalmente, 'session_id' e
+            'team' (time da conversa, ver select_team)
+        
+    Returns:
+        dict: Resposta no formato {response, session_id}
+    """
+    message, session_id = parse_chat_request(data)
+    response = process_chat_message(message, chat_session(session_id, data), session_id)
+    return {'response': response, 'session_id': session_id}
+
+# Número máximo de mensagens num lote do /api/chat/batch
+CHAT_BATCH_MAX = int(os.getenv('CHAT_BATCH_MAX', '500'))
+
+def process_chat_batch(items):
+    """
+    Processa um lote de mensagens do chat numa única chamada.
+    
+    As mensagens de uma mesma sessão são respondidas na ordem em que aparecem
+    no lote, preservando o contexto da conversa (ex.: "último jogo" seguido de
+    "sim"). Mensagens iguais com o mesmo contexto passam pelo IntentMatcher uma
+    única vez, e as respostas saem do render_cache.
+    
+    Args:
+        items (list): Lista de {'session_id', 'message'} (e, opcionalmente, 'team')
+        
+    Returns:
+        list: Lista de {response, session_id}, na mesma ordem de items
+    """
+    matcher = get_intent_matcher()
+    matches = {}
+    responses = []
+    for item in items:
+        message, session_id = parse_chat_request(item if isinstance(item, dict) else None)
+        state = chat_session(session_id, item)
+        started = time.perf_counter()
+        key = (message, matcher.context_key(state))
+        found = matches.get(key)
+        if found is None:
+            found = matches[key] = matcher.match(message, state)
+        intent, entities = found
+        responses.append({'response': answer(intent, state, entities),
+                          'session_id': session_id})
+        intent_latency[intent].observe(time.perf_counter() - started)
+        chat_log.record(session_id, message, intent)
+    return responses
+
+def chat_batch_response(items):
+    """
+    Monta a resposta da API de chat em lote a partir do corpo JSON da requisição.
+    
+    Compartilhada pelas rotas Flask e ASGI (asgi_app.py).
+    
+    Args:
+        items (list): Corpo da requisição (lista de {'session_id', 'message'})
+        
+    Returns:
+        tuple: (corpo da resposta, código HTTP)
+    """
+    if not isinstance(items, list):
+        return {'error': 'O corpo deve ser uma lista de {session_id, message}'}, 400
+    if len(items) > CHAT_BATCH_MAX:
+        return {'error': f'O lote deve ter no máximo {CHAT_BATCH_MAX} mensagens'}, 400
+    for position, item in enumerate(items):
+        message = item.get('message', '') if isinstance(item, dict) else ''
+        if not isinstance(message, str):
+            return {'error': f'A mensagem do item {position} deve ser um texto'}, 400
+    return process_chat_batch(items), 200
+
+def format_sse(data, event=None):
+    """Formata um evento Server-Sent Events com os dados em JSON."""
+    payload = f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+    if event:
+        return f"event: {event}\n" + payload
+    return payload
+
+def chat_stream_events(data):
+    """
+    Gera os eventos Server-Sent Events do chat em streaming.
+    
+    O primeiro evento ('session') traz o session_id, cada evento sem nome traz
+    uma seção da resposta e o evento 'done' marca o fim. Compartilhada pelas
+    rotas Flask e ASGI (asgi_app.py).
+    
+    Args:
+        data (dict): Corpo da requisição com 'message' e, opcionalmente, 'session_id' e 'team'
+        
+    Yields:
+        str: Eventos já formatados
+    """
+    message, session_id = parse_chat_request(data)
+    yield format_sse({'session_id': session_id}, 'session')
+    for section in stream_chat_message(message, chat_session(session_id, data), session_id):
+        yield format_sse(section)
+    yield format_sse(None, 'done')
+
+# Cabeçalhos das respostas em streaming (sem cache e sem buffer em proxies)
+STREAM_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+# Respostas de leitura serializadas e comprimidas uma vez por versão dos dados
+payload_cache = PayloadCache()
+
+def news_payload():
+    """Resposta serializada do /api/news (ver http_cache)."""
+    return payload_cache.get('news', draft5_cache['version'], fetch_furia_news)
+
+def lineup_payload():
+    """Resposta serializada do /api/lineup (ver http_cache)."""
+    return payload_cache.get('lineup', draft5_cache['version'], fetch_furia_lineup)
+
+def tournaments_payload():
+    """Resposta serializada do /api/tournaments (ver http_cache)."""
+    return payload_cache.get('tournaments', draft5_cache['version'], fetch_furia_tournaments)
+
+def bootstrap_data():
+    """
+    Dados iniciais da página: notícias, campeonatos e line-up.
+    
+    Vão embutidos na página inicial (e em /api/bootstrap), então o primeiro
+    carregamento não precisa de nenhuma chamada extra à API. news_version é a
+    versão do NewsBroker, usada pela página para se inscrever em
+    /api/news/stream sem receber de novo as mesmas notícias. stale lista as
+    páginas do Draft5 cujos dados estão desatualizados.
+    """
+    return {
+        'news': fetch_furia_news(),
+        'news_version': news_broker.version,
+        'tournaments': fetch_furia_tournaments(),
+        'lineup': fetch_furia_lineup(),
+        'stale': draft5_cache['stale']
+    }
+
+def bootstrap_payload():
+    """Resposta serializada do /api/bootstrap (ver http_cache)."""
+    return payload_cache.get('bootstrap', draft5_cache['version'], bootstrap_data)
+
+def render_index():
+    """Renderiza a página inicial (fora de uma requisição, também serve para o modo ASGI)."""
+    with app.app_context():
+        return render_template('index.html', bootstrap=bootstrap_data())
+
+def index_payload():
+    """Página inicial pré-renderizada (com os dados iniciais), guardada em memória já comprimida."""
+    return payload_cache.get('index', draft5_cache['version'], render_index, encode=encode_html,
+                             content_type='text/html; charset=utf-8',
+                             cache_control=HTML_CACHE_CONTROL)
+
+def is_stale(page):
+    """Indica se os dados da página do Draft5 são os últimos bons (o Draft5 está falhando)."""
+    return page in draft5_cache['stale']
+
+# Páginas de cada time em /api/teams/<time>/<página> -> página do Draft5
+TEAM_ROUTES = {
+    'news': 'news',
+    'lineup': 'line-up',
+    'matches': 'matches',
+    'results': 'results'
+}
+
+# Mensagens de erro de /api/teams/<time>/<página>, por código HTTP
+TEAM_PAGE_ERRORS = {
+    404: 'Time ou página desconhecidos',
+    503: 'Os dados do time ainda estão sendo buscados'
+}
+
+# Número máximo de notícias numa resposta de /api/news/search
+NEWS_SEARCH_MAX = 50
+
+def news_search_data(query, limit=None):
+    """
+    Resposta de /api/news/search, compartilhada pelas rotas Flask e ASGI.
+    
+    Args:
+        query (str): Texto da busca (?q=)
+        limit (str): Número máximo de notícias (?limit=, padrão 10)
+        
+    Returns:
+        tuple: (dict com query e results [{title, date, link, score}], status HTTP)
+    """
+    query = (query or '').strip()
+    if not query:
+        return {'error': 'Informe o texto da busca em q'}, 400
+    try:
+        limit = int(limit or 10)
+    except ValueError:
+        return {'error': 'limit precisa ser um número'}, 400
+    if limit < 1:
+        return {'error': 'limit precisa ser pelo menos 1'}, 400
+    limit = min(limit, NEWS_SEARCH_MAX)
+    results = [dict(item, score=round(score, 4))
+               for score, item in get_news_index().search(query, limit)]
+    return {'query': query, 'results': results}, 200
+
+def teams_data():
+    """Times acompanhados (a FURIA primeiro), com a prioridade e o estado dos dados de cada um."""
+    return [{
+        'slug': team.slug,
+        'name': team.name,
+        'priority': team.priority,
+        'home': team == HOME_TEAM,
+        'loaded': team == HOME_TEAM or team.slug in team_partitions,
+        'live': is_live(team)
+    } for team in ALL_TEAMS]
+
+def team_page(value, route):
+    """
+    Resposta serializada de uma página de um time (ver http_cache).
+    
+    Compartilhada pelas rotas Flask e ASGI (asgi_app.py). As páginas da FURIA
+    são as mesmas de /api/news e /api/lineup.
+    
+    Args:
+        value (str): Slug, número do Draft5 ou nome do time
+        route (str): Página ('news', 'lineup', 'matches' ou 'results')
+        
+    Returns:
+        tuple: (resposta, stale, código HTTP); a resposta é None com 404 (time ou
+        página desconhecidos) e 503 (dados do time ainda não buscados)
+    """
+    team = find_team(value, ALL_TEAMS)
+    page = TEAM_ROUTES.get(route)
+    if team is None or page is None:
+        return None, False, 404
+    if team == HOME_TEAM:
+        if page == 'news':
+            return news_payload(), is_stale(page), 200
+        if page == 'line-up':
+            return lineup_payload(), is_stale(page), 200
+        payload = payload_cache.get(f"team:home:{page}", draft5_cache['version'],
+                                    lambda: home_games(page))
+        return payload, is_stale(page), 200
+
+    data = get_team_data(team)
+    if data is None:
+        return None, False, 503
+    payload = payload_cache.get(f"team:{team.slug}:{page}", data['version'],
+                                lambda: data[page])
+    return payload, page in data['stale'], 200
+
+def send_payload(payload, stale=False):
+    """Envia uma resposta serializada, com 304 quando o cliente já a tem."""
+    status, body, headers = conditional_response(payload, request.headers, stale)
+    return Response(body, status=status, headers=headers)
 
 # Rota principal que renderiza a página inicial
 @app.route('/')
 def home():
-    """Rota principal que renderiza a página inicial"""
-    return render_template('index.html')
+    """Rota principal que serve a página inicial pré-renderizada"""
+    return send_payload(index_payload())
+
+# Início de cada requisição, para o histograma de latência por rota
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+# Com create_app, cada processo (ex.: worker criado por fork) inicia o seu atualizador
+@app.before_request
+def start_refresher_in_worker():
+    if refresher_state['enabled'] and refresher_state['pid'] != os.getpid():
+        start_background_refresh()
+
+@app.after_request
+def observe_latency(response):
+    """Registra o tempo até a resposta (em streaming, até o início do envio)"""
+    started = g.get('request_started')
+    if started is not None:
+        route_latency.get(request.endpoint, route_latency_other).observe(
+            time.perf_counter() - started)
+    return response
+
+# Arquivos gerados pelo build de assets têm o hash no nome: cache imutável
+@app.after_request
+def immutable_assets(response):
+    """Adiciona o Cache-Control de longa duração aos arquivos de static/dist"""
+    if request.path.startswith('/static/dist/') and response.status_code in (200, 304):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    return response
 
 # Rota da API para obter notícias
 @app.route('/api/news')
 def get_news():
     """Rota da API para obter notícias"""
-    news = fetch_furia_news()
-    return jsonify(news)
+    return send_payload(news_payload(), is_stale('news'))
+
+# Rota da API para obter os campeonatos
+@app.route('/api/tournaments')
+def get_tournaments():
+    """Rota da API para obter os campeonatos (cache da página de campeonatos do Draft5)"""
+    return send_payload(tournaments_payload(), is_stale('tournaments'))
+
+# Rota da API com os dados iniciais da página numa única resposta
+@app.route('/api/bootstrap')
+def get_bootstrap():
+    """Rota da API com notícias, campeonatos e line-up numa única resposta"""
+    return send_payload(bootstrap_payload())
 
 # Rota da API para processar mensagens do chat
 @app.route('/api/chat', methods=['POST'])
 def chat():
     """Rota da API para processar mensagens do chat"""
-    data = request.json
-    message = data.get('message', '')
-    response = process_chat_message(message)
-    return jsonify({'response': response})
+    return jsonify(chat_response(request.json))
+
+# Rota da API para processar um lote de mensagens do chat
+@app.route('/api/chat/batch', methods=['POST'])
+def chat_batch():
+    """Rota da API que responde várias mensagens do chat numa única requisição"""
+    payload, status = chat_batch_response(request.get_json(silent=True))
+    return jsonify(payload), status
+
+def stream_since(value):
+    """Versão das notícias que o cliente já tem (Last-Event-ID ou ?since=), ou None."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+# Rota do canal de atualizações das notícias (Server-Sent Events)
+@app.route('/api/news/stream')
+def news_stream():
+    """Rota que envia as notícias e, depois, só as mudanças a cada atualização"""
+    since = stream_since(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    return Response(news_broker.stream(since), mimetype='text/event-stream',
+                    headers=STREAM_HEADERS)
+
+# Rota da API de busca nas notícias
+@app.route('/api/news/search')
+def news_search():
+    """Rota da API que busca nas notícias já vistas (título e texto)"""
+    payload, status = news_search_data(request.args.get('q'), request.args.get('limit'))
+    return jsonify(payload), status
+
+# Rota da API do chat em streaming (Server-Sent Events)
+@app.route('/api/chat/stream', methods=['POST'])
+def chat_stream():
+    """Rota da API que envia a resposta do chat seção por seção"""
+    events = chat_stream_events(request.get_json(silent=True))
+    return Response(events, mimetype='text/event-stream', headers=STREAM_HEADERS)
+
+# Rota da API com os times acompanhados
+@app.route('/api/teams')
+def get_teams():
+    """Rota da API com os times acompanhados e o estado dos dados de cada um"""
+    return jsonify(teams_data())
+
+# Rota da API com uma página (notícias, line-up, partidas ou resultados) de um time
+@app.route('/api/teams/<team>/<page>')
+def get_team_page(team, page):
+    """Rota da API com as notícias, o line-up, as partidas ou os resultados de um time"""
+    payload, stale, status = team_page(team, page)
+    if payload is None:
+        headers = {'Retry-After': '5'} if status == 503 else {}
+        return jsonify({'error': TEAM_PAGE_ERRORS[status]}), status, headers
+    return send_payload(payload, stale)
 
 # Rota da API para obter o line-up atual da FURIA
 @app.route('/api/lineup')
 def get_lineup():
     """Rota da API para obter o line-up atual da FURIA"""
-    lineup = fetch_furia_lineup()
-    return jsonify(lineup)
+    return send_payload(lineup_payload(), is_stale('line-up'))
+
+# Rota com as métricas no formato do Prometheus
+@app.route('/metrics')
+def get_metrics():
+    """Rota com as métricas da aplicação (latência, intenções, caches e Draft5)"""
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+# Histogramas por rota (nome da função), criados depois que todas as rotas existem;
+# 404 e outras requisições sem rota ficam em 'other'
+route_latency = {rule.endpoint: ROUTE_LATENCY.labels(rule.endpoint)
+                 for rule in app.url_map.iter_rules()}
+route_latency_other = ROUTE_LATENCY.labels('other')
+
+@registry.add_collector
+def collect_state():
+    """Valores calculados na hora da coleta a partir dos objetos da aplicação"""
+    fallback = intent_latency[FALLBACK_INTENT].count
+    answered = sum(histogram.count for histogram in intent_latency.values())
+    caches = []
+    for name in ('render', 'payload', 'news'):
+        hits = CACHE_REQUESTS.labels(name, 'hit').value
+        total = hits + CACHE_REQUESTS.labels(name, 'miss').value
+        caches.append(({'cache': name}, hits / total if total else 0.0))
+    return [
+        ('furia_chat_fallback_ratio', 'gauge',
+         'Fração das mensagens do chat respondidas com a intenção padrão',
+         [({}, fallback / answered if answered else 0.0)]),
+        ('furia_cache_hit_ratio', 'gauge', 'Fração de acertos de cada cache', caches),
+        ('furia_chat_sessions', 'gauge', 'Sessões de chat em memória',
+         [({}, len(session_store))]),
+        ('furia_news_stream_subscribers', 'gauge', 'Conexões abertas em /api/news/stream',
+         [({}, news_broker.subscribers)]),
+        ('furia_chat_log_pending', 'gauge', 'Registros das conversas na fila, ainda não gravados',
+         [({}, chat_log.pending)]),
+        ('furia_news_index_documents', 'gauge', 'Notícias no índice de busca',
+         [({}, len(news_index))]),
+        ('furia_news_index_evictions', 'counter',
+         'Notícias removidas do índice de busca pela idade ou pelo limite',
+         [({}, news_index.evictions)]),
+        ('furia_data_version', 'gauge', 'Versão dos dados do Draft5 em memória',
+         [({}, draft5_cache['version'])]),
+        ('furia_data_stale', 'gauge',
+         'Páginas do Draft5 servidas com os últimos dados bons (1) porque a atualização falhou',
+         [({'page': page}, int(page in draft5_cache['stale'])) for page in DRAFT5_PATHS]),
+        ('furia_upstream_circuit_open', 'gauge',
+         'Hosts com o disjuntor aberto ou em teste (1)',
+         [({'host': host}, int(breaker.state != 'closed'))
+          for host, breaker in sorted(draft5_client.guard.breakers.items())]),
+        ('furia_draft5_refresh_leader', 'gauge',
+         'Este processo é o worker que atualiza os dados do Draft5 (1)',
+         [({}, int(shared_refresher is not None and shared_refresher.is_leader))]),
+        ('furia_team_partitions', 'gauge', 'Times acompanhados com os dados em memória',
+         [({}, len(team_partitions))]),
+        ('furia_team_partition_bytes', 'gauge',
+         'Tamanho aproximado dos dados dos times acompanhados em memória',
+         [({}, team_partitions.bytes)]),
+        ('furia_team_partition_evictions', 'counter',
+         'Partições de times descartadas pelo limite de memória',
+         [({}, team_partitions.evictions)]),
+    ]
+
+# Cliente e atualizador em segundo plano do Draft5
+draft5_client = Draft5Client()
+draft5_refresher = Draft5Refresher(publish_draft5_data, client=draft5_client,
+                                   initial=draft5_snapshot)
+
+# Atualização compartilhada entre workers (usa o snapshot, então depende dele)
+shared_refresher = (SharedRefresher(draft5_refresher, SNAPSHOT_PATH, adopt_snapshot)
+                    if SNAPSHOT_PATH else None)
+
+def team_refresh_active():
+    """Os times são atualizados pelo processo que busca o Draft5 (no modo compartilhado, o líder)."""
+    if refresher_state['shared'] and shared_refresher is not None:
+        return shared_refresher.is_leader
+    return True
+
+# Tempo mínimo entre as atualizações de dois times: com o padrão, todos os times
+# cabem no menor intervalo de atualização, e o Draft5 recebe no máximo as páginas
+# de um time a cada espaçamento
+TEAM_REFRESH_SPACING = float(os.getenv('DRAFT5_TEAM_SPACING', '0')) or \
+    min(REFRESH_INTERVAL, LIVE_REFRESH_INTERVAL) / max(len(FOLLOWED_TEAMS), 1)
+
+# Agenda das atualizações dos times acompanhados
+team_scheduler = RefreshScheduler(FOLLOWED_TEAMS, refresh_team, team_refresh_interval,
+                                  TEAM_REFRESH_SPACING, active=team_refresh_active)
+
+# Mensagens respondidas no preload, para deixar as respostas fixas já renderizadas
+PRELOAD_MESSAGES = (
+    'quero ver o line-up',
+    'qual a última notícia',
+    'qual foi o último jogo?',
+    'histórico de partidas',
+    'quando é o próximo jogo?',
+    'qual campeonato',
+    'estatisticas',
+    'asdkjh qwe'
+)
+
+def preload():
+    """
+    Monta, uma única vez, tudo o que as requisições só leem.
+    
+    Lê todas as seções do snapshot (e os snapshots dos times acompanhados, até
+    o limite do LRU), monta as estatísticas dos jogadores, as respostas
+    serializadas das rotas de leitura e as respostas fixas do chat,
+    importa o que o atualizador do Draft5 usa e, por fim, congela os objetos
+    no coletor de lixo (gc.freeze). Chamada antes do fork (gunicorn --preload),
+    faz os workers compartilharem essas páginas de memória em vez de cada um
+    montar a sua cópia: como o coletor não percorre mais os objetos congelados,
+    ele também não suja as páginas ao mexer nos contadores de referência deles.
+    
+    Returns:
+        float: Tempo gasto, em segundos
+    """
+    started = time.perf_counter()
+    news_cache.load_all()
+    draft5_cache.load_all()
+    get_player_stats()
+    get_news_index()
+    load_manifest()
+    for payload in (news_payload, lineup_payload, tournaments_payload, bootstrap_payload,
+                    index_payload):
+        payload()
+    for message in PRELOAD_MESSAGES:
+        process_chat_message(message, SessionState())
+    for team in FOLLOWED_TEAMS:
+        # Partições gravadas em disco (até o limite do LRU)
+        get_team_data(team)
+
+    # Usados só pelo atualizador: importados aqui para entrar nas páginas compartilhadas
+    import draft5_parser  # noqa: F401
+    import requests  # noqa: F401
+
+    gc.collect()
+    gc.freeze()
+    return time.perf_counter() - started
+
+def create_app(preload_data=True, refresh=True, shared=True):
+    """
+    Fábrica da aplicação, para servidores com vários workers.
+    
+    Os dados são montados uma vez, no processo que chama a fábrica; o
+    atualizador do Draft5 é iniciado na primeira requisição de cada processo,
+    já que threads não sobrevivem ao fork. No modo compartilhado, um único
+    worker busca o Draft5 e os demais leem o snapshot gravado por ele (ver
+    shared_refresh); sem snapshot (DRAFT5_SNAPSHOT_PATH vazio), cada worker
+    atualiza os próprios dados.
+    
+    Uso:
+        gunicorn --preload -w 4 -b 127.0.0.1:3000 'flask_app:create_app()'
+    
+    Args:
+        preload_data (bool): Monta os dados antes de atender (ver preload)
+        refresh (bool): Inicia o atualizador do Draft5 em cada processo
+        shared (bool): Elege um único worker para atualizar os dados
+        
+    Returns:
+        Flask: A aplicação
+    """
+    if preload_data:
+        preload()
+    refresher_state['enabled'] = refresh
+    refresher_state['shared'] = shared
+    return app
 
 # Rota principal que inicia o servidor
 if __name__ == '__main__':
+    # Com o reloader do modo debug, só o processo filho atualiza os dados
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_refresh()
     app.run(host='127.0.0.1', port=3000, debug=True) 
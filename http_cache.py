@@ -0,0 +1,212 @@
+"""
+Respostas pré-serializadas e pré-comprimidas para as rotas de leitura.
+
+As rotas /api/news e /api/lineup devolvem dados que só mudam quando o Draft5 é
+atualizado. O PayloadCache serializa cada resposta uma única vez por versão
+dos dados e guarda, junto com o JSON, as variantes gzip e brotli (esta só se o
+pacote brotli estiver instalado), um ETag forte calculado sobre o conteúdo e a
+data da última mudança. Com isso, a maioria das requisições vira uma comparação
+de cabeçalhos respondida com 304, e o resto é a cópia de bytes já prontos.
+A página inicial, pré-renderizada, é servida da mesma forma (encode_html).
+
+O módulo não depende do Flask: conditional_response recebe os cabeçalhos da
+requisição e devolve (status, corpo, cabeçalhos), usado pelas rotas Flask e ASGI.
+"""
+import gzip
+import hashlib
+import json
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from typing import NamedTuple
+
+from metrics import CACHE_REQUESTS
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional: sem ele só há gzip
+    brotli = None
+
+# Cache-Control das respostas: o navegador pode reutilizar por 30 s e depois revalida
+CACHE_CONTROL = 'public, max-age=30, must-revalidate'
+
+# Cache-Control da página inicial: sempre revalida (ela aponta para os assets com hash)
+HTML_CACHE_CONTROL = 'no-cache'
+
+# Aviso enviado quando os dados vêm de uma cópia antiga (Draft5 fora do ar)
+STALE_WARNING = '110 - "Response is Stale"'
+
+# Corpos menores que isso não compensam ser comprimidos
+MIN_COMPRESS_SIZE = 256
+
+
+class EncodedPayload(NamedTuple):
+    """Uma resposta serializada, com suas variantes comprimidas."""
+    version: object
+    etag: str             # Hash do conteúdo (sem aspas e sem sufixo de codificação)
+    last_modified: float  # Momento (epoch) em que o conteúdo mudou pela última vez
+    bodies: dict          # Codificação ('identity', 'gzip', 'br') -> bytes
+    content_type: str = 'application/json'
+    cache_control: str = CACHE_CONTROL
+
+
+def compress_variants(body):
+    """
+    Gera as variantes comprimidas de um corpo já serializado.
+
+    Returns:
+        dict: Codificação -> corpo em bytes
+    """
+    bodies = {'identity': body}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        bodies['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+        if brotli is not None:
+            bodies['br'] = brotli.compress(body, quality=11)
+    return bodies
+
+
+def encode_json(data):
+    """Serializa os dados em JSON e gera as variantes comprimidas."""
+    return compress_variants(json.dumps(data, ensure_ascii=False, separators=(',', ':'),
+                                        sort_keys=True).encode('utf-8'))
+
+
+def encode_html(html):
+    """Codifica uma página já renderizada e gera as variantes comprimidas."""
+    return compress_variants(html.encode('utf-8'))
+
+
+class PayloadCache:
+    """
+    Respostas serializadas por nome, refeitas só quando a versão dos dados muda.
+
+    Se a versão mudar mas o conteúdo continuar igual, o ETag e o Last-Modified
+    são mantidos, então os clientes continuam recebendo 304.
+    """
+
+    def __init__(self, name='payload'):
+        self._payloads = {}
+        self._lock = threading.Lock()
+        self._hit = CACHE_REQUESTS.labels(name, 'hit')
+        self._miss = CACHE_REQUESTS.labels(name, 'miss')
+
+    def get(self, name, version, build, encode=encode_json,
+            content_type='application/json', cache_control=CACHE_CONTROL):
+        """
+        Retorna a resposta serializada de name na versão informada.
+
+        Args:
+            name (str): Nome da resposta (ex.: 'news')
+            version: Versão atual dos dados
+            build (callable): Função que retorna os dados a serializar
+            encode (callable): Serialização (encode_json ou encode_html)
+            content_type (str): Content-Type da resposta
+            cache_control (str): Cache-Control da resposta
+
+        Returns:
+            EncodedPayload: Resposta pronta para ser enviada
+        """
+        payload = self._payloads.get(name)
+        if payload is not None and payload.version == version:
+            self._hit.inc()
+            return payload
+
+        self._miss.inc()
+        bodies = encode(build())
+        etag = hashlib.sha1(bodies['identity']).hexdigest()[:20]
+        with self._lock:
+            current = self._payloads.get(name)
+            if current is not None and current.etag == etag:
+                payload = current._replace(version=version)
+            else:
+                payload = EncodedPayload(version, etag, time.time(), bodies,
+                                         content_type, cache_control)
+            self._payloads[name] = payload
+        return payload
+
+    def discard(self, *names):
+        """Remove as respostas guardadas com esses nomes (ex.: as de um time descartado)."""
+        with self._lock:
+            for name in names:
+                self._payloads.pop(name, None)
+
+
+def accepted_encodings(header):
+    """Codificações aceitas segundo o cabeçalho Accept-Encoding (ignora as com q=0)."""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        params = params.replace(' ', '')
+        if coding and params not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            accepted.add(coding.lower())
+    return accepted
+
+
+def choose_encoding(payload, accept_encoding):
+    """Escolhe a melhor variante disponível que o cliente aceita (br > gzip > identity)."""
+    accepted = accepted_encodings(accept_encoding)
+    for coding in ('br', 'gzip'):
+        if coding in payload.bodies and (coding in accepted or '*' in accepted):
+            return coding
+    return 'identity'
+
+
+def _etag_matches(if_none_match, etag):
+    if if_none_match.strip() == '*':
+        return True
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        if tag.startswith('W/'):
+            tag = tag[2:]
+        # Todas as variantes (gzip, br...) compartilham o hash do conteúdo
+        if tag.strip('"').split('-', 1)[0] == etag:
+            return True
+    return False
+
+
+def _not_modified_since(if_modified_since, last_modified):
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return False
+    return int(last_modified) <= since
+
+
+def conditional_response(payload, request_headers, stale=False):
+    """
+    Monta a resposta para uma requisição, respondendo 304 quando possível.
+
+    Args:
+        payload (EncodedPayload): Resposta serializada
+        request_headers (Mapping): Cabeçalhos da requisição
+        stale (bool): Os dados são os últimos bons de uma fonte que está
+            falhando; a resposta leva o cabeçalho Warning (STALE_WARNING)
+
+    Returns:
+        tuple: (status, corpo em bytes, dicionário de cabeçalhos)
+    """
+    coding = choose_encoding(payload, request_headers.get('Accept-Encoding'))
+    etag = payload.etag if coding == 'identity' else f'{payload.etag}-{coding}'
+    headers = {
+        'ETag': f'"{etag}"',
+        'Last-Modified': formatdate(payload.last_modified, usegmt=True),
+        'Cache-Control': payload.cache_control,
+        'Vary': 'Accept-Encoding'
+    }
+    if stale:
+        headers['Warning'] = STALE_WARNING
+
+    if_none_match = request_headers.get('If-None-Match')
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, payload.etag)
+    else:
+        if_modified_since = request_headers.get('If-Modified-Since')
+        not_modified = bool(if_modified_since) and _not_modified_since(
+            if_modified_since, payload.last_modified)
+    if not_modified:
+        return 304, b'', headers
+
+    headers['Content-Type'] = payload.content_type
+    if coding != 'identity':
+        headers['Content-Encoding'] = coding
+    return 200, payload.bodies[coding], headers
@@ -0,0 +1,363 @@
+"""
+Identificação da intenção das mensagens do chat.
+
+Todas as palavras-chave de todas as intenções, os padrões de data e os nomes
+das entidades (jogadores, mapas, torneios) são compilados uma única vez numa
+só expressão regular (em forma de trie, com os prefixos comuns fatorados). Cada
+mensagem é normalizada (minúsculas e sem acentos, então "noticia" e "notícia"
+são iguais) e percorrida uma única vez; a intenção escolhida é a de maior
+prioridade entre as encontradas, e não depende mais da ordem dos if/elif.
+
+Intenções de contexto (ex.: confirmar as estatísticas do último jogo) só valem
+quando a sessão está no estado correspondente, e intenções com requires só
+valem quando a mensagem cita uma entidade daquele tipo (ex.: "stats do FalleN").
+Intenções com topic recebem o resto da mensagem depois da palavra-chave (ex.:
+"notícias sobre o FalleN" vira o assunto "o fallen").
+
+Quando a regex já decide a intenção (nenhuma intenção de prioridade maior
+depende de uma entidade que faltou, e a escolhida não usa entidades na
+resposta), a busca aproximada das palavras é pulada. As últimas mensagens
+identificadas ficam num cache (mensagem e contexto da sessão), já que os
+torcedores repetem muito as mesmas perguntas ("sim", "ultimo jogo").
+
+Palavras que a regex não reconhece são procuradas no EntityIndex
+(entity_index.py), que aceita erros de digitação: "kscerto" vira KSCERATO e
+"mongolz" vira The MongolZ. Se nenhuma intenção for encontrada, as palavras
+também são comparadas com as palavras-chave ("notica", "campeonto").
+"""
+import os
+import re
+import unicodedata
+from operator import attrgetter
+from typing import NamedTuple
+
+from entity_index import MIN_FUZZY_LENGTH, WORD_RE, EntityIndex, FuzzyIndex
+
+
+class Intent(NamedTuple):
+    """Definição de uma intenção do chat."""
+    name: str
+    priority: int
+    keywords: tuple
+    context: str = None  # Atributo do SessionState que precisa estar ativo
+    requires: str = None  # Tipo de entidade que a mensagem precisa citar
+    topic: bool = False  # O texto depois da palavra-chave vai em entities['topic']
+    uses: tuple = ()  # Tipos de entidade usados na resposta (procurados também com erros)
+
+
+# Intenções conhecidas, em ordem decrescente de prioridade.
+# Uma intenção sem palavras-chave vale para qualquer mensagem em que o contexto
+# e a entidade exigidos estejam presentes (ex.: só o nome de um jogador).
+INTENTS = (
+    Intent('stats_by_date', 100, (), context='esperando_data_estatisticas'),
+    Intent('confirm_stats', 90, ('sim', 'estatisticas', 'estatistica', 'stats'),
+           context='esperando_estatisticas'),
+    Intent('decline_stats', 85, ('nao',), context='esperando_estatisticas'),
+    Intent('top_players', 84, ('top', 'ranking', 'maior', 'melhor'),
+           uses=('metrics', 'tournaments')),
+    Intent('map_win_rate', 83, ('win rate', 'winrate', 'aproveitamento', 'taxa de vitoria'),
+           uses=('maps',)),
+    Intent('player_average', 82, ('media', 'medio', 'desempenho'), uses=('players',)),
+    Intent('player_average', 81, ('stats', 'estatisticas', 'estatistica', 'numeros'),
+           requires='players'),
+    Intent('ask_stats_date', 80, ('especificas', 'stats', 'estatisticas')),
+    Intent('goodbye', 70, ('tchau', 'ate logo', 'adeus', 'muito obrigado', 'obrigado', 'flw')),
+    Intent('news_search', 61, ('noticias sobre', 'noticia sobre', 'novidades sobre',
+                               'novidade sobre', 'saiu sobre', 'saiu algo sobre'), topic=True),
+    Intent('news', 60, ('noticia', 'novidade')),
+    Intent('opponent_history', 55, ('contra', 'x', 'vs', 'confronto', 'jogos', 'historico',
+                                    'resultados', 'ultimo jogo'), requires='opponents'),
+    Intent('last_game', 50, ('resultado do', 'ultimo jogo', 'ultimo resultado da',
+                             'ultima partida', 'ultima')),
+    Intent('history', 40, ('ultimos jogos', 'historico', 'ultimos', 'resultados')),
+    Intent('next_game', 30, ('proximo jogo', 'proxima partida', 'proximos jogos')),
+    Intent('tournament', 20, ('campeonato', 'torneio')),
+    Intent('lineup', 10, ('line-up', 'lineup', 'jogadores', 'equipe', 'time')),
+    Intent('player_average', 5, (), requires='players'),
+    Intent('opponent_history', 4, (), requires='opponents'),
+    Intent('map_win_rate', 3, (), requires='maps'),
+    Intent('news', 2, (), requires='news'),
+    Intent('tournament_history', 1, (), requires='tournaments'),
+)
+
+# Mensagens identificadas guardadas por IntentMatcher (0 desliga o cache)
+INTENT_CACHE_SIZE = int(os.getenv('INTENT_CACHE_SIZE', '4096'))
+
+# Intenção usada quando nada é reconhecido
+FALLBACK_INTENT = 'fallback'
+
+# Datas como 8/4, 08/04/2025, 08-04-25, 2025-04-08, hoje, ontem ou anteontem
+DATE_PATTERN = r'\d{4}-\d{1,2}-\d{1,2}|\d{1,2}[/-]\d{1,2}(?:[/-]\d{2,4})?|hoje|ontem|anteontem'
+
+
+# Nome terminado em número ("dust2", "m80"): também reconhecido com espaço ("dust 2")
+NUMBER_SUFFIX_RE = re.compile(r'(.*[a-z])(\d+)')
+
+# Palavras comuns nas mensagens que não são comparadas com os nomes das entidades
+STOPWORDS = frozenset((
+    'quero', 'quais', 'quando', 'sobre', 'ainda', 'todos', 'agora', 'depois', 'antes',
+    'furia', 'muito', 'mostra', 'mostrar', 'saber', 'jogou', 'jogar', 'jogador',
+    'partida', 'partidas', 'galera', 'vamos', 'valeu', 'pessoal', 'torcedor', 'vitoria'
+))
+
+
+class IntentMatch(NamedTuple):
+    """Resultado da identificação: intenção e entidades extraídas da mensagem."""
+    intent: str
+    entities: dict
+
+
+def normalize(text):
+    """Converte o texto para minúsculas e remove acentos (e emojis)."""
+    text = text.casefold()
+    if text.isascii():
+        return text
+    return unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
+
+
+def trie_pattern(words):
+    """
+    Monta uma expressão regular em forma de trie para as palavras informadas.
+
+    Prefixos comuns são fatorados (ex.: "ultim(?:a|os)"), então o motor de
+    regex descarta as alternativas pelo primeiro caractere em vez de testar
+    palavra por palavra.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = None
+
+    def build(node):
+        end = '' in node
+        branches = [re.escape(char) + build(child)
+                    for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and not end:
+            return branches[0]
+        return '(?:%s)%s' % ('|'.join(branches), '?' if end else '')
+
+    return build(trie)
+
+
+class IntentMatcher:
+    """
+    Identificador de intenções compilado uma única vez.
+
+    Args:
+        intents (iterable): Definições das intenções (padrão: INTENTS)
+        entities (dict): Nomes reconhecidos como entidade, por tipo: uma lista ou
+            um dict {apelido: nome} (ex.: {'players': {'Kaike Cerato': 'KSCERATO'},
+            'maps': ['Inferno']})
+        phrases (dict): Textos longos reconhecidos quando a mensagem se parece
+            com eles, por tipo (ex.: {'news': [títulos das notícias]})
+        cache_size (int): Número de mensagens identificadas guardadas
+    """
+
+    def __init__(self, intents=INTENTS, entities=None, phrases=None,
+                 cache_size=INTENT_CACHE_SIZE):
+        self.intents = sorted(intents, key=lambda intent: -intent.priority)
+        self.cache_size = cache_size
+        self._cache = {}  # (mensagem, context_key) -> IntentMatch
+        self.always = [intent for intent in self.intents if not intent.keywords]
+        # Atributos do SessionState que influenciam o resultado de match
+        self.contexts = tuple(sorted({intent.context for intent in self.intents if intent.context}))
+        self._context = attrgetter(*self.contexts) if self.contexts else (lambda state: None)
+
+        # Palavra-chave -> intenções que ela ativa
+        self.keywords = {}
+        for intent in self.intents:
+            for keyword in intent.keywords:
+                self.keywords.setdefault(normalize(keyword), []).append(intent)
+
+        # Tipo da entidade -> {nome normalizado: nome original}. Um dict
+        # {apelido: nome} reconhece vários nomes para a mesma entidade
+        self.entities = {
+            kind: {normalize(alias): name for alias, name in
+                   (names.items() if isinstance(names, dict) else ((n, n) for n in names))}
+            for kind, names in (entities or {}).items() if names
+        }
+        for names in self.entities.values():
+            for alias, name in list(names.items()):
+                found = NUMBER_SUFFIX_RE.fullmatch(alias)
+                if found:
+                    names.setdefault(f'{found.group(1)} {found.group(2)}', name)
+        phrases = {
+            kind: {normalize(text): text for text in texts}
+            for kind, texts in (phrases or {}).items() if texts
+        }
+        self.index = EntityIndex(self.entities, phrases)
+        # Intenções que usam os textos longos (ex.: 'news' com o título da notícia)
+        self.phrase_intents = {intent.name for intent in self.intents
+                               if intent.requires in phrases}
+
+        # Palavras das palavras-chave, para a busca com erros de digitação. Uma
+        # palavra de uma palavra-chave composta que leva a intenções diferentes
+        # (ex.: "partida", de "ultima partida" e "proxima partida") fica de fora.
+        parts = {}
+        for keyword in self.keywords:
+            words = WORD_RE.findall(keyword)
+            if len(words) > 1:
+                for word in words:
+                    if len(word) >= MIN_FUZZY_LENGTH and word not in STOPWORDS:
+                        parts.setdefault(word, set()).update(self.keywords[keyword])
+        self.keyword_index = FuzzyIndex()
+        for keyword, intents in self.keywords.items():
+            if len(keyword) >= MIN_FUZZY_LENGTH and WORD_RE.fullmatch(keyword):
+                for intent in intents:
+                    self.keyword_index.add(keyword, intent)
+        for word, intents in parts.items():
+            if word not in self.keywords and len({intent.name for intent in intents}) == 1:
+                for intent in intents:
+                    self.keyword_index.add(word, intent)
+        # Palavras que nunca são comparadas com os nomes das entidades
+        self.plain_words = STOPWORDS | set(self.keyword_index.terms) | set(parts)
+
+        # Uma única regex: só tenta casar no início de palavras e, na trie, o
+        # quantificador guloso faz "ultimo jogo" ganhar de "ultimo"
+        pattern = [r'(?P<date>(?:%s)\b)' % DATE_PATTERN,
+                   r'(?P<number>\d+\b)']
+        # Entidades antes das palavras-chave: "top" não pode esconder um jogador "toppz"
+        for kind, names in self.entities.items():
+            pattern.append(r'(?P<%s>%s\b)' % (kind, trie_pattern(names)))
+        pattern.append(r'(?P<keyword>%s)' % trie_pattern(self.keywords))
+        # Primeiros caracteres possíveis: a regex nem tenta as alternativas nas
+        # outras posições (o \b sozinho não deixa o motor descartá-las)
+        starts = set('0123456789hoa') | {word[0] for word in self.keywords}
+        starts |= {name[0] for names in self.entities.values() for name in names}
+        self.pattern = re.compile(r'(?=[%s])\b(?:%s)' % (
+            ''.join(re.escape(char) for char in sorted(starts)), '|'.join(pattern)))
+
+    def context_key(self, state):
+        """
+        Retorna os valores dos atributos de contexto do estado.
+
+        Duas chamadas de match com a mesma mensagem e a mesma context_key têm o
+        mesmo resultado, o que permite reaproveitá-lo (ex.: num lote de mensagens).
+        """
+        if state is None:
+            return None
+        return self._context(state)
+
+    def match(self, message, state=None):
+        """
+        Identifica a intenção da mensagem.
+
+        Args:
+            message (str): Mensagem do usuário
+            state (SessionState): Estado da sessão (habilita intenções de contexto)
+
+        Returns:
+            IntentMatch: Intenção de maior prioridade e entidades (date, number,
+            topic e uma lista para cada tipo de entidade conhecida).
+            A data vem como foi digitada; match_store.parse_date a interpreta.
+            O resultado pode ser compartilhado com outras chamadas: não altere
+            as entidades.
+        """
+        key = (message, self.context_key(state))
+        found = self._cache.get(key)
+        if found is None:
+            found = self._match(message, state)
+            if self.cache_size > 0:
+                if len(self._cache) >= self.cache_size:
+                    # Sai a mais antiga (outra thread pode tê-la tirado antes)
+                    self._cache.pop(next(iter(self._cache), None), None)
+                self._cache[key] = found
+        return found
+
+    def _match(self, message, state):
+        text = normalize(message)
+        candidates = []
+        entities = {}
+        spans = []
+        topics = {}  # Intenção -> fim da última palavra-chave dela na mensagem
+        for found in self.pattern.finditer(text):
+            kind = found.lastgroup
+            value = found.group(kind)
+            spans.append(found.span())
+            if kind == 'keyword':
+                candidates.extend(self.keywords[value])
+                for intent in self.keywords[value]:
+                    topics[intent] = found.end()
+            elif kind == 'date':
+                entities.setdefault('date', value)
+            elif kind == 'number':
+                entities.setdefault('number', int(value))
+            else:
+                entities.setdefault(kind, []).append(self.entities[kind][value])
+
+        best = self._choose(candidates, state, entities)
+        if self._decided(best, candidates, entities):
+            words = ()
+        else:
+            words = list(self._loose_words(text, spans))
+            for word in words:
+                if word not in self.plain_words:
+                    self._add_entities(entities, self.index.find_word(word))
+            best = self._choose(candidates, state, entities)
+        if best is None:
+            for word in words:
+                found = self.keyword_index.lookup(word)
+                if found:
+                    candidates.extend(found[1])
+            best = self._choose(candidates, state, entities)
+        if best is None or best.name in self.phrase_intents:
+            # Textos longos (ex.: títulos das notícias): só quando podem mudar a resposta
+            self._add_entities(entities, self.index.find_phrase(text))
+            best = best or self._choose((), state, entities)
+        if best is not None and best.topic and best in topics:
+            topic = ' '.join(WORD_RE.findall(text[topics[best]:]))
+            if topic:
+                entities['topic'] = topic
+
+        return IntentMatch(best.name if best else FALLBACK_INTENT, entities)
+
+    @staticmethod
+    def _loose_words(text, spans):
+        """Palavras da mensagem (com tamanho para a busca aproximada) fora do que a regex reconheceu."""
+        for word in WORD_RE.finditer(text):
+            if len(word.group()) < MIN_FUZZY_LENGTH or word.group().isdigit():
+                continue
+            # Uma palavra-chave curta no começo ("x" em "xantares") não cobre a palavra
+            start, end = word.span()
+            if not any(begin <= start and end <= finish for begin, finish in spans):
+                yield word.group()
+
+    @staticmethod
+    def _add_entities(entities, found):
+        for kind, name in found:
+            names = entities.setdefault(kind, [])
+            if name not in names:
+                names.append(name)
+
+    def _decided(self, best, candidates, entities):
+        """
+        Indica se a intenção escolhida só com a regex não muda com a busca aproximada.
+
+        Muda se a intenção usa entidades na resposta ou se alguma candidata de
+        prioridade maior ficou de fora por falta de uma entidade.
+        """
+        if best is None or best.uses:
+            return False
+        for intent in (*candidates, *self.always):
+            if intent.priority > best.priority and intent.requires is not None \
+                    and intent.requires not in entities:
+                return False
+        return True
+
+    def _choose(self, candidates, state, entities):
+        """Intenção de maior prioridade entre as candidatas cujo contexto e entidade estão presentes."""
+        best = None
+        for intent in (*candidates, *self.always):
+            if best is not None and best.priority >= intent.priority:
+                continue
+            if intent.context is not None and (state is None
+                                               or not getattr(state, intent.context)):
+                continue
+            if intent.requires is not None and intent.requires not in entities:
+                continue
+            best = intent
+        return best
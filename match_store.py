@@ -0,0 +1,369 @@
+"""
+Repositório de partidas da FURIA indexado, guardado num arquivo SQLite local.
+
+Cada partida é gravada com os dados completos (no mesmo formato de
+fetch_furia_results) e com colunas indexadas por data, adversário, torneio,
+mapa e jogador, de modo que as consultas do chat continuam abaixo de um
+milissegundo mesmo com milhares de partidas no arquivo.
+
+As datas podem ser informadas de forma flexível: "8/4", "08-04-2025",
+"2025-04-08", "hoje", "ontem" ou "anteontem".
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, timedelta
+
+from intents import normalize
+
+# Caminho padrão do banco de partidas
+MATCH_DB_PATH = os.getenv('MATCH_DB_PATH', os.path.join('data', 'matches.sqlite3'))
+
+# Intervalo mínimo (em segundos) entre duas leituras da versão gravada no banco,
+# que também muda com gravações de outros processos (ex.: backfill.py)
+MATCH_STORE_POLL_INTERVAL = float(os.getenv('MATCH_STORE_POLL_INTERVAL', '1'))
+
+# Datas dd/mm/aaaa, o formato das partidas gravadas (o de fetch_furia_results)
+DISPLAY_DATE_RE = re.compile(r'\d{2}/\d{2}/\d{4}')
+
+# Datas relativas aceitas (em dias antes de hoje)
+RELATIVE_DAYS = {'hoje': 0, 'ontem': 1, 'anteontem': 2}
+
+# As tabelas maps e player_stats repetem a data da partida para que as consultas
+# por mapa e por jogador saiam ordenadas direto do índice, sem ordenar o JOIN.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS matches (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL,
+    opponent TEXT NOT NULL,
+    opponent_key TEXT NOT NULL,
+    tournament TEXT NOT NULL,
+    tournament_key TEXT NOT NULL,
+    result TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    UNIQUE (date, opponent_key)
+);
+CREATE INDEX IF NOT EXISTS matches_date ON matches (date);
+CREATE INDEX IF NOT EXISTS matches_month_day ON matches (substr(date, 6), date);
+CREATE INDEX IF NOT EXISTS matches_opponent ON matches (opponent_key, date);
+CREATE INDEX IF NOT EXISTS matches_tournament ON matches (tournament_key, date);
+
+CREATE TABLE IF NOT EXISTS maps (
+    match_id INTEGER NOT NULL REFERENCES matches (id) ON DELETE CASCADE,
+    date TEXT NOT NULL,
+    map TEXT NOT NULL,
+    map_key TEXT NOT NULL,
+    score TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS maps_map ON maps (map_key, date);
+CREATE INDEX IF NOT EXISTS maps_match ON maps (match_id);
+
+CREATE TABLE IF NOT EXISTS player_stats (
+    match_id INTEGER NOT NULL REFERENCES matches (id) ON DELETE CASCADE,
+    date TEXT NOT NULL,
+    team TEXT NOT NULL,
+    player TEXT NOT NULL,
+    player_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS player_stats_player ON player_stats (player_key, date);
+CREATE INDEX IF NOT EXISTS player_stats_match ON player_stats (match_id);
+
+CREATE TABLE IF NOT EXISTS store_version (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO store_version (id, value) VALUES (1, 0);
+"""
+
+
+def to_iso(display_date):
+    """Converte uma data dd/mm/aaaa para aaaa-mm-dd."""
+    day, month, year = display_date.split('/')
+    return f"{year}-{month}-{day}"
+
+
+def to_display(iso_date):
+    """Converte uma data aaaa-mm-dd para dd/mm/aaaa."""
+    year, month, day = iso_date.split('-')
+    return f"{day}/{month}/{year}"
+
+
+def parse_date(text, today=None):
+    """
+    Interpreta uma data digitada pelo usuário.
+
+    Args:
+        text (str): Data como "8/4", "08-04-2025", "2025-04-08" ou "ontem"
+        today (date): Data de referência para datas relativas (padrão: hoje)
+
+    Returns:
+        tuple: (ano, mês, dia) com ano None quando não foi informado, ou None
+        se o texto não for uma data válida
+    """
+    if not text:
+        return None
+    text = normalize(text.strip())
+
+    if text in RELATIVE_DAYS:
+        day = (today or date.today()) - timedelta(days=RELATIVE_DAYS[text])
+        return day.year, day.month, day.day
+
+    found = re.fullmatch(r'(\d{4})-(\d{1,2})-(\d{1,2})', text)
+    if found:
+        year, month, day = (int(part) for part in found.groups())
+    else:
+        found = re.fullmatch(r'(\d{1,2})[/-](\d{1,2})(?:[/-](\d{2}|\d{4}))?', text)
+        if not found:
+            return None
+        day, month = int(found.group(1)), int(found.group(2))
+        year = found.group(3)
+        if year is not None:
+            year = int(year) + (2000 if len(year) == 2 else 0)
+
+    try:
+        date(year or 2000, month, day)
+    except ValueError:
+        return None
+    return year, month, day
+
+
+class MatchStore:
+    """
+    Repositório de partidas em SQLite.
+
+    Cada thread (e cada processo, depois de um fork) usa a sua própria
+    conexão; o banco roda em modo WAL para que leituras e gravações não se
+    bloqueiem.
+
+    Cada gravação incrementa o contador da tabela store_version, na mesma
+    transação; version o relê a cada poll_interval segundos, de modo que
+    gravações de outros processos no mesmo arquivo também mudam a versão.
+
+    Args:
+        path (str): Caminho do arquivo SQLite (":memory:" para testes rápidos)
+        poll_interval (float): Intervalo mínimo entre duas leituras da versão
+    """
+
+    def __init__(self, path=MATCH_DB_PATH, poll_interval=MATCH_STORE_POLL_INTERVAL):
+        self.path = path
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        self._pid = os.getpid()
+        self._write_lock = threading.Lock()
+        self._memory = None
+        self.poll_interval = poll_interval
+        self._version = None
+        self._checked = 0.0  # Momento (monotonic) da última leitura da versão
+        if path == ':memory:':
+            # Banco em memória precisa de uma única conexão compartilhada
+            self._memory = self._connect(check_same_thread=False)
+        connection = self._connection()
+        connection.executescript(SCHEMA)
+        connection.commit()
+
+    def _connect(self, **kwargs):
+        connection = sqlite3.connect(self.path, **kwargs)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA foreign_keys=ON')
+        return connection
+
+    def _connection(self):
+        if self._memory is not None:
+            return self._memory
+        if self._pid != os.getpid():
+            # Processo criado por fork: a conexão herdada do pai não pode ser usada
+            self._local = threading.local()
+            self._pid = os.getpid()
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def upsert_matches(self, results):
+        """
+        Grava (ou atualiza) partidas no formato de fetch_furia_results.
+
+        Uma partida já gravada (mesma data e adversário) é atualizada: os campos
+        que a nova versão não traz (ex.: o 'link' das partidas do backfill)
+        continuam os gravados. Partidas com data fora do formato dd/mm/aaaa são
+        ignoradas. A versão só muda se alguma partida mudou: regravar os mesmos
+        dados (ex.: os resultados conhecidos, a cada início da aplicação) não
+        invalida os caches que dependem dela.
+
+        Args:
+            results (list): Lista de partidas
+
+        Returns:
+            int: Quantidade de partidas novas ou alteradas
+        """
+        results = [result for result in results
+                   if DISPLAY_DATE_RE.fullmatch(str(result.get('data', '')))]
+        connection = self._connection()
+        written = 0
+        with self._write_lock, connection:
+            for result in results:
+                iso_date = to_iso(result['data'])
+                opponent_key = normalize(result['adversario'])
+                row = connection.execute(
+                    "SELECT payload FROM matches WHERE date = ? AND opponent_key = ?",
+                    (iso_date, opponent_key)).fetchone()
+                if row is not None:
+                    stored = json.loads(row[0])
+                    # Campos que a nova versão não traz (ex.: o link do backfill) continuam
+                    result = dict(stored, **result)
+                    if result == stored:
+                        continue
+                    connection.execute(
+                        "DELETE FROM matches WHERE date = ? AND opponent_key = ?",
+                        (iso_date, opponent_key))
+                cursor = connection.execute(
+                    "INSERT INTO matches (date, opponent, opponent_key, tournament,"
+                    " tournament_key, result, payload) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (iso_date, result['adversario'], opponent_key, result['torneio'],
+                     normalize(result['torneio']), result['resultado'],
+                     json.dumps(result, ensure_ascii=False)))
+                match_id = cursor.lastrowid
+                connection.executemany(
+                    "INSERT INTO maps (match_id, date, map, map_key, score)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(match_id, iso_date, mapa, normalize(mapa), placar)
+                     for mapa, placar in result.get('placares', {}).items()])
+                connection.executemany(
+                    "INSERT INTO player_stats (match_id, date, team, player, player_key)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    [(match_id, iso_date, team, player, normalize(player))
+                     for team, players in result.get('estatisticas', {}).items()
+                     for player in players])
+                written += 1
+            if written:
+                connection.execute("UPDATE store_version SET value = value + 1")
+                self._version = connection.execute(
+                    "SELECT value FROM store_version").fetchone()[0]
+                self._checked = time.monotonic()
+        return written
+
+    @property
+    def version(self):
+        """
+        Versão dos dados, que muda a cada gravação (deste ou de outro processo).
+
+        Gravações de outros processos aparecem em até poll_interval segundos.
+        """
+        now = time.monotonic()
+        if self._version is None or now - self._checked >= self.poll_interval:
+            self._version = self._connection().execute(
+                "SELECT value FROM store_version").fetchone()[0]
+            self._checked = now
+        return self._version
+
+    def _payloads(self, query, params):
+        rows = self._connection().execute(query, params).fetchall()
+        return [json.loads(payload) for (payload,) in rows]
+
+    def get_by_date(self, iso_date):
+        """Retorna as partidas do dia (aaaa-mm-dd)."""
+        return self._payloads(
+            "SELECT payload FROM matches WHERE date = ? ORDER BY id", (iso_date,))
+
+    def resolve_date(self, text, today=None):
+        """
+        Encontra a data de partida que corresponde ao texto digitado.
+
+        Quando o ano não é informado ("8/4"), usa a partida mais recente
+        naquele dia e mês.
+
+        Returns:
+            str: Data aaaa-mm-dd de uma partida existente, ou None
+        """
+        parsed = parse_date(text, today)
+        if parsed is None:
+            return None
+        year, month, day = parsed
+        connection = self._connection()
+        if year is None:
+            row = connection.execute(
+                "SELECT date FROM matches WHERE substr(date, 6) = ?"
+                " ORDER BY date DESC LIMIT 1", (f"{month:02d}-{day:02d}",)).fetchone()
+        else:
+            row = connection.execute(
+                "SELECT date FROM matches WHERE date = ? LIMIT 1",
+                (f"{year:04d}-{month:02d}-{day:02d}",)).fetchone()
+        return row[0] if row else None
+
+    def find_by_date(self, text, today=None):
+        """Retorna as partidas da data digitada pelo usuário (ver resolve_date)."""
+        iso_date = self.resolve_date(text, today)
+        return self.get_by_date(iso_date) if iso_date else []
+
+    def by_opponent(self, opponent, limit=20):
+        """Retorna as partidas contra o adversário, da mais recente para a mais antiga."""
+        return self._payloads(
+            "SELECT payload FROM matches WHERE opponent_key = ?"
+            " ORDER BY date DESC LIMIT ?", (normalize(opponent), limit))
+
+    def by_tournament(self, tournament, limit=20):
+        """Retorna as partidas do torneio, da mais recente para a mais antiga."""
+        return self._payloads(
+            "SELECT payload FROM matches WHERE tournament_key = ?"
+            " ORDER BY date DESC LIMIT ?", (normalize(tournament), limit))
+
+    def by_map(self, map_name, limit=20):
+        """Retorna as partidas em que o mapa foi jogado."""
+        return self._payloads(
+            "SELECT m.payload FROM maps p JOIN matches m ON m.id = p.match_id"
+            " WHERE p.map_key = ? ORDER BY p.date DESC LIMIT ?",
+            (normalize(map_name), limit))
+
+    def by_player(self, player, limit=20):
+        """Retorna as partidas em que o jogador tem estatísticas registradas."""
+        return self._payloads(
+            "SELECT m.payload FROM player_stats p JOIN matches m ON m.id = p.match_id"
+            " WHERE p.player_key = ? ORDER BY p.date DESC LIMIT ?",
+            (normalize(player), limit))
+
+    def latest(self, limit=10):
+        """Retorna as partidas mais recentes."""
+        return self._payloads(
+            "SELECT payload FROM matches ORDER BY date DESC, id LIMIT ?", (limit,))
+
+    def available_dates(self, limit=None):
+        """
+        Lista as datas com partidas registradas, da mais recente para a mais antiga.
+
+        Returns:
+            list: Datas no formato dd/mm/aaaa
+        """
+        rows = self._connection().execute(
+            "SELECT DISTINCT date FROM matches ORDER BY date DESC LIMIT ?",
+            (-1 if limit is None else limit,)).fetchall()
+        return [to_display(iso_date) for (iso_date,) in rows]
+
+    def opponents(self):
+        """Adversários das partidas registradas, do jogo mais recente para o mais antigo."""
+        rows = self._connection().execute(
+            "SELECT opponent FROM matches GROUP BY opponent_key"
+            " ORDER BY max(date) DESC").fetchall()
+        return [opponent for (opponent,) in rows]
+
+    def tournaments(self):
+        """Torneios das partidas registradas, do mais recente para o mais antigo."""
+        rows = self._connection().execute(
+            "SELECT tournament FROM matches GROUP BY tournament_key"
+            " ORDER BY max(date) DESC").fetchall()
+        return [tournament for (tournament,) in rows]
+
+    def links(self):
+        """Links do Draft5 das partidas gravadas que têm um (ex.: as do backfill)."""
+        rows = self._connection().execute(
+            "SELECT json_extract(payload, '$.link') FROM matches"
+            " WHERE json_extract(payload, '$.link') IS NOT NULL").fetchall()
+        return {link for (link,) in rows}
+
+    def count(self):
+        """Retorna o número de partidas registradas."""
+        return self._connection().execute("SELECT COUNT(*) FROM matches").fetchone()[0]
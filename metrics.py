@@ -0,0 +1,285 @@
+"""
+Métricas da aplicação no formato texto do Prometheus (rota /metrics).
+
+Contadores e histogramas com rótulos fixos, pensados para o caminho quente:
+- cada combinação de rótulos é criada uma vez (labels) e guardada pelo
+  chamador, então registrar uma observação não aloca dicionário de rótulos;
+- cada thread incrementa a sua própria lista de contadores, alocada na
+  primeira observação; só a leitura (/metrics) soma as listas, então não há
+  lock por observação.
+
+Métricas que já existem em outros objetos (ex.: acertos do render_cache) são
+lidas na hora da coleta por funções registradas com add_collector.
+
+Num processo criado por fork (ex.: worker do gunicorn --preload) os contadores
+começam do zero, para que o que o processo pai registrou antes do fork não
+apareça repetido em todos os workers.
+"""
+import os
+import threading
+import weakref
+from bisect import bisect_left
+
+# Limites (em segundos) dos histogramas de latência
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class _Sharded:
+    """
+    Lista de contadores com uma cópia por thread.
+
+    As listas das threads que já terminaram são somadas numa lista base e
+    descartadas quando uma nova thread começa a observar (ou na coleta), para
+    que servidores que criam uma thread por requisição não acumulem listas.
+    """
+    __slots__ = ('size', '_local', '_shards', '_retired', '_lock', '__weakref__')
+
+    def __init__(self, size):
+        self.size = size
+        self.reset()
+        _all_sharded.add(self)
+
+    def reset(self):
+        """Zera os contadores e esquece as listas de todas as threads."""
+        self._local = threading.local()
+        self._shards = []  # (thread, lista)
+        self._retired = [0] * self.size
+        self._lock = threading.Lock()
+
+    def shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = [0] * self.size
+            with self._lock:
+                self._retire()
+                self._shards.append((threading.current_thread(), shard))
+            self._local.shard = shard
+            return shard
+
+    def _retire(self):
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                for i, value in enumerate(shard):
+                    self._retired[i] += value
+        self._shards = alive
+
+    def totals(self):
+        with self._lock:
+            self._retire()
+            totals = list(self._retired)
+            for _, shard in self._shards:
+                for i, value in enumerate(shard):
+                    totals[i] += value
+        return totals
+
+
+_all_sharded = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for sharded in list(_all_sharded):
+        sharded.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class Counter:
+    """Contador de uma combinação de rótulos."""
+    __slots__ = ('_values',)
+
+    def __init__(self):
+        self._values = _Sharded(1)
+
+    def inc(self, amount=1):
+        self._values.shard()[0] += amount
+
+    @property
+    def value(self):
+        return self._values.totals()[0]
+
+
+class Histogram:
+    """Histograma de uma combinação de rótulos (contagem por faixa, soma e total)."""
+    __slots__ = ('buckets', '_values')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        # Uma posição por faixa, mais a faixa +Inf e a soma dos valores
+        self._values = _Sharded(len(buckets) + 2)
+
+    def observe(self, value):
+        shard = self._values.shard()
+        shard[bisect_left(self.buckets, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self):
+        """Retorna (contagem acumulada por faixa, soma, total)."""
+        values = self._values.totals()
+        cumulative = []
+        running = 0
+        for count in values[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, values[-1], running
+
+    @property
+    def count(self):
+        return self.snapshot()[2]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=''):
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{%s}' % ','.join(parts) if parts else ''
+
+
+def _format_number(value):
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class MetricFamily:
+    """
+    Uma métrica com nome, ajuda e nomes de rótulos.
+
+    Args:
+        name (str): Nome no Prometheus
+        documentation (str): Texto de ajuda (# HELP)
+        kind (str): 'counter' ou 'histogram'
+        labelnames (tuple): Nomes dos rótulos
+        buckets (tuple): Limites das faixas (só histogramas)
+    """
+
+    def __init__(self, name, documentation, kind, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = buckets
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """
+        Retorna (criando na primeira vez) a métrica de uma combinação de rótulos.
+
+        No caminho quente, guarde o retorno em vez de chamar labels a cada vez.
+        """
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = Histogram(self.buckets) if self.kind == 'histogram' else Counter()
+                    self._children[values] = child
+        return child
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in sorted(self._children.items()):
+            if self.kind == 'histogram':
+                cumulative, total, count = child.snapshot()
+                bounds = [_format_number(float(bound)) for bound in self.buckets] + ['+Inf']
+                for bound, running in zip(bounds, cumulative):
+                    labels = _format_labels(self.labelnames, values, f'le="{bound}"')
+                    lines.append(f'{self.name}_bucket{labels} {running}')
+                labels = _format_labels(self.labelnames, values)
+                lines.append(f'{self.name}_sum{labels} {_format_number(total)}')
+                lines.append(f'{self.name}_count{labels} {count}')
+            else:
+                labels = _format_labels(self.labelnames, values)
+                lines.append(f'{self.name}_total{labels} {_format_number(child.value)}')
+        return lines
+
+
+class Registry:
+    """Conjunto das métricas expostas em /metrics."""
+
+    def __init__(self):
+        self.families = []
+        self.collectors = []
+
+    def counter(self, name, documentation, labelnames=()):
+        """Cria e registra uma família de contadores (o sufixo _total é adicionado na saída)."""
+        family = MetricFamily(name, documentation, 'counter', labelnames)
+        self.families.append(family)
+        return family
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        """Cria e registra uma família de histogramas."""
+        family = MetricFamily(name, documentation, 'histogram', labelnames, buckets)
+        self.families.append(family)
+        return family
+
+    def add_collector(self, collector):
+        """
+        Registra uma função chamada a cada coleta.
+
+        A função retorna uma lista de (nome, tipo, ajuda, [(rótulos, valor)]),
+        onde rótulos é um dicionário.
+        """
+        self.collectors.append(collector)
+        return collector
+
+    def render(self):
+        """Gera o texto de todas as métricas no formato do Prometheus."""
+        lines = []
+        for family in self.families:
+            lines.extend(family.render())
+        for collector in self.collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    formatted = _format_labels(labels.keys(), labels.values())
+                    lines.append(f'{name}{formatted} {_format_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Registro da aplicação e métricas compartilhadas entre os módulos
+registry = Registry()
+
+ROUTE_LATENCY = registry.histogram(
+    'furia_http_request_duration_seconds',
+    'Tempo até o início da resposta, por rota', ('route',))
+INTENT_LATENCY = registry.histogram(
+    'furia_chat_intent_duration_seconds',
+    'Tempo para identificar e responder uma mensagem do chat, por intenção', ('intent',))
+CACHE_REQUESTS = registry.counter(
+    'furia_cache_requests',
+    'Consultas aos caches da aplicação, por cache e resultado (hit/miss)', ('cache', 'result'))
+UPSTREAM_LATENCY = registry.histogram(
+    'furia_upstream_request_duration_seconds',
+    'Duração das requisições ao Draft5, por URL', ('url',))
+UPSTREAM_RESPONSES = registry.counter(
+    'furia_upstream_responses',
+    'Respostas do Draft5, por URL e código HTTP', ('url', 'status'))
+UPSTREAM_FAILURES = registry.counter(
+    'furia_upstream_failures',
+    'Requisições ao Draft5 que falharam, por URL e motivo', ('url', 'reason'))
+UPSTREAM_SKIPPED = registry.counter(
+    'furia_upstream_skipped',
+    'Chamadas ao Draft5 que não viraram requisição, por URL e motivo '
+    '(coalesced, negative_cache, circuit_open)', ('url', 'reason'))
+TEAM_REFRESHES = registry.counter(
+    'furia_team_refreshes',
+    'Atualizações dos times acompanhados, por time e resultado (changed, unchanged, error)',
+    ('team', 'result'))
+CHAT_LOG_RECORDS = registry.counter(
+    'furia_chat_log_records',
+    'Registros das conversas do chat, por resultado (written, dropped, error)', ('result',))
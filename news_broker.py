@@ -0,0 +1,237 @@
+"""
+Canal de notificações das notícias por Server-Sent Events.
+
+Em vez de cada aba consultar /api/news a cada 5 minutos, os navegadores abrem
+uma conexão em /api/news/stream e o NewsBroker avisa todos de uma vez quando o
+cache de notícias é atualizado, enviando só a diferença (notícias novas ou
+alteradas e links removidos ou alterados).
+
+Cada evento é formatado uma única vez e os mesmos bytes vão para todos os
+inscritos. O inscrito guarda apenas o número do último evento que recebeu: o
+broker mantém um histórico curto dos últimos eventos e, se alguém ficar para
+trás além dele, envia o estado completo (snapshot) no lugar das diferenças.
+Assim a memória por conexão ociosa não cresce com o número de atualizações.
+
+O número dos eventos é a versão dos dados do Draft5 (a do snapshot
+compartilhado), a mesma em todos os workers: o cliente que recebeu a página de
+um worker e se inscreve em outro continua de onde estava. Uma versão que o
+broker não viu (ex.: um worker que pulou versões do snapshot) recebe o
+snapshot completo.
+
+Funciona com inscritos em threads (Flask, stream) e no event loop (ASGI,
+stream_async); publish pode ser chamado de qualquer thread.
+"""
+import json
+import threading
+from collections import OrderedDict, deque
+
+# Intervalo entre comentários de keep-alive nas conexões ociosas (em segundos)
+KEEPALIVE_INTERVAL = 15
+
+# Comentário SSE usado como keep-alive (ignorado pelo EventSource)
+KEEPALIVE = b': ping\n\n'
+
+
+def format_event(event, data, event_id):
+    """Formata um evento SSE com id, nome e dados em JSON."""
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    return f'id: {event_id}\nevent: {event}\ndata: {payload}\n\n'.encode('utf-8')
+
+
+def news_diff(old, new):
+    """
+    Calcula a diferença entre duas listas de notícias (identificadas pelo link).
+
+    Uma notícia alterada (mesmo link, outro título ou data) aparece nas duas
+    listas: o link em removidos e a notícia nova em adicionadas.
+
+    Returns:
+        tuple: (notícias novas ou alteradas, na ordem da lista nova; links
+        removidos ou alterados)
+    """
+    old_items = {item['link']: item for item in old}
+    new_items = {item['link']: item for item in new}
+    added = [item for item in new if old_items.get(item['link']) != item]
+    removed = [item['link'] for item in old if new_items.get(item['link']) != item]
+    return added, removed
+
+
+class NewsBroker:
+    """
+    Distribui as atualizações das notícias para os inscritos.
+
+    Args:
+        news (list): Notícias iniciais
+        history (int): Quantidade de eventos de diferença guardados para quem
+            estiver atrasado (ou reconectando com Last-Event-ID)
+        keepalive (float): Intervalo dos comentários de keep-alive, em segundos
+        version (int): Versão das notícias iniciais (a dos dados do Draft5)
+    """
+
+    def __init__(self, news=(), history=32, keepalive=KEEPALIVE_INTERVAL, version=0):
+        self.keepalive = keepalive
+        self.version = version
+        self.news = list(news)
+        self.subscribers = 0
+        # As versões são as dos dados, que também mudam sem mudar as notícias;
+        # a geração conta só as mudanças das notícias vistas por este broker
+        self._generation = 0
+        self._generations = OrderedDict([(version, 0)])  # versão -> geração
+        self._max_versions = history * 4
+        self._events = deque(maxlen=history)  # (geração, bytes do evento 'diff')
+        self._snapshot = format_event('snapshot', {'news': self.news}, self.version)
+        self._lock = threading.Lock()
+        self._condition = threading.Condition(self._lock)
+        self._loop_events = {}  # event loop -> asyncio.Event da próxima publicação
+        self._tickers = {}  # event loop -> tarefa que acorda os inscritos para o keep-alive
+
+    def publish(self, news, version=None):
+        """
+        Publica uma nova lista de notícias.
+
+        Só gera evento se alguma notícia entrou, saiu ou mudou.
+
+        Args:
+            news (list): Notícias
+            version (int): Versão dos dados (a do snapshot compartilhado); sem
+                ela, a versão só avança quando as notícias mudam
+
+        Returns:
+            bool: True se houve mudança (e os inscritos foram avisados)
+        """
+        news = list(news)
+        with self._lock:
+            added, removed = news_diff(self.news, news)
+            changed = bool(added or removed)
+            if version is None:
+                if not changed:
+                    return False
+                version = self.version + 1
+            if version == self.version:
+                return False
+            self.version = version
+            if changed:
+                self._generation += 1
+                self.news = news
+                self._events.append((self._generation, format_event(
+                    'diff', {'added': added, 'removed': removed}, version)))
+            self._generations[version] = self._generation
+            if len(self._generations) > self._max_versions:
+                self._generations.popitem(last=False)
+            self._snapshot = format_event('snapshot', {'news': self.news}, version)
+            if not changed:
+                # Versão nova com as mesmas notícias: os inscritos não têm o que receber
+                return False
+            self._condition.notify_all()
+            loops = list(self._loop_events)
+
+        for loop in loops:
+            try:
+                loop.call_soon_threadsafe(self._wake_loop, loop)
+            except RuntimeError:  # event loop já encerrado
+                with self._lock:
+                    self._loop_events.pop(loop, None)
+        return True
+
+    def events_since(self, version):
+        """
+        Retorna os eventos que um inscrito na versão informada ainda não recebeu.
+
+        Args:
+            version (int): Última versão recebida (None para um inscrito novo)
+
+        Returns:
+            tuple: (lista de eventos em bytes, versão atual)
+        """
+        with self._lock:
+            if version == self.version:
+                return [], version
+            generation = self._generations.get(version)
+            if generation is None or (self._events and self._events[0][0] > generation + 1):
+                # Versão desconhecida (de outro processo ou antiga demais): estado completo
+                return [self._snapshot], self.version
+            return [event for event_generation, event in self._events
+                    if event_generation > generation], self.version
+
+    def stream(self, since=None):
+        """
+        Gera os eventos de um inscrito (modo com threads, Flask).
+
+        Args:
+            since (int): Versão que o cliente já tem (Last-Event-ID); None envia
+                o snapshot primeiro
+        """
+        with self._lock:
+            self.subscribers += 1
+        try:
+            version = since
+            while True:
+                events, version = self.events_since(version)
+                if events:
+                    yield from events
+                    continue
+                with self._condition:
+                    if self.version == version:
+                        self._condition.wait(self.keepalive)
+                    idle = self.version == version
+                # O yield fica fora do lock: o gerador pode ficar parado nele
+                if idle:
+                    yield KEEPALIVE
+        finally:
+            with self._lock:
+                self.subscribers -= 1
+
+    async def stream_async(self, since=None):
+        """
+        Gera os eventos de um inscrito no event loop (modo ASGI).
+
+        Os inscritos de um mesmo event loop esperam num único asyncio.Event,
+        trocado a cada publicação; o keep-alive também é um só por event loop,
+        então um inscrito ocioso não tem timer nem tarefa própria.
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self.subscribers += 1
+            self._loop_events.setdefault(loop, asyncio.Event())
+            if loop not in self._tickers:
+                self._tickers[loop] = loop.create_task(self._tick(loop))
+        try:
+            version = since
+            while True:
+                # O evento é pego antes da checagem para não perder uma publicação
+                wakeup = self._loop_events[loop]
+                events, version = self.events_since(version)
+                if events:
+                    for event in events:
+                        yield event
+                    continue
+                await wakeup.wait()
+                if self.version == version:
+                    yield KEEPALIVE
+        finally:
+            with self._lock:
+                self.subscribers -= 1
+
+    async def _tick(self, loop):
+        # Acorda periodicamente os inscritos do event loop para o keep-alive
+        import asyncio
+
+        try:
+            while True:
+                await asyncio.sleep(self.keepalive)
+                self._wake_loop(loop)
+        finally:
+            with self._lock:
+                self._tickers.pop(loop, None)
+
+    def _wake_loop(self, loop):
+        # Roda dentro do event loop: acorda todos os inscritos dele de uma vez
+        import asyncio
+
+        with self._lock:
+            wakeup = self._loop_events.get(loop)
+            self._loop_events[loop] = asyncio.Event()
+        if wakeup is not None:
+            wakeup.set()
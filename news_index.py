@@ -0,0 +1,308 @@
+"""
+Busca nas notícias com um índice invertido em memória.
+
+Cada notícia (título e, quando houver, o texto da matéria em 'body') vira uma
+lista de termos normalizados como as mensagens do chat (minúsculas e sem
+acentos, ver intents.normalize), sem as palavras comuns do português. Para
+cada termo, o índice guarda as notícias em que ele aparece e quantas vezes
+(postings); as palavras do título contam em dobro. As buscas são ordenadas
+pelo BM25.
+
+O índice é atualizado aos poucos: update recebe a lista de notícias do
+Draft5 e só indexa as que ainda não estavam lá (ou mudaram), sem remontar o
+resto. As notícias que saem da página continuam no índice, que funciona como
+um arquivo das notícias já vistas, limitado pela idade: as mais antigas que
+max_age (em relação à notícia mais recente) e as que passam de max_docs saem
+primeiro.
+
+Termos presentes em boa parte das notícias ("furia", por exemplo) têm peso
+baixo e listas longas. Quando a busca também tem termos raros, as notícias
+são pontuadas a partir dos termos raros, e os comuns só completam a nota das
+candidatas; as listas longas só são percorridas quando uma notícia que tem
+apenas termos comuns ainda poderia entrar no resultado. O resultado é o mesmo
+de percorrer todas as listas. Buscas só com termos comuns percorrem as listas
+inteiras, mas são poucas as combinações possíveis: os resultados das últimas
+buscas ficam guardados até a próxima mudança no índice.
+"""
+import heapq
+import math
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from entity_index import WORD_RE
+from intents import normalize
+from match_store import parse_date
+
+# Idade máxima das notícias no índice (em dias, contados da notícia mais recente)
+NEWS_INDEX_MAX_AGE_DAYS = int(os.getenv('NEWS_INDEX_MAX_AGE_DAYS', '365'))
+
+# Número máximo de notícias no índice
+NEWS_INDEX_MAX_DOCS = int(os.getenv('NEWS_INDEX_MAX_DOCS', '20000'))
+
+# Peso das palavras do título em relação às do texto da matéria
+TITLE_WEIGHT = 2
+
+# Fração das notícias a partir da qual um termo é tratado como comum na busca
+COMMON_FRACTION = 0.05
+
+# Palavras que não são indexadas nem buscadas
+STOPWORDS = frozenset((
+    'a', 'o', 'as', 'os', 'e', 'de', 'da', 'do', 'das', 'dos', 'em', 'na', 'no', 'nas', 'nos',
+    'um', 'uma', 'uns', 'umas', 'para', 'pra', 'por', 'pela', 'pelo', 'com', 'sem', 'que',
+    'se', 'ao', 'aos', 'sobre', 'mais', 'ja', 'foi', 'sao', 'ser', 'como', 'tem', 'algo',
+    'alguma', 'algum', 'noticia', 'noticias', 'novidade', 'novidades', 'saiu', 'qual',
+    'quais', 'me', 'tudo', 'ultimas'
+))
+
+
+def tokenize(text):
+    """Termos do texto: palavras normalizadas (sem acentos), sem as palavras comuns."""
+    return [word for word in WORD_RE.findall(normalize(text or '')) if word not in STOPWORDS]
+
+
+def news_timestamp(item, default):
+    """
+    Momento da notícia, pela data dela ("09/04/2025" ou "2025-04-09").
+
+    Returns:
+        float: Timestamp do dia da notícia, ou default se a data não tiver o ano
+        ou não puder ser lida
+    """
+    parsed = parse_date(item.get('date') or '')
+    if parsed is None or parsed[0] is None:
+        return default
+    return datetime(*parsed).timestamp()
+
+
+class NewsIndex:
+    """
+    Índice invertido das notícias, com ordenação pelo BM25 (ver o início do módulo).
+
+    Pode ser consultado e atualizado de threads diferentes.
+
+    Args:
+        max_age (float): Idade máxima das notícias, em dias, contados a partir
+            da notícia mais recente do índice
+        max_docs (int): Número máximo de notícias
+        k1 (float): Saturação da frequência do termo no BM25
+        b (float): Peso do tamanho da notícia no BM25
+        cache_size (int): Número de resultados de buscas guardados
+    """
+
+    def __init__(self, max_age=NEWS_INDEX_MAX_AGE_DAYS, max_docs=NEWS_INDEX_MAX_DOCS,
+                 k1=1.2, b=0.75, cache_size=256):
+        self.max_age = max_age * 86400
+        self.max_docs = max_docs
+        self.cache_size = cache_size
+        self.k1 = k1
+        self.b = b
+        self.evictions = 0
+        self._items = {}  # id -> notícia
+        self._terms = {}  # id -> termos da notícia (para remover das postings)
+        self._lengths = {}  # id -> número de termos (com o peso do título)
+        self._times = {}  # id -> timestamp da notícia
+        self._ids = {}  # link -> id
+        self._postings = {}  # termo -> {id: frequência}
+        self._ages = []  # heap de (timestamp, id); ids já removidos são ignorados
+        self._results = OrderedDict()  # (termos, limite) -> resultado, até a próxima mudança
+        self._total_length = 0
+        self._newest = float('-inf')
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, link):
+        return link in self._ids
+
+    @property
+    def postings(self):
+        """Número de pares (termo, notícia) guardados, que dá o tamanho do índice."""
+        return sum(len(docs) for docs in self._postings.values())
+
+    def update(self, news, now=None):
+        """
+        Indexa as notícias novas (ou alteradas) da lista, identificadas pelo link.
+
+        As que não estão na lista continuam no índice até saírem pela idade.
+
+        Args:
+            news (list): Notícias ({title, date, link} e, opcionalmente, body)
+            now (float): Momento usado para as notícias sem data (padrão: agora)
+
+        Returns:
+            int: Número de notícias indexadas
+        """
+        now = time.time() if now is None else now
+        added = 0
+        with self._lock:
+            for item in news:
+                doc_id = self._ids.get(item['link'])
+                if doc_id is not None and self._items[doc_id] == item:
+                    continue
+                added += self._add(item, now)
+            self._evict()
+        return added
+
+    def add(self, item, now=None):
+        """
+        Indexa uma notícia (substitui a que tiver o mesmo link).
+
+        Returns:
+            bool: False se a notícia já é mais antiga que o limite de idade
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            added = self._add(item, now)
+            self._evict()
+        return added
+
+    def remove(self, link):
+        """Remove a notícia com o link informado, se estiver no índice."""
+        with self._lock:
+            doc_id = self._ids.get(link)
+            if doc_id is None:
+                return False
+            self._remove(doc_id)
+            return True
+
+    def _add(self, item, now):
+        timestamp = news_timestamp(item, now)
+        if timestamp < self._newest - self.max_age:
+            return False
+        previous = self._ids.get(item['link'])
+        if previous is not None:
+            self._remove(previous)
+
+        # Termos compartilhados (sys.intern): cada palavra fica uma vez só na memória
+        terms = {}
+        for term in tokenize(item.get('title')):
+            term = sys.intern(term)
+            terms[term] = terms.get(term, 0) + TITLE_WEIGHT
+        for term in tokenize(item.get('body')):
+            term = sys.intern(term)
+            terms[term] = terms.get(term, 0) + 1
+
+        self._results.clear()
+        doc_id = self._next_id
+        self._next_id += 1
+        self._ids[item['link']] = doc_id
+        self._items[doc_id] = item
+        self._terms[doc_id] = tuple(terms)
+        self._times[doc_id] = timestamp
+        length = sum(terms.values())
+        self._lengths[doc_id] = length
+        self._total_length += length
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[doc_id] = frequency
+        heapq.heappush(self._ages, (timestamp, doc_id))
+        self._newest = max(self._newest, timestamp)
+        return True
+
+    def _remove(self, doc_id):
+        self._results.clear()
+        item = self._items.pop(doc_id)
+        del self._ids[item['link']]
+        del self._times[doc_id]
+        self._total_length -= self._lengths.pop(doc_id)
+        for term in self._terms.pop(doc_id):
+            docs = self._postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self._postings[term]
+
+    def _evict(self):
+        """Remove as notícias mais antigas que max_age e as que passam de max_docs."""
+        cutoff = self._newest - self.max_age
+        while self._ages:
+            timestamp, doc_id = self._ages[0]
+            if doc_id not in self._items:
+                heapq.heappop(self._ages)  # Já removida ou substituída
+                continue
+            if timestamp >= cutoff and len(self._items) <= self.max_docs:
+                break
+            heapq.heappop(self._ages)
+            self._remove(doc_id)
+            self.evictions += 1
+        # O heap não acumula as entradas das notícias substituídas
+        if len(self._ages) > 2 * len(self._items) + 64:
+            self._ages = [(self._times[doc_id], doc_id) for doc_id in self._items]
+            heapq.heapify(self._ages)
+
+    def search(self, query, limit=10):
+        """
+        Busca as notícias mais relevantes para a consulta.
+
+        Args:
+            query (str): Texto da busca (ex.: "fallen", "PGL Astana")
+            limit (int): Número máximo de notícias
+
+        Returns:
+            list: Tuplas (nota, notícia), da mais relevante para a menos relevante
+            (empates ficam com a mais recente primeiro)
+        """
+        with self._lock:
+            # Em ordem alfabética: "furia pgl" e "pgl furia" usam o mesmo resultado guardado
+            terms = tuple(sorted(term for term in set(tokenize(query)) if term in self._postings))
+            if not terms or limit <= 0:
+                return []
+            key = (terms, limit)
+            found = self._results.get(key)
+            if found is None:
+                found = self._search(terms, limit)
+                if self.cache_size > 0:
+                    self._results[key] = found
+                    if len(self._results) > self.cache_size:
+                        self._results.popitem(last=False)
+            else:
+                self._results.move_to_end(key)
+            return [(score, self._items[doc_id]) for score, doc_id in found]
+
+    def _search(self, terms, limit):
+        count = len(self._items)
+        weights = {term: math.log(1 + (count - len(self._postings[term]) + 0.5)
+                                  / (len(self._postings[term]) + 0.5))
+                   for term in terms}
+        rare = [term for term in terms if len(self._postings[term]) <= COMMON_FRACTION * count]
+        common = [term for term in terms if term not in rare]
+        if not rare:
+            rare, common = terms, []
+
+        scores = {}
+        for term in rare:
+            self._score(scores, weights[term], self._postings[term].items())
+        for term in common:
+            postings = self._postings[term]
+            self._score(scores, weights[term],
+                        [(doc_id, postings[doc_id]) for doc_id in scores if doc_id in postings])
+        found = self._top(scores, limit)
+
+        # Uma notícia só com termos comuns tem no máximo esta nota
+        bound = sum(weights[term] for term in common) * (self.k1 + 1)
+        if common and (len(found) < limit or found[-1][0] < bound):
+            scores = {}
+            for term in terms:
+                self._score(scores, weights[term], self._postings[term].items())
+            found = self._top(scores, limit)
+        return found
+
+    def _score(self, scores, weight, postings):
+        """Soma a nota BM25 do termo (pares id, frequência) às notícias."""
+        k1, b = self.k1, self.b
+        average = self._total_length / len(self._items)
+        lengths = self._lengths
+        for doc_id, frequency in postings:
+            norm = k1 * (1 - b + b * lengths[doc_id] / average)
+            scores[doc_id] = scores.get(doc_id, 0.0) + \
+                weight * frequency * (k1 + 1) / (frequency + norm)
+
+    def _top(self, scores, limit):
+        times = self._times
+        best = heapq.nlargest(limit, scores.items(),
+                              key=lambda entry: (entry[1], times[entry[0]]))
+        return [(score, doc_id) for doc_id, score in best]
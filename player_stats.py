@@ -0,0 +1,256 @@
+"""
+Estatísticas numéricas dos jogadores em formato colunar.
+
+Os resultados guardam as estatísticas como texto de exibição ("31/28",
+"70.55%", "1.11"). O PlayerStatsStore converte esses textos uma única vez para
+colunas numéricas (array.array) e mantém índices por jogador, mapa e torneio,
+de modo que perguntas como "média de rating do KSCERATO nos últimos 5 jogos",
+"aproveitamento da FURIA na Inferno" ou "top ADR do campeonato" são respondidas
+com somas sobre fatias das colunas, sem reprocessar texto a cada requisição.
+
+Cada linha da tabela de jogadores é um jogador numa partida (o Draft5 não
+publica estatísticas por mapa); a tabela de mapas guarda o placar de cada mapa.
+"""
+import math
+import re
+from array import array
+from collections import defaultdict
+from typing import NamedTuple
+
+from intents import normalize
+
+class PlayerAverage(NamedTuple):
+    """Média das estatísticas de um jogador num conjunto de partidas."""
+    player: str
+    matches: int
+    rating: float
+    adr: float
+    kast: float
+    kills: int
+    deaths: int
+
+
+class MapWinRate(NamedTuple):
+    """Aproveitamento do time num mapa."""
+    map: str
+    played: int
+    won: int
+    win_rate: float
+
+
+class PlayerRanking(NamedTuple):
+    """Posição de um jogador num ranking de estatística."""
+    player: str
+    team: str
+    matches: int
+    value: float
+
+
+# Dois números separados por "/" ou "-" ("31/28", "13-8"), como no K/D e nos placares
+PAIR_RE = re.compile(r'^\s*(\d+)\s*[/-]\s*(\d+)\s*$')
+
+
+def _number(text):
+    """
+    Converte textos como "80.1", "70.55%" ou "+3" para float.
+
+    Textos sem número ("-", "N/A") e valores infinitos viram 0.
+    """
+    try:
+        value = float(str(text).strip().rstrip('%') or 0)
+    except ValueError:
+        return 0.0
+    return value if math.isfinite(value) else 0.0
+
+
+def _pair(text):
+    """
+    Converte um par "13-8" ou "31/28" para (13, 8).
+
+    Returns:
+        tuple: (esquerda, direita), ou None se o texto não for um par (ex.: "W.O.")
+    """
+    found = PAIR_RE.match(str(text))
+    if not found:
+        return None
+    return int(found.group(1)), int(found.group(2))
+
+
+class PlayerStatsStore:
+    """
+    Tabelas colunares das estatísticas, montadas a partir dos resultados.
+
+    Args:
+        results (list): Partidas no formato de fetch_furia_results (qualquer ordem)
+    """
+
+    def __init__(self, results):
+        # Partidas da mais recente para a mais antiga
+        results = sorted(results, key=lambda result: str(result.get('data', '')).split('/')[::-1],
+                         reverse=True)
+        self.match_count = len(results)
+
+        # Dicionários de nomes (texto guardado uma vez, colunas guardam o id)
+        self.players = []
+        self.teams = []
+        self.maps = []
+        self.tournaments = []
+        self._ids = {'players': {}, 'teams': {}, 'maps': {}, 'tournaments': {}}
+
+        # Colunas da tabela jogador x partida
+        self.row_match = array('i')
+        self.row_player = array('i')
+        self.row_team = array('i')
+        self.row_tournament = array('i')
+        self.kills = array('i')
+        self.deaths = array('i')
+        self.adr = array('d')
+        self.kast = array('d')
+        self.rating = array('d')
+
+        # Colunas da tabela de mapas (placar do time principal)
+        self.map_id = array('i')
+        self.map_match = array('i')
+        self.map_won = array('b')
+
+        # Índices: id -> linhas (em ordem da partida mais recente)
+        self.rows_by_player = defaultdict(lambda: array('i'))
+        self.rows_by_tournament = defaultdict(lambda: array('i'))
+        self.maps_by_map = defaultdict(lambda: array('i'))
+
+        for match, result in enumerate(results):
+            tournament = self._intern('tournaments', self.tournaments, result.get('torneio', ''))
+            for mapa, placar in (result.get('placares') or {}).items():
+                score = _pair(placar)
+                # Placares que não são números (ex.: "W.O.") ficam de fora
+                if score is None:
+                    continue
+                ours, theirs = score
+                # Mapas sem vencedor (nenhum time chegou a 13 rounds, ex.: "0-5") são ignorados
+                if max(ours, theirs) < 13:
+                    continue
+                map_id = self._intern('maps', self.maps, mapa)
+                self.maps_by_map[map_id].append(len(self.map_id))
+                self.map_id.append(map_id)
+                self.map_match.append(match)
+                self.map_won.append(1 if ours > theirs else 0)
+
+            for team, players in (result.get('estatisticas') or {}).items():
+                if not isinstance(players, dict):
+                    continue
+                team_id = self._intern('teams', self.teams, team)
+                for player, stats in players.items():
+                    if not isinstance(stats, dict):
+                        continue
+                    player_id = self._intern('players', self.players, player)
+                    row = len(self.row_match)
+                    # K/D ilegível ("-", "N/A") conta como 0/0
+                    kills, deaths = _pair(stats.get('K/D', '0/0')) or (0, 0)
+                    self.row_match.append(match)
+                    self.row_player.append(player_id)
+                    self.row_team.append(team_id)
+                    self.row_tournament.append(tournament)
+                    self.kills.append(kills)
+                    self.deaths.append(deaths)
+                    self.adr.append(_number(stats.get('ADR', 0)))
+                    self.kast.append(_number(stats.get('KAST', 0)))
+                    self.rating.append(_number(stats.get('Rating', 0)))
+                    self.rows_by_player[player_id].append(row)
+                    self.rows_by_tournament[tournament].append(row)
+
+        self.latest_tournament = results[0].get('torneio') if results else None
+
+    def _intern(self, kind, names, name):
+        ids = self._ids[kind]
+        key = normalize(name)
+        if key not in ids:
+            ids[key] = len(names)
+            names.append(name)
+        return ids[key]
+
+    def _lookup(self, kind, name):
+        return self._ids[kind].get(normalize(name)) if name else None
+
+    def player_average(self, player, last_n=None):
+        """
+        Média das estatísticas do jogador nas últimas N partidas.
+
+        Args:
+            player (str): Nick do jogador (sem diferenciar maiúsculas e acentos)
+            last_n (int): Quantidade de partidas mais recentes (padrão: todas)
+
+        Returns:
+            PlayerAverage: Médias do jogador, ou None se ele não tiver estatísticas
+        """
+        player_id = self._lookup('players', player)
+        if player_id is None:
+            return None
+        rows = self.rows_by_player[player_id]
+        if last_n:
+            rows = rows[:last_n]
+        count = len(rows)
+        return PlayerAverage(
+            player=self.players[player_id],
+            matches=count,
+            rating=sum(map(self.rating.__getitem__, rows)) / count,
+            adr=sum(map(self.adr.__getitem__, rows)) / count,
+            kast=sum(map(self.kast.__getitem__, rows)) / count,
+            kills=sum(map(self.kills.__getitem__, rows)),
+            deaths=sum(map(self.deaths.__getitem__, rows))
+        )
+
+    def map_win_rate(self, map_name):
+        """
+        Aproveitamento do time principal num mapa.
+
+        Returns:
+            MapWinRate: Mapas jogados, vencidos e taxa de vitória, ou None se o
+            mapa nunca foi jogado
+        """
+        map_id = self._lookup('maps', map_name)
+        if map_id is None:
+            return None
+        rows = self.maps_by_map[map_id]
+        won = sum(map(self.map_won.__getitem__, rows))
+        return MapWinRate(self.maps[map_id], len(rows), won, won / len(rows))
+
+    def map_win_rates(self):
+        """Aproveitamento em todos os mapas, do melhor para o pior."""
+        rates = [self.map_win_rate(name) for name in self.maps]
+        return sorted(rates, key=lambda rate: (-rate.win_rate, -rate.played))
+
+    def top(self, metric='adr', tournament=None, limit=5, team=None):
+        """
+        Ranking dos jogadores pela média de uma estatística.
+
+        Args:
+            metric (str): Coluna usada no ranking ('adr', 'rating' ou 'kast')
+            tournament (str): Torneio (padrão: o torneio da partida mais recente)
+            limit (int): Quantidade de jogadores no ranking
+            team (str): Limita o ranking a um time
+
+        Returns:
+            list: Lista de PlayerRanking do maior para o menor valor
+        """
+        tournament_id = self._lookup('tournaments', tournament or self.latest_tournament)
+        if tournament_id is None:
+            return []
+        column = getattr(self, metric)
+        team_id = self._lookup('teams', team)
+
+        totals = defaultdict(float)
+        counts = defaultdict(int)
+        for row in self.rows_by_tournament[tournament_id]:
+            if team_id is not None and self.row_team[row] != team_id:
+                continue
+            key = (self.row_player[row], self.row_team[row])
+            totals[key] += column[row]
+            counts[key] += 1
+
+        ranking = [
+            PlayerRanking(self.players[player], self.teams[team], counts[(player, team)],
+                          total / counts[(player, team)])
+            for (player, team), total in totals.items()
+        ]
+        ranking.sort(key=lambda item: -item.value)
+        return ranking[:limit]
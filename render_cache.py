@@ -0,0 +1,150 @@
+"""
+Cache das respostas já renderizadas do chat.
+
+As respostas de line-up, histórico, último jogo e estatísticas só mudam quando
+os dados de origem são atualizados. O RenderCache guarda o fragmento HTML
+pronto de cada resposta, indexado pelo nome da resposta, pelos parâmetros (ex.:
+a data do jogo) e pela versão dos dados; enquanto a versão não muda, responder
+é só uma consulta ao dicionário.
+
+Respostas longas podem ser renderizadas em seções (cabeçalho, placares, um
+bloco por jogador...) com cached_sections, para que o chat em streaming envie
+a primeira seção sem esperar o resto.
+
+Os fragmentos saem por LRU (o usado há mais tempo sai primeiro). Funções cujos
+argumentos são texto livre do usuário (ex.: o assunto de uma busca) usam
+max_size: seus fragmentos ficam num espaço separado, com limite próprio, e não
+tiram do cache as respostas mais pedidas.
+"""
+import functools
+from collections import OrderedDict
+
+from metrics import CACHE_REQUESTS
+
+
+class RenderCache:
+    """
+    Cache de fragmentos renderizados, invalidado pela versão dos dados.
+
+    Args:
+        version (callable): Função que retorna a versão atual dos dados
+        max_size (int): Número máximo de fragmentos guardados (os usados há mais
+            tempo saem primeiro)
+        name (str): Nome do cache nas métricas (furia_cache_requests_total)
+    """
+
+    def __init__(self, version, max_size=1024, name='render'):
+        self.version = version
+        self.max_size = max_size
+        self._fragments = OrderedDict()
+        self._pools = {}  # nome da função -> (OrderedDict, max_size), ver cached
+        self._hits = CACHE_REQUESTS.labels(name, 'hit')
+        self._misses = CACHE_REQUESTS.labels(name, 'miss')
+
+    @property
+    def hits(self):
+        return self._hits.value
+
+    @property
+    def misses(self):
+        return self._misses.value
+
+    def cached(self, func=None, max_size=None):
+        """
+        Decorador que guarda o resultado da função de renderização.
+
+        Os argumentos da função precisam ser hasheáveis; eles fazem parte da
+        chave do cache junto com o nome da função. Com max_size
+        (@render_cache.cached(max_size=64)), os fragmentos da função ficam num
+        espaço separado com esse limite.
+        """
+        if func is None:
+            return functools.partial(self.cached, max_size=max_size)
+        name = func.__name__
+        fragments, limit = self._pool(name, max_size)
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = (name, args)
+            version = self.version()
+            entry = self._lookup(fragments, key, version)
+            if entry is not None:
+                return entry[1]
+
+            fragment = func(*args)
+            self._store(fragments, limit, key, version, fragment)
+            return fragment
+
+        return wrapper
+
+    def cached_sections(self, func=None, max_size=None):
+        """
+        Decorador para funções geradoras que renderizam a resposta em seções.
+
+        A função decorada sempre retorna um iterador de seções. Se as seções
+        já estiverem no cache, ele percorre a tupla guardada; senão, entrega
+        cada seção assim que ela é gerada e guarda a tupla completa quando o
+        gerador termina (um consumidor que para no meio não grava nada).
+        max_size funciona como em cached.
+        """
+        if func is None:
+            return functools.partial(self.cached_sections, max_size=max_size)
+        name = func.__name__
+        fragments, limit = self._pool(name, max_size)
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = (name, args)
+            version = self.version()
+            entry = self._lookup(fragments, key, version)
+            if entry is not None:
+                return iter(entry[1])
+
+            return self._record(fragments, limit, key, version, func(*args))
+
+        return wrapper
+
+    def _pool(self, name, max_size):
+        """(fragmentos, limite) onde a função guarda os resultados."""
+        if max_size is None:
+            return self._fragments, None
+        self._pools[name] = (OrderedDict(), max_size)
+        return self._pools[name]
+
+    def _lookup(self, fragments, key, version):
+        entry = fragments.get(key)
+        if entry is not None and entry[0] == version:
+            self._hits.inc()
+            try:
+                # Usado agora: vai para o fim da fila de saída
+                fragments.move_to_end(key)
+            except KeyError:
+                pass  # Outra thread o tirou do cache
+            return entry
+        self._misses.inc()
+        return None
+
+    def _record(self, fragments, limit, key, version, sections):
+        produced = []
+        for section in sections:
+            produced.append(section)
+            yield section
+        self._store(fragments, limit, key, version, tuple(produced))
+
+    def _store(self, fragments, limit, key, version, fragment):
+        fragments[key] = (version, fragment)
+        fragments.move_to_end(key)
+        if len(fragments) > (self.max_size if limit is None else limit):
+            try:
+                fragments.popitem(last=False)
+            except KeyError:
+                pass
+
+    def clear(self):
+        """Descarta todos os fragmentos guardados."""
+        self._fragments.clear()
+        for fragments, _ in self._pools.values():
+            fragments.clear()
+
+    def __len__(self):
+        return len(self._fragments) + sum(len(fragments) for fragments, _ in self._pools.values())
@@ -0,0 +1,104 @@
+"""
+Estado da conversa por sessão.
+
+Cada visitante tem o seu próprio SessionState, guardado num SessionStore
+indexado pelo id da sessão. O store remove sessões paradas há mais tempo que o
+TTL e, quando chega ao tamanho máximo, descarta a sessão usada há mais tempo
+(LRU). Todas as operações são O(1) e protegidas por um lock.
+"""
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+# Tamanho máximo aceito para ids de sessão enviados pelo cliente
+MAX_SESSION_ID_LENGTH = 64
+
+
+class SessionState:
+    """
+    Estado da conversa de uma sessão.
+
+    Usa __slots__ para que centenas de milhares de sessões paradas ocupem pouca
+    memória.
+    """
+
+    __slots__ = ('esperando_estatisticas', 'esperando_data_estatisticas', 'team', 'last_seen')
+
+    def __init__(self):
+        self.esperando_estatisticas = False  # Aguardando confirmação para mostrar estatísticas
+        self.esperando_data_estatisticas = False  # Aguardando a data para mostrar estatísticas
+        self.team = None  # Slug do time acompanhado da conversa (None: a FURIA)
+        self.last_seen = time.monotonic()
+
+
+def new_session_id():
+    """Gera um id de sessão aleatório."""
+    return secrets.token_urlsafe(16)
+
+
+def is_valid_session_id(session_id):
+    """Verifica se o id de sessão enviado pelo cliente pode ser usado."""
+    return (isinstance(session_id, str)
+            and 0 < len(session_id) <= MAX_SESSION_ID_LENGTH
+            and session_id.isprintable())
+
+
+class SessionStore:
+    """
+    Store de sessões com expiração por inatividade e limite de tamanho.
+
+    As sessões ficam num OrderedDict ordenado pelo último acesso, então as
+    expiradas estão sempre no início e podem ser removidas sem varrer o store.
+
+    Args:
+        ttl (float): Tempo máximo de inatividade de uma sessão (em segundos)
+        max_size (int): Número máximo de sessões guardadas
+    """
+
+    def __init__(self, ttl=1800, max_size=200000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id):
+        """
+        Retorna o estado da sessão, criando um novo se ela não existir ou tiver expirado.
+
+        Args:
+            session_id (str): Id da sessão
+
+        Returns:
+            SessionState: Estado da sessão
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = SessionState()
+                self._sessions[session_id] = state
+                if len(self._sessions) > self.max_size:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            state.last_seen = now
+            return state
+
+    def discard(self, session_id):
+        """Remove a sessão do store (se existir)."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def _evict_expired(self, now):
+        sessions = self._sessions
+        limit = now - self.ttl
+        while sessions:
+            session_id, state = next(iter(sessions.items()))
+            if state.last_seen > limit:
+                break
+            del sessions[session_id]
+
+    def __len__(self):
+        return len(self._sessions)
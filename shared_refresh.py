@@ -0,0 +1,205 @@
+"""
+Atualização dos dados do Draft5 compartilhada entre vários workers.
+
+Com vários workers (gunicorn -w 4, uvicorn --workers 4), cada processo tem os
+seus caches e, sozinho, rodaria o seu próprio atualizador: o Draft5 receberia
+uma rodada de requisições por worker a cada intervalo e cada worker poderia
+servir uma versão diferente das notícias.
+
+Com o SharedRefresher, um único processo (o líder) busca o Draft5 e grava o
+snapshot (snapshot.py) a cada atualização que muda algo. Os demais (os
+seguidores) não acessam o Draft5: só conferem, a cada segundo, se o arquivo do
+snapshot mudou (um os.stat) e, quando muda, passam a servir a nova versão. O
+snapshot é mapeado em memória e cada seção é convertida uma vez por versão, não
+a cada requisição.
+
+A eleição usa um lock de arquivo (fcntl.flock) ao lado do snapshot: quem
+consegue o lock é o líder, e o sistema operacional o libera se o processo
+morrer, então um seguidor assume na rodada seguinte. O arquivo de lock também
+guarda o horário da última atualização, para que o novo líder continue no
+mesmo ritmo em vez de buscar o Draft5 na hora.
+
+Sem fcntl (Windows), cada processo é o líder de si mesmo, como antes.
+"""
+import os
+import threading
+import time
+
+from snapshot import load_snapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Intervalo (em segundos) entre as checagens do snapshot pelos seguidores
+FOLLOW_INTERVAL = 1.0
+
+
+class LeaderLock:
+    """
+    Lock de arquivo que define o líder entre os processos.
+
+    Args:
+        path (str): Arquivo do lock (criado se não existir)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        self._pid = None
+
+    @property
+    def held(self):
+        """Indica se este processo é o líder."""
+        return self._fd is not None and self._pid == os.getpid()
+
+    def acquire(self):
+        """
+        Tenta se tornar o líder, sem esperar.
+
+        Returns:
+            bool: True se este processo é o líder
+        """
+        if self.held:
+            return True
+        if self._fd is not None:
+            # Descritor herdado num fork: o lock continua sendo do processo pai
+            os.close(self._fd)
+            self._fd = None
+        if fcntl is None:
+            self._fd, self._pid = -1, os.getpid()
+            return True
+
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd, self._pid = fd, os.getpid()
+        return True
+
+    def last_refresh(self):
+        """Momento (epoch) da última atualização gravada por um líder, ou 0."""
+        try:
+            with open(self.path) as f:
+                return float(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            return 0.0
+
+    def mark_refresh(self, when):
+        """Grava no arquivo de lock o pid do líder e o momento da atualização."""
+        if self._fd is None or self._fd < 0:
+            return
+        os.ftruncate(self._fd, 0)
+        os.pwrite(self._fd, f"{os.getpid()} {when}\n".encode(), 0)
+
+    def release(self):
+        """Deixa de ser o líder."""
+        if self._fd is not None and self._fd >= 0:
+            os.close(self._fd)
+        self._fd = self._pid = None
+
+
+class SharedRefresher:
+    """
+    Coordena o atualizador do Draft5 entre processos (ver o início do módulo).
+
+    Args:
+        refresher (Draft5Refresher): Atualizador usado quando este processo é o líder
+        snapshot_path (str): Arquivo do snapshot (o lock fica em <arquivo>.lock)
+        adopt (callable): adopt(snapshot) publica nos caches um snapshot gravado
+            pelo líder
+        interval (float): Intervalo entre as atualizações (padrão: o do atualizador)
+        poll (float): Intervalo entre as checagens do snapshot pelos seguidores
+    """
+
+    def __init__(self, refresher, snapshot_path, adopt, interval=None, poll=FOLLOW_INTERVAL):
+        self.refresher = refresher
+        self.snapshot_path = snapshot_path
+        self.adopt = adopt
+        self.interval = refresher.interval if interval is None else interval
+        self.poll = poll
+        self.lock = LeaderLock(snapshot_path + '.lock')
+        self._seen = None  # (inode, mtime, tamanho) do último snapshot carregado
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def is_leader(self):
+        return self.lock.held
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.snapshot_path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns, stat.st_size
+
+    def follow(self):
+        """
+        Carrega o snapshot gravado pelo líder, se ele mudou desde a última checagem.
+
+        Returns:
+            bool: True se um snapshot novo foi carregado
+        """
+        seen = self._stat()
+        if seen is None or seen == self._seen:
+            return False
+        snapshot = load_snapshot(self.snapshot_path)
+        if snapshot is None:
+            return False
+        self._seen = seen
+        # Se este processo virar o líder, parte dos dados mais recentes
+        self.refresher.initial = snapshot
+        self.adopt(snapshot)
+        return True
+
+    def step(self):
+        """
+        Executa uma rodada: atualiza se for o líder e estiver na hora; senão,
+        acompanha o snapshot.
+
+        Returns:
+            float: Segundos até a próxima rodada
+        """
+        if not self.lock.acquire():
+            self.follow()
+            return self.poll
+
+        due = self.lock.last_refresh() + self.interval
+        now = time.time()
+        if now < due:
+            # Acabou de assumir: fica com o que o líder anterior gravou
+            self.follow()
+            return min(due - now, self.poll)
+        self.lock.mark_refresh(now)
+        self.refresher.refresh()
+        self._seen = self._stat()
+        return max(0.0, now + self.interval - time.time())
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                wait = self.step()
+            except Exception as e:
+                print(f"Erro ao atualizar dados do Draft5: {str(e)}")
+                wait = self.poll
+            self._stop.wait(wait)
+
+    def start(self):
+        """Inicia a thread de coordenação (se ainda não estiver rodando)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='draft5-shared',
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Para a thread e, se for o líder, libera o lock para outro processo."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.lock.release()
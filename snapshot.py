@@ -0,0 +1,200 @@
+"""
+Snapshot em disco dos dados do Draft5, para a aplicação reiniciar já com dados.
+
+Depois de cada atualização que muda algo, os dados processados de cada página
+(notícias, partidas, resultados, campeonatos e line-up), a versão dos dados e
+os horários são gravados num único arquivo. A gravação é atômica: o arquivo é
+escrito ao lado, com fsync, e trocado com os.replace, então quem lê nunca vê um
+snapshot pela metade.
+
+Formato do arquivo:
+    FURIASNAP1\\n
+    cabeçalho em JSON (versão, horários, páginas stale e posição de cada seção)\\n
+    seções em JSON, uma depois da outra
+
+Na leitura o arquivo é mapeado em memória (mmap) e só o cabeçalho é
+interpretado; cada seção é lida do disco e convertida na primeira vez que é
+usada. O LazyCache usa isso para que os caches da aplicação comecem
+preenchidos sem custo: a seção só é lida quando alguém consulta a chave.
+"""
+import json
+import mmap
+import os
+import tempfile
+import time
+
+# Arquivo padrão do snapshot (vazio desativa)
+SNAPSHOT_PATH = os.getenv('DRAFT5_SNAPSHOT_PATH', os.path.join('data', 'draft5_snapshot.bin'))
+
+MAGIC = b'FURIASNAP1\n'
+
+
+def save_snapshot(path, sections, version, last_update=None, stale=()):
+    """
+    Grava o snapshot de forma atômica.
+
+    Args:
+        path (str): Caminho do arquivo
+        sections (dict): Dados por página ({nome: dados serializáveis em JSON})
+        version (int): Versão dos dados (draft5_cache['version'])
+        last_update (str): Horário da última atualização (ISO 8601)
+        stale (iterable): Páginas cujos dados são os últimos bons
+
+    Returns:
+        int: Tamanho do arquivo gravado, em bytes
+    """
+    bodies = []
+    index = {}
+    offset = 0
+    for name, data in sections.items():
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        index[name] = [offset, len(body)]
+        offset += len(body)
+        bodies.append(body)
+    header = json.dumps({
+        'version': version,
+        'saved_at': time.time(),
+        'last_update': last_update,
+        'stale': sorted(stale),
+        'sections': index
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix='.snapshot-', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(MAGIC)
+            f.write(header)
+            f.write(b'\n')
+            for body in bodies:
+                f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    return len(MAGIC) + len(header) + 1 + offset
+
+
+class Snapshot:
+    """
+    Snapshot aberto para leitura (mapeado em memória).
+
+    Funciona como um dicionário somente leitura {página: dados}; cada seção é
+    convertida de JSON na primeira consulta e guardada.
+
+    Atributos:
+        version (int): Versão dos dados quando o snapshot foi gravado
+        saved_at (float): Momento (epoch) da gravação
+        last_update (str): Horário da última atualização dos dados (ISO 8601)
+        stale (list): Páginas que já estavam desatualizadas na gravação
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self._map.close()
+            raise ValueError(f"{path} não é um snapshot")
+        end = self._map.find(b'\n', len(MAGIC))
+        header = json.loads(self._map[len(MAGIC):end])
+        self._body = end + 1
+        self._index = header['sections']
+        self._loaded = {}
+        self.version = header['version']
+        self.saved_at = header['saved_at']
+        self.last_update = header['last_update']
+        self.stale = header['stale']
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __getitem__(self, name):
+        try:
+            return self._loaded[name]
+        except KeyError:
+            offset, length = self._index[name]
+            start = self._body + offset
+            data = self._loaded[name] = json.loads(self._map[start:start + length])
+            return data
+
+    def get(self, name, default=None):
+        return self[name] if name in self._index else default
+
+    def keys(self):
+        return self._index.keys()
+
+
+def load_snapshot(path=SNAPSHOT_PATH):
+    """
+    Abre o snapshot, se existir e for válido.
+
+    Returns:
+        Snapshot: Snapshot aberto, ou None
+    """
+    if not path:
+        return None
+    try:
+        return Snapshot(path)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Erro ao ler o snapshot ({path}): {str(e)}")
+        return None
+
+
+class LazyCache(dict):
+    """
+    Dicionário de cache que busca no snapshot as chaves que ainda não tem.
+
+    Uma chave ausente é lida do snapshot (pelo nome da seção em sources) na
+    primeira consulta; a partir daí fica no dicionário como qualquer outra.
+    Atribuir a chave (ex.: depois de uma atualização) descarta o valor do snapshot.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._snapshot = None
+        self._sources = {}
+
+    def attach(self, snapshot, sources):
+        """
+        Passa a ler do snapshot as chaves informadas.
+
+        Args:
+            snapshot (Snapshot): Snapshot aberto
+            sources (dict): {chave do cache: nome da seção no snapshot}
+        """
+        self._snapshot = snapshot
+        self._sources = {key: section for key, section in sources.items() if section in snapshot}
+        for key in self._sources:
+            self.pop(key, None)
+
+    def load_all(self):
+        """Lê do snapshot, de uma vez, todas as chaves ainda não consultadas."""
+        for key in self._sources:
+            self[key]
+
+    def __missing__(self, key):
+        section = self._sources.get(key)
+        if section is None:
+            raise KeyError(key)
+        value = self[key] = self._snapshot[section]
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
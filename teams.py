@@ -0,0 +1,324 @@
+"""
+Times acompanhados pelo chat: configuração, dados de cada time e agenda de atualização.
+
+A FURIA (DRAFT5_TEAM) é o time principal: os dados dela ficam nos caches de
+flask_app e são atualizados pelo Draft5Refresher, como sempre. Os demais times
+acompanhados (DRAFT5_TEAMS: academy, time feminino, rivais...) têm só as
+páginas de equipe no Draft5 (notícias e line-up); partidas e resultados vêm
+das páginas gerais, já baixadas para a FURIA, filtradas pelo nome do time.
+
+Os dados de cada time formam uma partição, guardada no TeamPartitions: um LRU
+limitado pelo tamanho aproximado das partições (o JSON delas), então a memória
+não cresce com o número de times, só com o limite configurado. Uma partição
+descartada volta do snapshot do time em disco, ou na próxima atualização.
+
+O RefreshScheduler distribui as atualizações dos times no tempo: no início, os
+N times ficam espalhados ao longo de um intervalo, e duas atualizações seguidas
+respeitam um espaçamento mínimo. Assim o Draft5 recebe no máximo as páginas de
+um time a cada espaçamento, qualquer que seja o número de times. Cada time
+volta para a fila com o seu próprio intervalo: times com partida hoje (ao vivo)
+são atualizados mais vezes; times de prioridade baixa (ex.: rivais), menos.
+
+Formato de DRAFT5_TEAMS: slugs do Draft5 separados por vírgula, cada um com a
+prioridade opcional (high, normal ou low) depois de dois-pontos:
+    DRAFT5_TEAMS="12345-FURIA-Academy:high,23456-FURIA-fe,4494-MIBR:low"
+"""
+import heapq
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+# Multiplicador do intervalo de atualização por prioridade
+PRIORITY_FACTORS = {'high': 1, 'normal': 2, 'low': 4}
+
+# Intervalo de atualização dos times com partida hoje (em segundos)
+LIVE_REFRESH_INTERVAL = int(os.getenv('DRAFT5_LIVE_REFRESH_INTERVAL', '60'))
+
+# Tamanho máximo (aproximado, em bytes) das partições dos times em memória
+TEAM_CACHE_BYTES = int(os.getenv('TEAM_CACHE_BYTES', str(4 * 1024 * 1024)))
+
+
+class Team(NamedTuple):
+    """Time acompanhado (slug do Draft5, nome exibido e prioridade de atualização)."""
+    slug: str
+    name: str
+    priority: str = 'normal'
+
+
+def team_key(name):
+    """Forma comparável de um nome de time ("Virtus.pro" e "virtus-pro" viram "virtuspro")."""
+    return re.sub(r'[^a-z0-9]', '', name.lower())
+
+
+def parse_teams(value):
+    """
+    Lê a lista de times no formato de DRAFT5_TEAMS.
+
+    O nome vem do slug, sem o número ("330-FURIA" vira "FURIA" e
+    "12345-FURIA-Academy" vira "FURIA Academy").
+
+    Args:
+        value (str): Slugs separados por vírgula, com a prioridade opcional
+
+    Returns:
+        list: Lista de Team, sem repetições
+    """
+    teams = {}
+    for item in (value or '').split(','):
+        slug, _, priority = item.strip().partition(':')
+        if not slug:
+            continue
+        priority = priority.strip().lower() or 'normal'
+        if priority not in PRIORITY_FACTORS:
+            raise ValueError(f'Prioridade inválida para {slug}: {priority}')
+        _, _, name = slug.partition('-')
+        teams.setdefault(slug, Team(slug, (name or slug).replace('-', ' '), priority))
+    return list(teams.values())
+
+
+# Time principal e demais times acompanhados
+HOME_TEAM = parse_teams(os.getenv('DRAFT5_TEAM', '330-FURIA'))[0]
+FOLLOWED_TEAMS = [team for team in parse_teams(os.getenv('DRAFT5_TEAMS', ''))
+                  if team.slug != HOME_TEAM.slug]
+
+
+def find_team(value, teams):
+    """
+    Procura o time pelo slug, pelo número do Draft5 ou pelo nome.
+
+    Returns:
+        Team: O time, ou None se nenhum corresponder
+    """
+    if not value:
+        return None
+    key = team_key(str(value))
+    for team in teams:
+        if key in (team_key(team.slug), team.slug.partition('-')[0], team_key(team.name)):
+            return team
+    return None
+
+
+def team_games(games, name):
+    """
+    Partidas (ou resultados) das páginas gerais do Draft5 em que o time joga.
+
+    Quando o time aparece como adversário, os lados são trocados (e o placar
+    invertido), para que 'team' seja sempre o time informado.
+
+    Args:
+        games (list): Partidas ({team, opponent, ...}) ou resultados ({..., score})
+        name (str): Nome do time
+
+    Returns:
+        list: Partidas do time, na ordem original
+    """
+    key = team_key(name)
+    found = []
+    for game in games:
+        if team_key(game['team']) == key:
+            found.append(game)
+        elif team_key(game['opponent']) == key:
+            swapped = dict(game, team=game['opponent'], opponent=game['team'])
+            if 'score' in game:
+                swapped['score'] = '-'.join(reversed(game['score'].split('-')))
+            found.append(swapped)
+    return found
+
+
+def partition_size(data):
+    """Tamanho aproximado da partição em memória (o do JSON dela), em bytes."""
+    return len(json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+
+
+class TeamPartitions:
+    """
+    Dados dos times num LRU limitado pelo tamanho total das partições.
+
+    Ao passar do limite, as partições usadas há mais tempo saem primeiro (a que
+    acabou de entrar fica, mesmo sozinha acima do limite). on_evict(slug) é
+    chamado para cada partição descartada, fora do lock.
+
+    Args:
+        max_bytes (int): Tamanho máximo do total das partições
+        on_evict (callable): Chamada com o slug de cada partição descartada
+    """
+
+    def __init__(self, max_bytes=TEAM_CACHE_BYTES, on_evict=None):
+        self.max_bytes = max_bytes
+        self.on_evict = on_evict
+        self.evictions = 0
+        self._partitions = OrderedDict()  # slug -> (dados, tamanho)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._partitions)
+
+    def __contains__(self, slug):
+        return slug in self._partitions
+
+    @property
+    def bytes(self):
+        return self._bytes
+
+    def get(self, slug):
+        """Retorna a partição do time (e a marca como usada agora), ou None."""
+        with self._lock:
+            entry = self._partitions.get(slug)
+            if entry is None:
+                return None
+            self._partitions.move_to_end(slug)
+            return entry[0]
+
+    def peek(self, slug):
+        """Como get, sem mexer na ordem do LRU (ex.: para o atualizador)."""
+        entry = self._partitions.get(slug)
+        return entry[0] if entry is not None else None
+
+    def put(self, slug, data):
+        """Guarda a partição do time e descarta as mais antigas se passar do limite."""
+        size = partition_size(data)
+        evicted = []
+        with self._lock:
+            previous = self._partitions.pop(slug, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._partitions[slug] = (data, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and len(self._partitions) > 1:
+                old, (_, old_size) = self._partitions.popitem(last=False)
+                self._bytes -= old_size
+                self.evictions += 1
+                evicted.append(old)
+        if self.on_evict is not None:
+            for old in evicted:
+                self.on_evict(old)
+
+    def discard(self, slug):
+        """Remove a partição do time, se existir."""
+        with self._lock:
+            entry = self._partitions.pop(slug, None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+
+class RefreshScheduler:
+    """
+    Agenda as atualizações dos times numa única thread (ver o início do módulo).
+
+    Args:
+        teams (list): Times a atualizar
+        refresh (callable): refresh(team) busca e publica os dados do time
+        interval (callable): interval(team) retorna os segundos até a próxima
+            atualização do time (ex.: menor com partida hoje)
+        spacing (float): Tempo mínimo entre o início de duas atualizações
+        active (callable): active() indica se este processo deve buscar o
+            Draft5 (ex.: só o worker líder); se não, a vez do time só é remarcada
+    """
+
+    def __init__(self, teams, refresh, interval, spacing, active=None):
+        self.teams = {team.slug: team for team in teams}
+        self.refresh = refresh
+        self.interval = interval
+        self.spacing = spacing
+        self.active = active or (lambda: True)
+        self.refreshes = 0
+        self._queue = []  # heap de (momento, sequência, slug)
+        self._due = {}  # slug -> momento agendado (entradas antigas do heap são ignoradas)
+        self._sequence = 0
+        self._last_start = float('-inf')
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.schedule()
+
+    def __len__(self):
+        return len(self.teams)
+
+    def _push(self, slug, due):
+        self._due[slug] = due
+        self._sequence += 1
+        heapq.heappush(self._queue, (due, self._sequence, slug))
+
+    def schedule(self, start=None):
+        """Espalha a primeira atualização dos times a cada spacing, a partir de start."""
+        start = time.monotonic() if start is None else start
+        with self._lock:
+            self._queue, self._due = [], {}
+            for i, slug in enumerate(self.teams):
+                self._push(slug, start + i * self.spacing)
+
+    def request(self, slug):
+        """Antecipa a atualização do time (ex.: dados pedidos e ainda não carregados)."""
+        with self._lock:
+            if slug not in self.teams or self._due.get(slug, float('inf')) <= time.monotonic():
+                return
+            self._push(slug, time.monotonic())
+        self._wake.set()
+
+    def next_due(self, slug):
+        """Momento (time.monotonic) agendado para a próxima atualização do time."""
+        return self._due.get(slug)
+
+    def step(self, now=None):
+        """
+        Atualiza o próximo time, se já for a vez dele e o espaçamento permitir.
+
+        Returns:
+            float: Segundos até a próxima rodada
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            while self._queue and self._due.get(self._queue[0][2]) != self._queue[0][0]:
+                heapq.heappop(self._queue)  # Remarcado depois de entrar na fila
+            if not self._queue:
+                return self.spacing
+            due, _, slug = self._queue[0]
+            start = max(due, self._last_start + self.spacing)
+            if now < start:
+                return start - now
+            heapq.heappop(self._queue)
+            del self._due[slug]
+            self._last_start = now
+
+        team = self.teams[slug]
+        try:
+            if self.active():
+                self.refresh(team)
+                self.refreshes += 1
+        finally:
+            with self._lock:
+                if slug not in self._due:
+                    self._push(slug, now + self.interval(team))
+        return 0.0
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                wait = self.step()
+            except Exception as e:
+                print(f"Erro ao atualizar dados dos times: {str(e)}")
+                wait = self.spacing
+            if wait > 0:
+                self._wake.wait(wait)
+                self._wake.clear()
+
+    def start(self):
+        """Inicia a thread da agenda (se ainda não estiver rodando)."""
+        if not self.teams or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='draft5-teams', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Para a thread da agenda."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,300 @@
+"""
+Proteções das chamadas ao Draft5 (ou a qualquer outro serviço externo).
+
+O UpstreamGuard envolve cada requisição e combina:
+- coalescência (single-flight): chamadas simultâneas à mesma URL esperam a
+  requisição que já está em andamento em vez de fazer a sua;
+- limite de requisições simultâneas por host;
+- cache negativo: uma URL que acabou de falhar devolve o mesmo erro por alguns
+  segundos, sem nova requisição;
+- disjuntor (circuit breaker) por host: depois de várias falhas seguidas, as
+  chamadas falham na hora com CircuitOpenError até passar o tempo de espera;
+  aí uma única requisição de teste decide se o circuito fecha de novo.
+
+Os tempos limite de conexão e de leitura ficam nos clientes HTTP (draft5.py).
+Quem chama decide o que fazer com a falha: o atualizador do Draft5 mantém os
+últimos dados bons e os marca como desatualizados (stale).
+
+Há uma versão para threads (call) e outra para o event loop (call_async).
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+from metrics import UPSTREAM_SKIPPED
+
+# Requisições simultâneas permitidas por host
+MAX_PER_HOST = 4
+
+# Falhas seguidas que abrem o circuito de um host
+BREAKER_FAILURES = 5
+
+# Tempo (em segundos) com o circuito aberto antes da requisição de teste
+BREAKER_RESET = 60
+
+# Tempo (em segundos) que uma falha fica no cache negativo
+NEGATIVE_TTL = 10
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada porque o circuito do host está aberto."""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"circuito aberto para {host} (nova tentativa em {retry_in:.0f} s)")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def is_upstream_failure(error):
+    """
+    Indica se o erro conta como falha do serviço para o disjuntor.
+
+    Erros 4xx são respostas do serviço (ex.: página removida) e não indicam que
+    ele está fora do ar; timeouts, erros de conexão e 5xx indicam.
+    """
+    status = getattr(getattr(error, 'response', None), 'status_code', None)
+    return status is None or status >= 500
+
+
+class CircuitBreaker:
+    """
+    Disjuntor de um host: 'closed' (normal), 'open' (recusa tudo) ou 'half_open'
+    (deixa passar uma única requisição de teste).
+
+    Args:
+        failures (int): Falhas seguidas que abrem o circuito
+        reset (float): Segundos com o circuito aberto antes do teste
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, reset=BREAKER_RESET):
+        self.failures = failures
+        self.reset = reset
+        self.state = 'closed'
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Verifica se uma requisição pode ser feita agora.
+
+        Returns:
+            float: 0 se pode; senão, segundos até a próxima tentativa
+        """
+        with self._lock:
+            if self.state == 'closed':
+                return 0
+            remaining = self.opened_at + self.reset - time.monotonic()
+            if self.state == 'open' and remaining <= 0:
+                # Passa só esta requisição; as outras esperam o resultado dela
+                self.state = 'half_open'
+                return 0
+            return max(remaining, 0.001)
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.consecutive_failures += 1
+            if self.state == 'half_open' or self.consecutive_failures >= self.failures:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def record_abort(self):
+        """
+        Registra uma requisição interrompida sem resposta (ex.: cancelada).
+
+        Não conta como falha do host; mas, se era a requisição de teste, o
+        circuito volta a 'open' (com nova espera) para que outra possa testar.
+        """
+        with self._lock:
+            if self.state == 'half_open':
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+
+class UpstreamGuard:
+    """
+    Coalescência, limite por host, cache negativo e disjuntor para as chamadas.
+
+    Args:
+        max_per_host (int): Requisições simultâneas por host
+        failures (int): Falhas seguidas que abrem o circuito de um host
+        reset (float): Segundos com o circuito aberto antes do teste
+        negative_ttl (float): Segundos que uma falha fica no cache negativo
+    """
+
+    def __init__(self, max_per_host=MAX_PER_HOST, failures=BREAKER_FAILURES,
+                 reset=BREAKER_RESET, negative_ttl=NEGATIVE_TTL):
+        self.max_per_host = max_per_host
+        self.failures = failures
+        self.reset = reset
+        self.negative_ttl = negative_ttl
+        self.breakers = {}       # host -> CircuitBreaker
+        self._negative = {}      # url -> (expira em, exceção)
+        self._semaphores = {}    # host -> threading.BoundedSemaphore
+        self._async_semaphores = {}  # host -> asyncio.Semaphore
+        self._inflight = {}      # url -> _Flight (threads)
+        self._async_inflight = {}  # url -> asyncio.Future
+        self._lock = threading.Lock()
+
+    def breaker(self, host):
+        with self._lock:
+            breaker = self.breakers.get(host)
+            if breaker is None:
+                breaker = self.breakers[host] = CircuitBreaker(self.failures, self.reset)
+            return breaker
+
+    def _check(self, url):
+        """Levanta o erro do cache negativo ou CircuitOpenError; retorna (host, disjuntor)."""
+        entry = self._negative.get(url)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                UPSTREAM_SKIPPED.labels(url, 'negative_cache').inc()
+                raise entry[1]
+            self._negative.pop(url, None)
+
+        host = urlsplit(url).netloc
+        breaker = self.breaker(host)
+        retry_in = breaker.allow()
+        if retry_in:
+            UPSTREAM_SKIPPED.labels(url, 'circuit_open').inc()
+            raise CircuitOpenError(host, retry_in)
+        return host, breaker
+
+    def _record(self, url, breaker, error):
+        if error is None:
+            breaker.record_success()
+            return
+        if is_upstream_failure(error):
+            breaker.record_failure()
+        else:
+            # A resposta chegou (ex.: 404): o host está no ar
+            breaker.record_success()
+        self._negative[url] = (time.monotonic() + self.negative_ttl, error)
+
+    def call(self, url, fetch):
+        """
+        Executa fetch() para a URL com todas as proteções (modo com threads).
+
+        Args:
+            url (str): URL requisitada (chave da coalescência e do cache negativo)
+            fetch (callable): Função que faz a requisição e retorna o resultado
+
+        Returns:
+            O resultado de fetch(), possivelmente de uma chamada simultânea
+        """
+        with self._lock:
+            flight = self._inflight.get(url)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[url] = _Flight()
+        if not leader:
+            UPSTREAM_SKIPPED.labels(url, 'coalesced').inc()
+            return flight.wait()
+
+        try:
+            host, breaker = self._check(url)
+            with self._lock:
+                semaphore = self._semaphores.get(host)
+                if semaphore is None:
+                    semaphore = self._semaphores[host] = threading.BoundedSemaphore(
+                        self.max_per_host)
+            try:
+                with semaphore:
+                    result = fetch()
+            except Exception as e:
+                self._record(url, breaker, e)
+                raise
+            except BaseException:
+                # Interrompida (ex.: KeyboardInterrupt): não deixa o circuito preso em teste
+                breaker.record_abort()
+                raise
+            self._record(url, breaker, None)
+            flight.resolve(result)
+            return result
+        except BaseException as e:
+            flight.fail(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(url, None)
+
+    async def call_async(self, url, fetch):
+        """
+        Versão para o event loop de call.
+
+        Args:
+            url (str): URL requisitada
+            fetch (callable): Função assíncrona (sem argumentos) que faz a requisição
+        """
+        import asyncio
+
+        future = self._async_inflight.get(url)
+        if future is not None:
+            UPSTREAM_SKIPPED.labels(url, 'coalesced').inc()
+            # shield: um seguidor cancelado não cancela a requisição dos outros
+            return await asyncio.shield(future)
+
+        future = self._async_inflight[url] = asyncio.get_running_loop().create_future()
+        try:
+            host, breaker = self._check(url)
+            semaphore = self._async_semaphores.get(host)
+            if semaphore is None:
+                semaphore = self._async_semaphores[host] = asyncio.Semaphore(self.max_per_host)
+            try:
+                async with semaphore:
+                    result = await fetch()
+            except Exception as e:
+                self._record(url, breaker, e)
+                raise
+            except BaseException:
+                # Cancelada (CancelledError não é Exception): não deixa o circuito preso em teste
+                breaker.record_abort()
+                raise
+            self._record(url, breaker, None)
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Evita o aviso de exceção nunca lida quando ninguém estava esperando
+            future.exception()
+            raise
+        finally:
+            self._async_inflight.pop(url, None)
+
+    def open_hosts(self):
+        """Hosts com o circuito aberto (ou em teste)."""
+        with self._lock:
+            breakers = list(self.breakers.items())
+        return sorted(host for host, breaker in breakers if breaker.state != 'closed')
+
+
+class _Flight:
+    """Resultado compartilhado de uma requisição em andamento (modo com threads)."""
+    __slots__ = ('_done', '_result', '_error')
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._result = None
+        self._error = None
+
+    def resolve(self, result):
+        self._result = result
+        self._done.set()
+
+    def fail(self, error):
+        self._error = error
+        self._done.set()
+
+    def wait(self):
+        self._done.wait()
+        if self._error is not None:
+            raise self._error
+        return self._result